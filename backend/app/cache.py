@@ -0,0 +1,298 @@
+"""Response cache for read-heavy endpoints.
+
+Cached responses are stored as serialized JSON together with an ETag, so a
+hit costs one lookup and no serialization, and a matching ``If-None-Match``
+is answered with ``304 Not Modified``.
+
+Invalidation is by tag. Each tag (``content``, ``watches``) has a version
+counter that is part of every cache key built from it; writes bump the
+version, which orphans every entry computed from the old data. Orphaned
+entries simply age out through the LRU/TTL, so invalidation is O(1) and
+works the same on the in-process and Redis backends.
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from fastapi import Request, Response
+
+from .config import settings
+from .responses import dump_json
+from .services.tmdb_client import TTLCache
+
+CONTENT = "content"
+WATCHES = "watches"
+
+
+class MemoryBackend:
+    """In-process LRU with TTL; tag versions live in a plain dict."""
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self._entries = TTLCache(ttl=ttl, max_entries=max_entries)
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries.set(key, value)
+
+    def versions(self, tags: Sequence[str]) -> List[int]:
+        return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisBackend:
+    """Shared cache in Redis, so every worker process sees the same entries and tags."""
+
+    def __init__(self, client, ttl: float, prefix: str = "watchlist:cache:"):
+        self.client = client
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float) -> "RedisBackend":
+        import redis
+        return cls(redis.Redis.from_url(url), ttl)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def versions(self, tags: Sequence[str]) -> List[int]:
+        values = self.client.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self.client.incr(f"{self.prefix}tag:{tag}")
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for ``redis.Redis``.
+
+    Strings (get/set/mget/incr/scan/delete), lists (lpush/rpop/lmove/lrem/
+    lrange) and sorted sets (zadd/zrangebyscore/zrem): enough for the cache
+    and job queue backends, so tests can exercise them without a server.
+    Expiry is not simulated.
+    """
+
+    def __init__(self):
+        self.data: Dict[str, bytes] = {}
+        self.lists: Dict[str, List[bytes]] = {}
+        self.zsets: Dict[str, Dict[bytes, float]] = {}
+
+    @staticmethod
+    def _bytes(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.data.get(key)
+
+    def set(self, key: str, value, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and key in self.data:
+            return None
+        self.data[key] = self._bytes(value)
+        return True
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [self.data.get(key) for key in keys]
+
+    def incr(self, key: str) -> int:
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    def scan_iter(self, match: str = "*"):
+        prefix = match.rstrip("*")
+        return [key for key in self.data if key.startswith(prefix)]
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.data.pop(key, None)
+
+    def lpush(self, key: str, *values) -> int:
+        items = self.lists.setdefault(key, [])
+        for value in values:
+            items.insert(0, self._bytes(value))
+        return len(items)
+
+    def rpop(self, key: str) -> Optional[bytes]:
+        items = self.lists.get(key)
+        return items.pop() if items else None
+
+    def lmove(self, source: str, destination: str, src: str = "LEFT", dest: str = "RIGHT") -> Optional[bytes]:
+        items = self.lists.get(source)
+        if not items:
+            return None
+        value = items.pop(0 if src == "LEFT" else -1)
+        target = self.lists.setdefault(destination, [])
+        target.insert(0 if dest == "LEFT" else len(target), value)
+        return value
+
+    def lrem(self, key: str, count: int, value) -> int:
+        items = self.lists.get(key, [])
+        value = self._bytes(value)
+        removed = 0
+        while value in items and (count == 0 or removed < abs(count)):
+            items.remove(value)
+            removed += 1
+        return removed
+
+    def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        items = self.lists.get(key, [])
+        return items[start:None if end == -1 else end + 1]
+
+    def zadd(self, key: str, mapping: Dict[Any, float]) -> int:
+        zset = self.zsets.setdefault(key, {})
+        added = sum(self._bytes(member) not in zset for member in mapping)
+        zset.update({self._bytes(member): score for member, score in mapping.items()})
+        return added
+
+    def zrangebyscore(self, key: str, min: float, max: float) -> List[bytes]:
+        zset = self.zsets.get(key, {})
+        return [member for member, score in sorted(zset.items(), key=lambda item: item[1]) if min <= score <= max]
+
+    def zrem(self, key: str, *members) -> int:
+        zset = self.zsets.get(key, {})
+        return sum(zset.pop(self._bytes(member), None) is not None for member in members)
+
+
+class CachedBody(NamedTuple):
+    etag: str
+    headers: Dict[str, str]
+    body: bytes
+
+
+class ResponseCache:
+    """Tag-versioned cache of serialized JSON responses."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _key(self, namespace: str, tags: Sequence[str]) -> str:
+        versions = self.backend.versions(tags)
+        tagged = ",".join(f"{tag}={version}" for tag, version in zip(tags, versions))
+        return hashlib.blake2b(f"{namespace}|{tagged}".encode(), digest_size=16).hexdigest()
+
+    def get_or_set(
+        self,
+        namespace: str,
+        tags: Sequence[str],
+        compute: Callable[[], Any],
+        headers: Optional[Callable[[Any], Dict[str, str]]] = None
+    ) -> CachedBody:
+        """Return the cached body for ``namespace``, computing and storing it on a miss.
+
+        ``headers`` derives extra response headers from the computed value;
+        they are cached with the body.
+        """
+        key = self._key(namespace, tags)
+        entry = self.backend.get(key)
+        if entry is not None:
+            etag, extra, body = entry.split(b"\n", 2)
+            return CachedBody(etag.decode(), json.loads(extra), body)
+
+        value = compute()
+        extra = headers(value) if headers else {}
+        body = dump_json(value)
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.backend.set(key, b"\n".join([etag.encode(), json.dumps(extra).encode(), body]))
+        return CachedBody(etag, extra, body)
+
+    def invalidate(self, *tags: str) -> None:
+        self.backend.bump(tags)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """Return the process-wide cache for the configured backend.
+
+    ``cache_backend="redis"`` falls back to the in-process cache when the
+    ``redis`` package is not installed.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = None
+                if settings.cache_backend == "redis":
+                    try:
+                        backend = RedisBackend.from_url(settings.redis_url, settings.cache_ttl)
+                    except ImportError:
+                        backend = None
+                if backend is None:
+                    backend = MemoryBackend(settings.cache_ttl, settings.cache_size)
+                _cache = ResponseCache(backend)
+    return _cache
+
+
+def reset_cache() -> None:
+    """Drop the process-wide cache so the next use recreates it from settings."""
+    global _cache
+    _cache = None
+
+
+def invalidate(*tags: str) -> None:
+    """Invalidate every cached response computed from data with these tags."""
+    if settings.cache_backend != "none":
+        get_cache().invalidate(*tags)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+
+def cached_response(
+    request: Request,
+    tags: Sequence[str],
+    compute: Callable[[], Any],
+    headers: Optional[Callable[[Any], Dict[str, str]]] = None
+) -> Response:
+    """Serve ``compute()`` as JSON through the cache, keyed by path and query string.
+
+    Sends an ``ETag``; a GET whose ``If-None-Match`` matches gets a bodiless 304.
+    """
+    if settings.cache_backend == "none":
+        value = compute()
+        return Response(
+            dump_json(value),
+            media_type="application/json",
+            headers=headers(value) if headers else None
+        )
+
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    cached = get_cache().get_or_set(f"{request.url.path}?{query}", tags, compute, headers)
+    response_headers = {**cached.headers, "ETag": cached.etag, "Cache-Control": "no-cache"}
+    if request.method in ("GET", "HEAD") and _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=response_headers)
+    return Response(cached.body, media_type="application/json", headers=response_headers)
@@ -6,6 +6,28 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./watchlist.db"
     
+    # Read replicas (comma-separated URLs). Read-only endpoints query them;
+    # after a client writes, its reads stay on the primary for the stickiness
+    # window (tracked per client with a cookie) so it sees its own changes
+    # despite replication lag.
+    database_replica_urls: str = ""
+    replica_stickiness_seconds: float = 5.0
+    
+    # Connection pools (per engine; SQLite gets a second, read-only pool)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0       # seconds to wait for a free connection
+    db_pool_recycle: int = 1800         # seconds; server databases only
+    db_pool_pre_ping: bool = True       # server databases only
+    db_read_pool_size: int = 10         # SQLite read-only pool
+    
+    # SQLite pragmas, applied to every new connection
+    sqlite_journal_mode: str = "WAL"    # readers and the writer no longer block each other
+    sqlite_synchronous: str = "NORMAL"  # fsync at checkpoints, not every commit (safe with WAL)
+    sqlite_busy_timeout: int = 5000     # ms a writer waits for the lock before "database is locked"
+    sqlite_cache_size: int = -65536     # negative = KiB of page cache per connection
+    sqlite_mmap_size: int = 268435456   # bytes of the file memory-mapped for reads
+    
     # Security
     secret_key: str = "your-secret-key-here-change-in-production"
     algorithm: str = "HS256"
@@ -19,14 +41,74 @@ class Settings(BaseSettings):
     openai_api_key: str = ""
     anthropic_api_key: str = ""
     
+    # TMDB client
+    tmdb_base_url: str = "https://api.themoviedb.org/3"
+    tmdb_timeout: float = 10.0          # seconds per request
+    tmdb_max_connections: int = 20      # pooled keep-alive connections
+    tmdb_max_concurrency: int = 10      # in-flight requests at once
+    tmdb_cache_ttl: int = 300           # seconds
+    tmdb_cache_size: int = 2048         # cached responses
+    tmdb_hydration_concurrency: int = 8 # titles hydrated at once in batch lookups
+    tmdb_rate_limit: float = 40.0       # requests per second (0 = unlimited)
+    tmdb_rate_burst: int = 20           # requests sent at once before the rate applies
+    tmdb_rate_limit_backend: str = "memory"  # "memory" (per process) or "redis" (shared; uses redis_url)
+    tmdb_max_retries: int = 3           # retries after a 429, 502-504 or connection error
+    tmdb_retry_backoff: float = 0.5     # seconds, doubling per retry, with full jitter
+    tmdb_retry_max_delay: float = 10.0  # longest wait before a retry; a longer Retry-After gives up
+    tmdb_breaker_threshold: int = 5     # consecutive failed calls that open the circuit
+    tmdb_breaker_reset: float = 30.0    # seconds before a trial call may close it again
+    
+    # Local TMDB metadata mirror (tmdb_metadata table)
+    tmdb_mirror_enabled: bool = True
+    tmdb_mirror_max_age: int = 604800   # seconds a stored title is served without revalidating (7 days)
+    tmdb_mirror_max_stale: int = 7776000 # seconds a stale title is still served while it refreshes (90 days)
+    
     # AI Configuration
     embedding_model: str = "text-embedding-ada-002"
     chat_model: str = "gpt-3.5-turbo"
     ollama_base_url: str = "http://localhost:11434"
     
+    # Content embeddings and vector index
+    embedding_backend: str = "hashing"  # "hashing" (offline) or "sentence-transformers"
+    local_embedding_model: str = "all-MiniLM-L6-v2"
+    embedding_dim: int = 256            # dimensions for the hashing embedder
+    vector_index_path: str = "./vector_index.npz"
+    vector_index_nprobe: int = 8        # IVF clusters scanned per query
+    
     # Redis (for caching and background tasks)
     redis_url: str = "redis://localhost:6379"
     
+    # Batched watch ingestion (POST /watches/batch)
+    watch_batch_size: int = 500         # buffered events that trigger a flush
+    watch_flush_interval: float = 1.0   # seconds an event may wait in the buffer
+    watch_buffer_max_pending: int = 50000  # buffered events beyond which batches get 503
+    
+    # Watch session heartbeats (coalesced in memory, written back in bulk)
+    session_flush_interval: float = 5.0  # seconds between write-backs
+    session_idle_timeout: float = 300.0  # seconds without a heartbeat before a session is closed
+    
+    # Instrumentation (/metrics, Server-Timing, per-request query accounting)
+    metrics_enabled: bool = True
+    n_plus_one_threshold: int = 10      # same statement this often in one request is flagged
+    
+    # Response cache for read-heavy endpoints
+    cache_backend: str = "memory"       # "memory", "redis" (uses redis_url) or "none"
+    cache_ttl: int = 60                 # seconds; writes invalidate entries sooner
+    cache_size: int = 1024              # entries kept by the in-process cache
+    
+    # Background jobs (TMDB enrichment, tag generation)
+    job_backend: str = "memory"         # "memory" (in-process) or "redis" (uses redis_url)
+    job_workers: int = 4                # concurrent jobs per process; 0 = enqueue only
+    job_max_attempts: int = 3
+    job_retry_delay: float = 2.0        # seconds before the first retry, doubling after
+    job_result_ttl: int = 86400         # seconds finished jobs stay queryable
+    job_claim_timeout: int = 600        # seconds a redis job may run before it counts as abandoned and is requeued
+    
+    @property
+    def database_replica_urls_list(self) -> List[str]:
+        """Convert comma-separated replica URLs to list."""
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+    
     @property
     def cors_origins_list(self) -> List[str]:
         """Convert comma-separated CORS origins to list."""
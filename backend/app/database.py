@@ -1,14 +1,265 @@
-from sqlalchemy import create_engine
+import math
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from typing import Any, Dict, Iterator, Optional, Sequence
+from sqlalchemy import CompoundSelect, Select, TextClause, create_engine, event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.datastructures import Headers
 from .config import settings
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+# Async drivers for each sync URL scheme the app supports
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def is_sqlite_file(url: str) -> bool:
+    """True for an on-disk SQLite database (not ``:memory:``)."""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+def engine_options(url: str, is_async: bool = False, read_only: bool = False) -> Dict[str, Any]:
+    """``create_engine`` keyword arguments for ``url`` from the pool settings."""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        options: Dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+        if is_sqlite_file(url):
+            # Local file: nothing to ping or recycle. aiosqlite would default to
+            # NullPool and open a connection (and thread) per session.
+            options.update(
+                poolclass=AsyncAdaptedQueuePool if is_async else QueuePool,
+                pool_size=settings.db_read_pool_size if read_only else settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout,
+            )
+        return options
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+def configure_sqlite(engine, read_only: bool = False):
+    """Apply the SQLite pragmas from settings to every new connection.
+    
+    WAL lets readers run alongside the single writer, ``synchronous=NORMAL``
+    drops the per-commit fsync, and ``busy_timeout`` makes a second writer wait
+    instead of failing with "database is locked". Read-only connections also
+    set ``query_only`` so a write through them fails loudly.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout)}")
+        if is_sqlite_file(str(engine.url)):
+            cursor.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA cache_size = {int(settings.sqlite_cache_size)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+def enable_sqlite_transactions(engine):
+    """Let SQLAlchemy, not pysqlite, manage SQLite transactions.
+    
+    pysqlite defers BEGIN until the first DML statement, so SAVEPOINTs used
+    by ``Session.begin_nested()`` would end up committing on release.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+def make_engine(url: str, read_only: bool = False):
+    engine = create_engine(url, **engine_options(url, read_only=read_only))
+    enable_sqlite_transactions(engine)
+    configure_sqlite(engine, read_only)
+    return engine
+
+def make_async_engine(url: str, read_only: bool = False):
+    engine = create_async_engine(async_database_url(url), **engine_options(url, is_async=True, read_only=read_only))
+    enable_sqlite_transactions(engine.sync_engine)
+    configure_sqlite(engine.sync_engine, read_only)
+    return engine
+
+def async_database_url(url: str) -> str:
+    """The async-driver equivalent of a sync database URL."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.drivername == driver:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+# Read-your-writes is per client. The ``last_write`` cookie carries the wall
+# clock time of the client's last write, so any worker process that serves its
+# next request keeps its reads on the primary for ``replica_stickiness_seconds``
+# (worker clocks are assumed to agree to well within that window). The state
+# is a mutable dict so writes made in the threadpool or under ``run_sync``,
+# which run in copies of the request's context, are seen by the middleware.
+STICKINESS_COOKIE = "last_write"
+_client_writes: ContextVar[Optional[Dict[str, Any]]] = ContextVar("client_writes", default=None)
+
+@contextmanager
+def track_client_writes(last_write_at: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Attribute reads and writes in this context to one client.
+
+    ``last_write_at`` is the client's last write (``time.time()``), if known.
+    The yielded state's ``"wrote"`` is set once a commit here writes.
+    """
+    state = {"at": last_write_at, "wrote": False}
+    token = _client_writes.set(state)
+    try:
+        yield state
+    finally:
+        _client_writes.reset(token)
+
+def record_write() -> None:
+    state = _client_writes.get()
+    if state is not None:
+        state.update(at=time.time(), wrote=True)
+
+def within_stickiness_window() -> bool:
+    state = _client_writes.get()
+    at = state["at"] if state is not None else None
+    return at is not None and time.time() - at < settings.replica_stickiness_seconds
+
+class WriteStickinessMiddleware:
+    """Reads the ``last_write`` cookie into the request and sets it after a write."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_urls:
+            await self.app(scope, receive, send)
+            return
+
+        cookies = SimpleCookie(Headers(scope=scope).get("cookie", ""))
+        try:
+            last_write_at = float(cookies[STICKINESS_COOKIE].value)
+        except (KeyError, ValueError):
+            last_write_at = None
+
+        with track_client_writes(last_write_at) as state:
+            async def send_with_cookie(message):
+                if message["type"] == "http.response.start" and state["wrote"]:
+                    cookie = (
+                        f"{STICKINESS_COOKIE}={state['at']:.3f}; Path=/; HttpOnly; SameSite=Lax; "
+                        f"Max-Age={math.ceil(settings.replica_stickiness_seconds)}"
+                    )
+                    message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_cookie)
+
+def _is_read(clause) -> bool:
+    if isinstance(clause, (Select, CompoundSelect)):
+        return True
+    return isinstance(clause, TextClause) and clause.text.lstrip()[:6].upper() in ("SELECT", "WITH")
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to a replica and everything else to its bind.
+    
+    The session picks one of ``replicas`` on its first read and keeps it, so a
+    request sees one consistent snapshot. Reads go to the primary instead once
+    the session has flushed, and, when ``sticky``, for
+    ``replica_stickiness_seconds`` after the current client's last write
+    (see ``track_client_writes``), so a client reads its own writes while the
+    replicas catch up. Without replicas this is a plain session on the
+    primary.
+    """
+    
+    def __init__(self, *args, replicas: Sequence[Any] = (), sticky: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = list(replicas)
+        self.sticky = sticky
+        self._replica = None
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.replicas
+            and not self._flushing
+            and not self.info.get("wrote")
+            and _is_read(clause)
+            and not (self.sticky and within_stickiness_window())
+        ):
+            if self._replica is None:
+                self._replica = random.choice(self.replicas)
+            return self._replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_write(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(RoutingSession, "after_bulk_update")
+@event.listens_for(RoutingSession, "after_bulk_delete")
+def _mark_bulk_write(update_context):
+    update_context.session.info["wrote"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+def _record_commit(session):
+    if session.info.pop("wrote", False):
+        record_write()
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
+engine = make_engine(settings.database_url)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+# Requests go through the async engine, so a slow query waits on the event
+# loop instead of holding one of the threadpool's worker threads. Scripts,
+# benchmarks and the maintenance CLI keep using the sync engine above.
+async_engine = make_async_engine(settings.database_url)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read-only endpoints use read sessions: writes still go to the primary, but
+# SELECTs go to the configured replicas. Without replicas on SQLite they use
+# a separate pool of query_only connections to the same file, so readers
+# never queue behind write sessions for a connection, and with WAL they see
+# the last commit immediately (no stickiness needed). Otherwise reads share
+# the primary's pools.
+replica_urls = settings.database_replica_urls_list
+if replica_urls:
+    read_engines = [make_engine(url, read_only=True) for url in replica_urls]
+    async_read_engines = [make_async_engine(url, read_only=True) for url in replica_urls]
+elif is_sqlite_file(settings.database_url):
+    read_engines = [make_engine(settings.database_url, read_only=True)]
+    async_read_engines = [make_async_engine(settings.database_url, read_only=True)]
+else:
+    read_engines, async_read_engines = [], []
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine,
+    replicas=read_engines, sticky=bool(replica_urls)
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+    replicas=[read_engine.sync_engine for read_engine in async_read_engines], sticky=bool(replica_urls)
+)
 
 Base = declarative_base()
 
@@ -20,8 +271,80 @@ def get_db():
     finally:
         db.close()
 
-def init_db():
-    """Initialize database tables."""
+async def get_async_db():
+    """Dependency to get an async database session.
+    
+    Routes run the sync services on it with ``await db.run_sync(...)``; the
+    service code is shared with scripts, while all I/O goes through the async
+    driver.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db():
+    """Dependency to get a session for read-mostly work: SELECTs go to the replicas."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    """Async counterpart of ``get_read_db``."""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+async def dispose_engines():
+    """Close every pooled connection (pooled aiosqlite connections each hold a thread)."""
+    for pool in [async_engine, *async_read_engines]:
+        await pool.dispose()
+    for pool in [engine, *read_engines]:
+        pool.dispose()
+
+def add_missing_columns(connection):
+    """``ALTER TABLE ... ADD COLUMN`` every nullable model column the database lacks."""
+    inspector = inspect(connection)
+    quote = connection.dialect.identifier_preparer.quote
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+                )
+
+def init_db(bind=None):
+    """Initialize database tables.
+
+    Derived tables added to an existing database are filled from the data
+    already there: the watch stats rollups are rebuilt from ``watches`` and
+    the facet tables (genres, cast, ...) from the content's JSON columns.
+    """
     # Import all models here to ensure they are registered with SQLAlchemy
-    from .models import content, watches
-    Base.metadata.create_all(bind=engine)
+    from .models import content, rollups, search, taxonomy, tmdb, watches
+    bind = engine if bind is None else bind
+    existing = set(inspect(bind).get_table_names())
+    Base.metadata.create_all(bind=bind)
+    # Tables that already existed skip their create hooks and any columns or
+    # indexes added since; add those explicitly (new columns must be nullable)
+    with bind.begin() as connection:
+        add_missing_columns(connection)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+        search.install_search_index(connection)
+
+    created = {table.name for table in Base.metadata.sorted_tables} - existing
+    if not existing or not created:
+        return
+    from .services.rollup_service import RollupService
+    from .services.taxonomy_service import FACETS, TaxonomyService
+    # Facets first: the genre rollups are computed from content_genres
+    if created & {facet.association.__tablename__ for facet in FACETS}:
+        with SessionLocal(bind=bind) as db:
+            TaxonomyService(db).backfill()
+    if created & {model.__tablename__ for model in rollups.ROLLUP_MODELS}:
+        with SessionLocal(bind=bind) as db:
+            RollupService(db).rebuild()
+            db.commit()
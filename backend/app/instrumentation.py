@@ -0,0 +1,331 @@
+"""Request, query and service timing with Prometheus metrics.
+
+Three sources feed one set of in-process metrics:
+
+- ``InstrumentationMiddleware`` times every HTTP request per route template
+  and adds a ``Server-Timing`` header (total, database and service time) so
+  the breakdown shows up in the browser's network panel.
+- SQLAlchemy cursor events, registered on every engine, count queries and
+  sum their time for the current request. A statement run
+  ``n_plus_one_threshold`` times or more in one request is reported as a
+  likely N+1 (a counter, plus a warning naming the route and statement).
+- ``@instrumented`` wraps the public methods of a service class with timers.
+
+``GET /metrics`` renders everything in the Prometheus text format. Metrics
+are per process; with several workers, scrape each one or put them behind a
+multiprocess-aware exporter.
+"""
+import functools
+import inspect
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as Tally
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # One slot per bucket, +Inf, then sum
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labelvalues, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = '"+Inf"' if bound == float("inf") else f'"{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labelvalues, 'le=' + le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {series[-1]!r}"
+            yield f"{self.name}_count{_labels(self.labelnames, labelvalues)} {cumulative}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    """Monotonic counter per label combination; ``name`` ends in ``_total``."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def collect(self) -> Iterable[str]:
+        with self._lock:
+            snapshot = dict(self._values)
+        for labelvalues, value in sorted(snapshot.items()):
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Any] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for metric in self.metrics:
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request.", ("method", "route"), QUERY_COUNT_BUCKETS
+))
+REQUEST_DB_TIME = REGISTRY.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL statements per HTTP request.", ("method", "route")
+))
+QUERY_DURATION = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Latency of individual SQL statements, in and out of requests."
+))
+N_PLUS_ONE = REGISTRY.register(Counter(
+    "db_n_plus_one_total", "Requests that ran one statement n_plus_one_threshold times or more.", ("method", "route")
+))
+SERVICE_DURATION = REGISTRY.register(Histogram(
+    "service_call_duration_seconds", "Latency of instrumented service methods.", ("service", "method")
+))
+
+
+class RequestStats:
+    """What one request spent its time on."""
+
+    __slots__ = ("queries", "db_seconds", "statements", "services")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Tally = Tally()
+        self.services: Dict[str, List[float]] = {}
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    """Stats of the request being handled, or ``None`` outside a request."""
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if not settings.metrics_enabled:
+        return
+    QUERY_DURATION.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        stats.statements[statement] += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _failed_query(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def _record_service(service: str, method: str, elapsed: float) -> None:
+    SERVICE_DURATION.observe(elapsed, service, method)
+    stats = _current.get()
+    if stats is not None:
+        totals = stats.services.setdefault(f"{service}.{method}", [0, 0.0])
+        totals[0] += 1
+        totals[1] += elapsed
+
+
+def timed(service: str, method: str):
+    """Decorator recording the duration of a sync or async callable."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not settings.metrics_enabled:
+                    return await fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    _record_service(service, method, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not settings.metrics_enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record_service(service, method, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def instrumented(cls):
+    """Class decorator timing every public method (including static methods)."""
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        if isinstance(attribute, staticmethod):
+            setattr(cls, name, staticmethod(timed(cls.__name__, name)(attribute.__func__)))
+        elif inspect.isfunction(attribute):
+            setattr(cls, name, timed(cls.__name__, name)(attribute))
+    return cls
+
+
+def server_timing(total_seconds: float, stats: RequestStats) -> str:
+    """``Server-Timing`` value: total, database and per-service milliseconds."""
+    entries = [
+        f"app;dur={total_seconds * 1000:.1f}",
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"',
+    ]
+    for name, (calls, seconds) in sorted(stats.services.items(), key=lambda item: -item[1][1]):
+        entries.append(f'svc-{name};dur={seconds * 1000:.1f};desc="{calls} calls"')
+    return ", ".join(entries)
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    """Times HTTP requests, attributes their queries and adds ``Server-Timing``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(time.perf_counter() - start, stats).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._record(scope, status, time.perf_counter() - start, stats)
+
+    @staticmethod
+    def _record(scope, status: int, elapsed: float, stats: RequestStats) -> None:
+        method, route = scope["method"], _route_template(scope)
+        REQUEST_DURATION.observe(elapsed, method, route, str(status))
+        REQUEST_QUERIES.observe(stats.queries, method, route)
+        REQUEST_DB_TIME.observe(stats.db_seconds, method, route)
+        repeated = stats.repeated_statements(settings.n_plus_one_threshold)
+        if repeated:
+            N_PLUS_ONE.inc(method, route)
+            statement, count = repeated[0]
+            logger.warning("Possible N+1 in %s %s: %d executions of %s", method, route, count, " ".join(statement.split())[:300])
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
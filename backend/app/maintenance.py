@@ -0,0 +1,173 @@
+"""Maintenance and data migration commands.
+
+Run from the backend directory, e.g.::
+
+    python -m app.maintenance backfill-facets
+"""
+import argparse
+import os
+
+from .config import settings
+from .database import SessionLocal, engine, init_db
+
+
+def backfill_facets(args: argparse.Namespace) -> None:
+    """Populate the normalized genre/cast/country/language tables from JSON columns."""
+    from .services.taxonomy_service import TaxonomyService
+
+    db = SessionLocal()
+    try:
+        total = TaxonomyService(db).backfill(batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Synced facets for {total} content rows")
+
+
+def rebuild_search_index(args: argparse.Namespace) -> None:
+    """Re-index every content row in the full-text search index."""
+    from .models.search import rebuild_search_index as rebuild
+
+    with engine.begin() as connection:
+        rebuild(connection)
+    print("Rebuilt full-text search index")
+
+
+def embed_content(args: argparse.Namespace) -> None:
+    """Compute missing content embeddings and rebuild the on-disk vector index."""
+    from .services import embedding_service
+
+    db = SessionLocal()
+    try:
+        total = embedding_service.EmbeddingService(db).embed_pending(batch_size=args.batch_size, force=args.all)
+        embedding_service.reset_vector_index()
+        # Re-embedding keeps updated_at, so the saved index would still match the database
+        if settings.vector_index_path and os.path.exists(settings.vector_index_path):
+            os.remove(settings.vector_index_path)
+        index = embedding_service.get_vector_index(db)
+        embedding_service.save_vector_index(db)
+    finally:
+        db.close()
+    print(f"Embedded {total} content rows; index holds {len(index)} vectors")
+
+
+def rebuild_rollups(args: argparse.Namespace) -> None:
+    """Recompute the watch stats rollup tables from the watches table."""
+    from .services.rollup_service import RollupService
+
+    db = SessionLocal()
+    try:
+        total = RollupService(db).rebuild()
+    finally:
+        db.close()
+    print(f"Rebuilt stats rollups from {total} watches")
+
+
+def process_jobs(args: argparse.Namespace) -> None:
+    """Run background job workers until interrupted (for job_backend=redis)."""
+    import asyncio
+    from .services.jobs import get_job_queue
+
+    async def run() -> None:
+        queue = get_job_queue()
+        queue.workers = args.workers
+        queue.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await queue.stop()
+
+    print(f"Processing {settings.job_backend} jobs with {args.workers} workers")
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def _refresh_tmdb_titles(limit: int) -> int:
+    """Fetch up to ``limit`` stale or never-fetched mirror titles; returns how many succeeded."""
+    import asyncio
+    from .database import AsyncSessionLocal, dispose_engines
+    from .services.tmdb_client import close_tmdb_client
+    from .services.tmdb_mirror import TMDBMirror
+
+    async def run() -> int:
+        mirror = TMDBMirror(
+            AsyncSessionLocal,
+            max_age=settings.tmdb_mirror_max_age,
+            concurrency=settings.tmdb_hydration_concurrency,
+        )
+        try:
+            return await mirror.refresh_stale(limit)
+        finally:
+            # Pooled aiosqlite connections would otherwise keep the process alive
+            await close_tmdb_client()
+            await dispose_engines()
+
+    return asyncio.run(run())
+
+
+def preload_tmdb_export(args: argparse.Namespace) -> None:
+    """Load a TMDB daily ID export into the metadata mirror, then fetch the most popular titles."""
+    import gzip
+    from .services.tmdb_mirror import TMDBMetadataStore
+
+    opener = gzip.open if args.path.endswith(".gz") else open
+    db = SessionLocal()
+    try:
+        with opener(args.path, "rt", encoding="utf-8") as lines:
+            total = TMDBMetadataStore(db).load_export(lines, args.content_type, args.min_popularity)
+    finally:
+        db.close()
+    print(f"Loaded {total} {args.content_type} titles from {args.path}")
+
+    if args.fetch:
+        print(f"Fetched details for {_refresh_tmdb_titles(args.fetch)} titles")
+
+
+def refresh_tmdb_mirror(args: argparse.Namespace) -> None:
+    """Revalidate the least recently fetched titles in the TMDB metadata mirror."""
+    print(f"Refreshed {_refresh_tmdb_titles(args.limit)} titles")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill-facets", help=backfill_facets.__doc__)
+    backfill.add_argument("--batch-size", type=int, default=1000)
+    backfill.set_defaults(handler=backfill_facets)
+
+    rebuild_search = commands.add_parser("rebuild-search-index", help=rebuild_search_index.__doc__)
+    rebuild_search.set_defaults(handler=rebuild_search_index)
+
+    embed = commands.add_parser("embed-content", help=embed_content.__doc__)
+    embed.add_argument("--batch-size", type=int, default=500)
+    embed.add_argument("--all", action="store_true", help="re-embed rows that already have an embedding")
+    embed.set_defaults(handler=embed_content)
+
+    rollups = commands.add_parser("rebuild-rollups", help=rebuild_rollups.__doc__)
+    rollups.set_defaults(handler=rebuild_rollups)
+
+    jobs = commands.add_parser("process-jobs", help=process_jobs.__doc__)
+    jobs.add_argument("--workers", type=int, default=max(settings.job_workers, 1))
+    jobs.set_defaults(handler=process_jobs)
+
+    preload = commands.add_parser("preload-tmdb-export", help=preload_tmdb_export.__doc__)
+    preload.add_argument("path", help="daily export file, e.g. movie_ids_05_15_2024.json.gz from files.tmdb.org/p/exports")
+    preload.add_argument("--content-type", choices=("movie", "tv"), default="movie")
+    preload.add_argument("--min-popularity", type=float, default=1.0, help="skip less popular titles")
+    preload.add_argument("--fetch", type=int, default=0, help="fetch details for this many titles, most popular first")
+    preload.set_defaults(handler=preload_tmdb_export)
+
+    refresh = commands.add_parser("refresh-tmdb-mirror", help=refresh_tmdb_mirror.__doc__)
+    refresh.add_argument("--limit", type=int, default=1000)
+    refresh.set_defaults(handler=refresh_tmdb_mirror)
+
+    args = parser.parse_args(argv)
+    # Creates any tables added since the database was first initialized
+    init_db()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, JSON, LargeBinary, Index
 from sqlalchemy.sql import func
+from sqlalchemy.orm import deferred
 from ..database import Base
 
 class Content(Base):
@@ -48,9 +49,18 @@ class Content(Base):
     episode_run_time = Column(JSON)  # List of episode runtimes
     
     # AI/ML fields
-    embedding = Column(JSON)  # Vector embedding for similarity search
+    # Little-endian float32 vector for similarity search. Kilobytes per row and
+    # never part of an API response, so only loaded when accessed.
+    embedding = deferred(Column(LargeBinary))
     ai_tags = Column(JSON)    # AI-generated tags
     mood_tags = Column(JSON)  # Mood-based tags for recommendations
+    
+    __table_args__ = (
+        # Keyset pagination: newest first on (updated_at, id)
+        Index("ix_content_updated_at_id", "updated_at", "id"),
+        # Covers the library summary's GROUP BY and the type/status filters
+        Index("ix_content_type_status_favorite", "content_type", "status", "is_favorite"),
+    )
 
 class Platform(Base):
     """Model for streaming platforms."""
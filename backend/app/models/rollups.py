@@ -0,0 +1,58 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, Index
+from ..database import Base
+
+# Pre-aggregated watch history for the stats dashboards. Rows are keyed by a
+# day or by the first day of a month and updated incrementally by
+# WatchService whenever a watch is recorded or deleted, so dashboard queries
+# read a few hundred rows regardless of how long the history is. Use
+# ``python -m app.maintenance rebuild-rollups`` to recompute them from the
+# watches table if they ever drift (e.g. after editing a title's genres).
+
+class DailyWatchStats(Base):
+    """Watches and minutes per day; the days are also the longest-binge candidates."""
+    __tablename__ = "watch_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    watches = Column(Integer, nullable=False, default=0)
+    minutes = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_watch_daily_stats_minutes", "minutes"),
+    )
+
+class ContentWatchStats(Base):
+    """All-time watches and minutes per title, so watch counts never need ``COUNT(*)``."""
+    __tablename__ = "watch_content_stats"
+
+    content_id = Column(Integer, ForeignKey("content.id", ondelete="CASCADE"), primary_key=True)
+    watches = Column(Integer, nullable=False, default=0)
+    minutes = Column(Integer, nullable=False, default=0)
+
+class MonthlyContentStats(Base):
+    """Watches and minutes per title per month."""
+    __tablename__ = "watch_monthly_content_stats"
+
+    month = Column(Date, primary_key=True)
+    content_id = Column(Integer, ForeignKey("content.id", ondelete="CASCADE"), primary_key=True)
+    watches = Column(Integer, nullable=False, default=0)
+    minutes = Column(Integer, nullable=False, default=0)
+
+class MonthlyGenreStats(Base):
+    """Watches and minutes per genre per month (a watch counts toward each of its title's genres)."""
+    __tablename__ = "watch_monthly_genre_stats"
+
+    month = Column(Date, primary_key=True)
+    genre_id = Column(Integer, ForeignKey("genres.id", ondelete="CASCADE"), primary_key=True)
+    watches = Column(Integer, nullable=False, default=0)
+    minutes = Column(Integer, nullable=False, default=0)
+
+class MonthlyPlatformStats(Base):
+    """Watches and minutes per platform per month."""
+    __tablename__ = "watch_monthly_platform_stats"
+
+    month = Column(Date, primary_key=True)
+    platform_id = Column(Integer, ForeignKey("platforms.id", ondelete="CASCADE"), primary_key=True)
+    watches = Column(Integer, nullable=False, default=0)
+    minutes = Column(Integer, nullable=False, default=0)
+
+ROLLUP_MODELS = (DailyWatchStats, ContentWatchStats, MonthlyContentStats, MonthlyGenreStats, MonthlyPlatformStats)
@@ -0,0 +1,74 @@
+from sqlalchemy import event, inspect, text
+from .content import Content
+
+# Full-text index over content title, overview, cast, director and genres.
+#
+# SQLite: an external-content FTS5 table kept current by triggers, so every
+# write path (ORM, bulk Core inserts, raw SQL) is indexed.
+# PostgreSQL: a GIN index on a weighted tsvector expression; queries must use
+# the same expression (SEARCH_DOCUMENT_PG) for the planner to pick the index.
+
+FTS_TABLE = "content_fts"
+FTS_COLUMNS = ("title", "overview", "cast", "director", "genres")
+
+_fts_columns = ", ".join(f'"{column}"' for column in FTS_COLUMNS)
+_new_values = ", ".join(f'new."{column}"' for column in FTS_COLUMNS)
+_old_values = ", ".join(f'old."{column}"' for column in FTS_COLUMNS)
+
+SQLITE_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_fts_columns},
+        content='content', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON content BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_fts_columns}) VALUES (new.id, {_new_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON content BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_fts_columns}) VALUES ('delete', old.id, {_old_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_fts_columns} ON content BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_fts_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {FTS_TABLE}(rowid, {_fts_columns}) VALUES (new.id, {_new_values});
+    END""",
+)
+
+SEARCH_DOCUMENT_PG = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(director, '') || ' ' || coalesce(\"cast\"::text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(genres::text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(overview, '')), 'C')"
+)
+
+POSTGRES_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_content_search ON content USING GIN (({SEARCH_DOCUMENT_PG}))",
+)
+
+def install_search_index(connection) -> None:
+    """Create the full-text index if missing, indexing any existing rows."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        is_new = not inspect(connection).has_table(FTS_TABLE)
+        for statement in SQLITE_DDL:
+            connection.exec_driver_sql(statement)
+        if is_new:
+            rebuild_search_index(connection)
+    elif dialect == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+
+def rebuild_search_index(connection) -> None:
+    """Re-index every content row (repairs drift after out-of-band writes)."""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    elif connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("REINDEX INDEX ix_content_search")
+
+@event.listens_for(Content.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    install_search_index(connection)
+
+@event.listens_for(Content.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
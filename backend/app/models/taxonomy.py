@@ -0,0 +1,80 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from ..database import Base
+
+# Normalized copies of the JSON list columns on Content (genres, cast,
+# countries, languages). Each facet has a lookup table of unique names and an
+# association table indexed on (facet_id, content_id) so filters, stats and
+# similarity queries are index lookups instead of JSON scans.
+
+class Genre(Base):
+    """Model for genre names."""
+    __tablename__ = "genres"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True, index=True)
+
+class ContentGenre(Base):
+    """Association between content and its genres."""
+    __tablename__ = "content_genres"
+
+    content_id = Column(Integer, ForeignKey("content.id", ondelete="CASCADE"), primary_key=True)
+    genre_id = Column(Integer, ForeignKey("genres.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_content_genres_genre_content", "genre_id", "content_id"),
+    )
+
+class Person(Base):
+    """Model for cast members."""
+    __tablename__ = "people"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True, index=True)
+
+class ContentCast(Base):
+    """Association between content and its cast, in billing order."""
+    __tablename__ = "content_cast"
+
+    content_id = Column(Integer, ForeignKey("content.id", ondelete="CASCADE"), primary_key=True)
+    person_id = Column(Integer, ForeignKey("people.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, default=0)
+
+    __table_args__ = (
+        Index("ix_content_cast_person_content", "person_id", "content_id"),
+    )
+
+class Country(Base):
+    """Model for production countries."""
+    __tablename__ = "countries"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True, index=True)
+
+class ContentCountry(Base):
+    """Association between content and its production countries."""
+    __tablename__ = "content_countries"
+
+    content_id = Column(Integer, ForeignKey("content.id", ondelete="CASCADE"), primary_key=True)
+    country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_content_countries_country_content", "country_id", "content_id"),
+    )
+
+class Language(Base):
+    """Model for spoken languages."""
+    __tablename__ = "languages"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True, index=True)
+
+class ContentLanguage(Base):
+    """Association between content and its spoken languages."""
+    __tablename__ = "content_languages"
+
+    content_id = Column(Integer, ForeignKey("content.id", ondelete="CASCADE"), primary_key=True)
+    language_id = Column(Integer, ForeignKey("languages.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_content_languages_language_content", "language_id", "content_id"),
+    )
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index
+from ..database import Base
+
+# Local mirror of TMDB detail payloads (details with appended credits), so a
+# title fetched once is served from the database after that. Rows keep the raw
+# payload rather than parsed content fields, which lets parsing change without
+# a refetch. ``fetched_at`` drives the freshness policy in
+# ``services.tmdb_mirror``; rows preloaded from a TMDB daily export carry only
+# the ID, title and popularity until their details are first fetched
+# (``fetched_at`` is NULL until then).
+
+class TMDBMetadata(Base):
+    """One TMDB movie or TV show, keyed by ``(content_type, tmdb_id)``."""
+    __tablename__ = "tmdb_metadata"
+
+    content_type = Column(String, primary_key=True)  # 'movie' or 'tv'
+    tmdb_id = Column(Integer, primary_key=True)
+    title = Column(String)
+    popularity = Column(Float)
+    payload = Column(JSON(none_as_null=True))  # raw detail + credits response
+    etag = Column(String)  # sent back as If-None-Match on refresh
+    fetched_at = Column(DateTime)
+
+    __table_args__ = (
+        # Refresh sweeps take the least recently fetched rows first
+        Index("ix_tmdb_metadata_fetched_at", "fetched_at"),
+    )
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -54,6 +54,18 @@ class Watch(Base):
     # Metadata
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Stats filter by time range, per title and per platform. The trailing
+    # duration_watched makes each index covering for the minutes aggregates.
+    __table_args__ = (
+        Index("ix_watches_watched_at", "watched_at", "duration_watched"),
+        # Keyset pagination of the history on (watched_at, id)
+        Index("ix_watches_watched_at_id", "watched_at", "id"),
+        Index("ix_watches_content_watched_at", "content_id", "watched_at", "duration_watched"),
+        Index("ix_watches_platform_watched_at", "platform_id", "watched_at", "duration_watched"),
+        # Incremental exports (updated_since)
+        Index("ix_watches_updated_at", "updated_at"),
+    )
 
 class WatchSession(Base):
     """Model for tracking continuous watch sessions."""
@@ -84,5 +96,14 @@ class WatchSession(Base):
     interruptions = Column(Integer, default=0)     # Number of times paused
     watch_mood = Column(String)
     
+    # Server time of the last heartbeat written back; sessions idle for too
+    # long are closed by the heartbeat tracker
+    last_heartbeat_at = Column(DateTime)
+    
     # Metadata
     created_at = Column(DateTime, server_default=func.now())
+    
+    __table_args__ = (
+        # Open sessions (ended_at IS NULL) by last heartbeat, for the reaper
+        Index("ix_watch_sessions_open", "ended_at", "last_heartbeat_at"),
+    )
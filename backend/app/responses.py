@@ -0,0 +1,53 @@
+"""Fast JSON encoding for API responses.
+
+FastAPI's default path validates a route's return value against its
+``response_model``, converts it to plain Python with ``jsonable_encoder`` and
+only then encodes it with the stdlib ``json``. For list endpoints that build
+their Pydantic models themselves, that is two extra passes over every item.
+``dump_json`` encodes such values directly: a list of one model type goes
+through pydantic-core in a single call, anything else through orjson.
+Routes return the bytes in a ``Response`` (FastAPI skips ``response_model``
+processing for those), and the cache stores them as they are.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, List, Optional, Type
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+__all__ = ["ORJSONResponse", "dump_json", "json_response"]
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Decimal):
+        return float(value)
+    # Whatever else FastAPI would have managed (ORM rows, sets, ...)
+    return jsonable_encoder(value)
+
+
+def dump_json(value: Any) -> bytes:
+    """Encode a response value (models, lists of models, plain data) as JSON bytes."""
+    if isinstance(value, BaseModel):
+        return value.__pydantic_serializer__.to_json(value)
+    if isinstance(value, list) and value and isinstance(value[0], BaseModel):
+        model = type(value[0])
+        if all(type(item) is model for item in value):
+            return _list_adapter(model).dump_json(value)
+    return orjson.dumps(value, default=_default, option=ORJSON_OPTIONS)
+
+
+def json_response(value: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """``value`` as a JSON response, encoded once with ``dump_json``."""
+    return Response(dump_json(value), status_code=status_code, media_type="application/json", headers=headers)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from ..database import get_db
+from .. import cache
+from ..database import get_async_read_db
+from ..models.content import Content
 from ..schemas.ai import (
     RecommendationRequest, 
     RecommendationResponse,
@@ -9,98 +11,107 @@ from ..schemas.ai import (
     AnalysisResponse,
     MoodSuggestionRequest
 )
+from ..schemas.content import ContentResponse
+from ..schemas.jobs import JobResponse
 from ..services.ai_service import AIService
+from ..services.jobs import get_job_queue
 
 router = APIRouter()
 
 @router.post("/ai/recommend", response_model=List[RecommendationResponse])
-def get_recommendations(
+async def get_recommendations(
     request: RecommendationRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get AI-powered content recommendations."""
-    service = AIService(db)
-    return service.get_recommendations(
+    return await db.run_sync(lambda session: AIService(session).get_recommendations(
         user_preferences=request.preferences,
         mood=request.mood,
         limit=request.limit,
         exclude_watched=request.exclude_watched
-    )
+    ))
 
 @router.post("/ai/recommendations")
-def get_recommendations_simple(
+async def get_recommendations_simple(
     request: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get AI-powered content recommendations (simple endpoint for frontend)."""
-    service = AIService(db)
-    recommendations = service.get_recommendations_simple(request.get("user_preferences", ""))
+    recommendations = await db.run_sync(
+        lambda session: AIService(session).get_recommendations_simple(request.get("user_preferences", ""))
+    )
     return {"recommendations": recommendations}
 
 @router.post("/ai/analyze", response_model=AnalysisResponse)
-def analyze_viewing_patterns(
+async def analyze_viewing_patterns(
     request: AnalysisRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Analyze user's viewing patterns and preferences."""
-    service = AIService(db)
-    return service.analyze_viewing_patterns(
+    return await db.run_sync(lambda session: AIService(session).analyze_viewing_patterns(
         time_period=request.time_period,
         analysis_type=request.analysis_type
-    )
+    ))
 
 @router.post("/ai/mood-suggest")
-def get_mood_based_suggestions(
+async def get_mood_based_suggestions(
     request: MoodSuggestionRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get content suggestions based on current mood."""
-    service = AIService(db)
-    return service.get_mood_based_suggestions(
+    return await db.run_sync(lambda session: AIService(session).get_mood_based_suggestions(
         mood=request.mood,
         time_available=request.time_available,
         platform_preference=request.platform_preference,
         limit=request.limit
-    )
+    ))
 
 @router.post("/ai/chat")
-def chat_with_assistant(
+async def chat_with_assistant(
     query: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Chat with AI assistant about your watchlist."""
-    service = AIService(db)
-    response = service.chat_about_watchlist(query)
+    response = await db.run_sync(lambda session: AIService(session).chat_about_watchlist(query))
     return {"response": response}
 
 @router.post("/ai/similar-search")
-def semantic_search(
+async def semantic_search(
     query: str,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Semantic search for similar content."""
-    service = AIService(db)
-    results = service.semantic_search(query, limit)
+    results = await db.run_sync(lambda session: [
+        ContentResponse.model_validate(content)
+        for content in AIService(session).semantic_search(query, limit)
+    ])
     return {"results": results}
 
-@router.post("/content/{content_id}/generate-tags")
-def generate_ai_tags(
+@router.post("/content/{content_id}/generate-tags", status_code=202, response_model=JobResponse)
+async def generate_ai_tags(
     content_id: int,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Generate AI tags for content."""
-    service = AIService(db)
-    tags = service.generate_content_tags(content_id)
-    if not tags:
+    """Queue AI tag generation for content.
+    
+    Tags are stored in the content's ``ai_tags`` and returned as the job's
+    result; poll the job at the ``Location`` header.
+    """
+    exists = await db.run_sync(lambda session: session.get(Content, content_id) is not None)
+    if not exists:
         raise HTTPException(status_code=404, detail="Content not found")
-    return {"content_id": content_id, "tags": tags}
+    job = await get_job_queue().enqueue("generate_tags", {"content_id": content_id}, dedup_key=f"tags:{content_id}")
+    response.headers["Location"] = f"/api/v1/jobs/{job['id']}"
+    return job
 
 @router.post("/ai/insights")
-def get_viewing_insights(
-    db: Session = Depends(get_db)
+async def get_viewing_insights(
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get AI-generated insights about viewing habits."""
-    service = AIService(db)
-    insights = service.generate_viewing_insights()
-    return {"insights": insights}
+    return await db.run_sync(lambda session: cache.cached_response(request, [cache.CONTENT, cache.WATCHES], lambda: {
+        "insights": AIService(session).generate_viewing_insights()
+    }))
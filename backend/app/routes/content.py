@@ -1,122 +1,271 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+import json
+from .. import cache
+from ..database import get_async_db, get_async_read_db
 from ..models.content import Content
-from ..schemas.content import ContentCreate, ContentUpdate, ContentResponse
+from ..responses import json_response
+from ..schemas.content import (
+    BulkRowStatus,
+    ContentBulkResponse,
+    ContentCreate,
+    ContentListItem,
+    ContentUpdate,
+    ContentResponse,
+    LibrarySearchResponse,
+)
 from ..services.content_service import ContentService
+from ..services.jobs import get_job_queue
+from ..services.pagination import InvalidCursor, cursor_header
+from ..services.search_service import SearchService
 from ..services.tmdb_service import TMDBService
 
 router = APIRouter()
 
+LIST_FIELDS = list(ContentListItem.model_fields)
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Validate a ``fields=`` projection; ``summary`` selects the slim list item."""
+    if not fields:
+        return None
+    if fields == "summary":
+        return LIST_FIELDS
+    requested = ["id"] + [field.strip() for field in fields.split(",") if field.strip() and field.strip() != "id"]
+    unknown = [field for field in requested if field not in ContentResponse.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
 @router.get("/content/", response_model=List[ContentResponse])
-def get_content_list(
+async def get_content_list(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     content_type: Optional[str] = Query(None, regex="^(movie|tv)$"),
     status: Optional[str] = Query(None),
     genre: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page; replaces skip"),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return, or 'summary' for the slim list item; default is every field"
+    ),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get list of content with optional filtering."""
-    service = ContentService(db)
-    return service.get_content_list(
-        skip=skip,
-        limit=limit,
-        content_type=content_type,
-        status=status,
-        genre=genre
-    )
+    """Get list of content with optional filtering, newest first.
+    
+    When more rows may follow, the response carries an ``X-Next-Cursor``
+    header to pass back as ``cursor`` for the next page. ``fields`` limits
+    both the response and the columns read from the database.
+    """
+    selected = _parse_fields(fields)
+    if selected is None:
+        serialize = ContentResponse.model_validate
+    elif selected is LIST_FIELDS:
+        serialize = ContentListItem.model_validate
+    else:
+        def serialize(content):
+            return {field: getattr(content, field) for field in selected}
+    next_page: Dict[str, str] = {}
+    
+    def compute(session):
+        contents = ContentService(session).get_content_list(
+            skip=skip,
+            limit=limit,
+            content_type=content_type,
+            status=status,
+            genre=genre,
+            cursor=cursor,
+            # updated_at is always loaded: the next cursor is built from it
+            columns=selected and list(dict.fromkeys(selected + ["updated_at"]))
+        )
+        next_page.update(cursor_header(contents, limit, "updated_at"))
+        return [serialize(content) for content in contents]
+    
+    try:
+        return await db.run_sync(lambda session: cache.cached_response(
+            request, [cache.CONTENT], lambda: compute(session), headers=lambda items: next_page
+        ))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/content/library-search", response_model=LibrarySearchResponse)
+async def search_library(
+    q: str = Query(..., min_length=1),
+    content_type: Optional[str] = Query(None, regex="^(movie|tv)$"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Full-text search of the local library, best match first."""
+    return json_response(await db.run_sync(lambda session: LibrarySearchResponse.model_validate({
+        "results": SearchService(session).search(q, content_type=content_type, limit=limit)
+    })))
 
 @router.post("/content/", response_model=ContentResponse)
-def create_content(
+async def create_content(
     content: ContentCreate,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Add new content to watchlist."""
-    service = ContentService(db)
+    """Add new content to watchlist.
     
-    # If TMDB ID is provided, fetch additional data
+    Content with a ``tmdb_id`` is stored as sent and returned right away;
+    a background job then fills the remaining fields from TMDB (details,
+    credits) and regenerates tags and the embedding. The job's id is in the
+    ``X-Job-Id`` header, for ``GET /jobs/{job_id}``.
+    """
+    created = await db.run_sync(lambda session: ContentResponse.model_validate(
+        ContentService(session).create_content(content)
+    ))
     if content.tmdb_id:
-        tmdb_service = TMDBService()
-        tmdb_data = tmdb_service.get_content_details(content.tmdb_id, content.content_type)
-        if tmdb_data:
-            # Merge TMDB data with user input
-            content = service.merge_tmdb_data(content, tmdb_data)
+        job = await get_job_queue().enqueue(
+            "enrich_content",
+            {"content_id": created.id, "tmdb_id": content.tmdb_id, "content_type": content.content_type.value},
+            dedup_key=f"tmdb:{content.tmdb_id}",
+        )
+        response.headers["X-Job-Id"] = job["id"]
+    return created
+
+async def _read_bulk_rows(request: Request) -> List[Any]:
+    """Read a bulk body sent either as a JSON array or as NDJSON."""
+    if "ndjson" not in request.headers.get("content-type", ""):
+        rows = json.loads(await request.body())
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of content entries")
+        return rows
     
-    return service.create_content(content)
+    rows = []
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        rows.extend(json.loads(line) for line in lines if line.strip())
+    if buffer.strip():
+        rows.append(json.loads(buffer))
+    return rows
+
+@router.post("/content/bulk", response_model=ContentBulkResponse)
+async def bulk_create_content(
+    request: Request,
+    enrich: bool = Query(False, description="Fill missing fields from TMDB"),
+    chunk_size: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Add many titles at once from a JSON array or an NDJSON stream."""
+    try:
+        rows = await _read_bulk_rows(request)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid bulk body: {exc}")
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, ContentCreate.model_validate(row)))
+        except ValidationError as exc:
+            results[index] = {"index": index, "status": BulkRowStatus.ERROR, "error": str(exc)}
+    
+    contents = [content for _, content in valid]
+    
+    if enrich:
+        tmdb_details = await TMDBService().get_many_details(
+            (content.tmdb_id, content.content_type.value) for content in contents if content.tmdb_id
+        )
+        contents = [
+            ContentService.merge_tmdb_data(content, tmdb_details[(content.tmdb_id, content.content_type.value)])
+            if tmdb_details.get((content.tmdb_id, content.content_type.value)) else content
+            for content in contents
+        ]
+    
+    created = await db.run_sync(lambda session: ContentService(session).bulk_create(contents, chunk_size))
+    for (index, _), result in zip(valid, created):
+        results[index] = {**result, "index": index}
+    
+    return {
+        "created": sum(r["status"] == BulkRowStatus.CREATED for r in results),
+        "duplicates": sum(r["status"] == BulkRowStatus.DUPLICATE for r in results),
+        "errors": sum(r["status"] == BulkRowStatus.ERROR for r in results),
+        "results": results,
+    }
+
+def _serialize(content) -> Optional[ContentResponse]:
+    # Build the response inside run_sync, where attribute loads can still hit the database
+    return ContentResponse.model_validate(content) if content is not None else None
 
 @router.get("/content/{content_id}", response_model=ContentResponse)
-def get_content(content_id: int, db: Session = Depends(get_db)):
+async def get_content(content_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Get specific content by ID."""
-    service = ContentService(db)
-    content = service.get_content(content_id)
+    content = await db.run_sync(lambda session: _serialize(ContentService(session).get_content(content_id)))
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
     return content
 
 @router.put("/content/{content_id}", response_model=ContentResponse)
-def update_content(
+async def update_content(
     content_id: int,
     content_update: ContentUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update existing content."""
-    service = ContentService(db)
-    updated_content = service.update_content(content_id, content_update)
+    updated_content = await db.run_sync(
+        lambda session: _serialize(ContentService(session).update_content(content_id, content_update))
+    )
     if not updated_content:
         raise HTTPException(status_code=404, detail="Content not found")
     return updated_content
 
 @router.patch("/content/{content_id}", response_model=ContentResponse)
-def patch_content(
+async def patch_content(
     content_id: int,
     content_update: ContentUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Partially update existing content (same as PUT for this implementation)."""
-    service = ContentService(db)
-    updated_content = service.update_content(content_id, content_update)
+    updated_content = await db.run_sync(
+        lambda session: _serialize(ContentService(session).update_content(content_id, content_update))
+    )
     if not updated_content:
         raise HTTPException(status_code=404, detail="Content not found")
     return updated_content
 
 @router.delete("/content/{content_id}")
-def delete_content(content_id: int, db: Session = Depends(get_db)):
+async def delete_content(content_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete content from watchlist."""
-    service = ContentService(db)
-    success = service.delete_content(content_id)
+    success = await db.run_sync(lambda session: ContentService(session).delete_content(content_id))
     if not success:
         raise HTTPException(status_code=404, detail="Content not found")
     return {"message": "Content deleted successfully"}
 
 @router.post("/content/search")
-def search_content(
+async def search_content(
     query: str,
-    content_type: Optional[str] = None,
-    db: Session = Depends(get_db)
+    content_type: Optional[str] = None
 ):
     """Search for content using TMDB API."""
     tmdb_service = TMDBService()
-    results = tmdb_service.search_content(query, content_type)
+    results = await tmdb_service.search_content(query, content_type)
     return {"results": results}
 
 @router.post("/content/{content_id}/favorite")
-def toggle_favorite(content_id: int, db: Session = Depends(get_db)):
+async def toggle_favorite(content_id: int, db: AsyncSession = Depends(get_async_db)):
     """Toggle favorite status for content."""
-    service = ContentService(db)
-    updated_content = service.toggle_favorite(content_id)
+    updated_content = await db.run_sync(lambda session: _serialize(ContentService(session).toggle_favorite(content_id)))
     if not updated_content:
         raise HTTPException(status_code=404, detail="Content not found")
     return {"is_favorite": updated_content.is_favorite}
 
 @router.get("/content/{content_id}/similar")
-def get_similar_content(
+async def get_similar_content(
     content_id: int,
+    request: Request,
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get similar content recommendations."""
-    service = ContentService(db)
-    similar_content = service.get_similar_content(content_id, limit)
-    return {"similar": similar_content}
+    return await db.run_sync(lambda session: cache.cached_response(request, [cache.CONTENT], lambda: {
+        "similar": [
+            ContentResponse.model_validate(c)
+            for c in ContentService(session).get_similar_content(content_id, limit)
+        ]
+    }))
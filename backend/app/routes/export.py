@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+from ..database import get_read_db
+from ..services.export_service import EXPORT_FORMATS, ExportService, gzip_chunks
+
+router = APIRouter()
+
+def _stream_export(
+    request: Request,
+    db: Session,
+    table_name: str,
+    format: str,
+    updated_since: Optional[datetime]
+) -> StreamingResponse:
+    chunks = ExportService(db).export(table_name, format, updated_since)
+    headers = {"Content-Disposition": f'attachment; filename="{table_name}.{format}"'}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    # A sync iterator is consumed in the threadpool, one batch at a time
+    return StreamingResponse(chunks, media_type=EXPORT_FORMATS[format], headers=headers)
+
+@router.get("/export/content")
+def export_content(
+    request: Request,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    updated_since: Optional[datetime] = Query(None, description="Only rows created or updated at or after this time"),
+    db: Session = Depends(get_read_db)
+):
+    """Stream the whole library as NDJSON or CSV, gzipped when the client accepts it."""
+    return _stream_export(request, db, "content", format, updated_since)
+
+@router.get("/export/watches")
+def export_watches(
+    request: Request,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    updated_since: Optional[datetime] = Query(None, description="Only rows created or updated at or after this time"),
+    db: Session = Depends(get_read_db)
+):
+    """Stream the full watch history as NDJSON or CSV, gzipped when the client accepts it."""
+    return _stream_export(request, db, "watches", format, updated_since)
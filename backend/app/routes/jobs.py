@@ -0,0 +1,13 @@
+from fastapi import APIRouter, HTTPException
+from ..schemas.jobs import JobResponse
+from ..services.jobs import get_job_queue
+
+router = APIRouter()
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Status of a background job (enrichment, tag generation) and its result once done."""
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,88 +1,108 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime, timedelta
-from ..database import get_db
+from .. import cache
+from ..database import get_async_read_db
 from ..services.stats_service import StatsService
 
 router = APIRouter()
 
+# Stats are derived from both the library and the watch history
+STATS_TAGS = [cache.CONTENT, cache.WATCHES]
+
 @router.get("/stats/overview")
-def get_stats_overview(db: Session = Depends(get_db)):
+async def get_stats_overview(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     """Get overall statistics overview."""
-    service = StatsService(db)
-    return service.get_overview_stats()
+    return await db.run_sync(lambda session: cache.cached_response(
+        request, STATS_TAGS, StatsService(session).get_overview_stats
+    ))
 
 @router.get("/stats/viewing-time")
-def get_viewing_time_stats(
+async def get_viewing_time_stats(
+    request: Request,
     period: str = Query("month", regex="^(week|month|quarter|year|all)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get viewing time statistics for specified period."""
-    service = StatsService(db)
-    return service.get_viewing_time_stats(period)
+    return await db.run_sync(lambda session: cache.cached_response(
+        request, STATS_TAGS, lambda: StatsService(session).get_viewing_time_stats(period)
+    ))
 
 @router.get("/stats/genres")
-def get_genre_stats(
+async def get_genre_stats(
+    request: Request,
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get genre distribution statistics."""
-    service = StatsService(db)
-    return service.get_genre_stats(limit)
+    return await db.run_sync(lambda session: cache.cached_response(
+        request, STATS_TAGS, lambda: StatsService(session).get_genre_stats(limit)
+    ))
 
 @router.get("/stats/platforms")
-def get_platform_stats(
+async def get_platform_stats(
+    request: Request,
     period: str = Query("month", regex="^(week|month|quarter|year|all)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get platform usage statistics."""
-    service = StatsService(db)
-    return service.get_platform_stats(period)
+    return await db.run_sync(lambda session: cache.cached_response(
+        request, STATS_TAGS, lambda: StatsService(session).get_platform_stats(period)
+    ))
 
 @router.get("/stats/ratings")
-def get_rating_stats(db: Session = Depends(get_db)):
+async def get_rating_stats(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     """Get rating distribution and trends."""
-    service = StatsService(db)
-    return service.get_rating_stats()
+    return await db.run_sync(lambda session: cache.cached_response(
+        request, STATS_TAGS, StatsService(session).get_rating_stats
+    ))
 
 @router.get("/stats/completion")
-def get_completion_stats(db: Session = Depends(get_db)):
+async def get_completion_stats(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     """Get completion rate statistics."""
-    service = StatsService(db)
-    return service.get_completion_stats()
+    return await db.run_sync(lambda session: cache.cached_response(
+        request, STATS_TAGS, StatsService(session).get_completion_stats
+    ))
 
 @router.get("/stats/trending")
-def get_trending_content(
+async def get_trending_content(
+    request: Request,
     period: str = Query("week", regex="^(day|week|month)$"),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get trending content based on recent watches."""
-    service = StatsService(db)
-    return service.get_trending_content(period, limit)
+    return await db.run_sync(lambda session: cache.cached_response(
+        request, STATS_TAGS, lambda: StatsService(session).get_trending_content(period, limit)
+    ))
 
 @router.get("/stats/personal-records")
-def get_personal_records(db: Session = Depends(get_db)):
+async def get_personal_records(request: Request, db: AsyncSession = Depends(get_async_read_db)):
     """Get personal viewing records and milestones."""
-    service = StatsService(db)
-    return service.get_personal_records()
+    return await db.run_sync(lambda session: cache.cached_response(
+        request, STATS_TAGS, StatsService(session).get_personal_records
+    ))
 
 @router.get("/stats/monthly-summary")
-def get_monthly_summary(
-    year: int,
-    month: int,
-    db: Session = Depends(get_db)
+async def get_monthly_summary(
+    request: Request,
+    year: int = Query(..., ge=1, le=9998),
+    month: int = Query(..., ge=1, le=12),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get detailed monthly viewing summary."""
-    service = StatsService(db)
-    return service.get_monthly_summary(year, month)
+    return await db.run_sync(lambda session: cache.cached_response(
+        request, STATS_TAGS, lambda: StatsService(session).get_monthly_summary(year, month)
+    ))
 
 @router.get("/stats/year-in-review")
-def get_year_in_review(
-    year: int,
-    db: Session = Depends(get_db)
+async def get_year_in_review(
+    request: Request,
+    year: int = Query(..., ge=1, le=9998),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get comprehensive year-end review."""
-    service = StatsService(db)
-    return service.get_year_in_review(year)
+    return await db.run_sync(lambda session: cache.cached_response(
+        request, STATS_TAGS, lambda: StatsService(session).get_year_in_review(year)
+    ))
@@ -1,83 +1,165 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import math
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-from ..database import get_db
-from ..schemas.watches import WatchCreate, WatchResponse, WatchSessionCreate
+from ..database import get_async_db, get_async_read_db
+from ..responses import json_response
+from ..schemas.watches import WatchCreate, WatchHeartbeat, WatchResponse, WatchSessionCreate, WatchSessionResponse
+from ..services.pagination import InvalidCursor, cursor_header
+from ..services.session_heartbeats import get_heartbeat_tracker
+from ..services.watch_buffer import BufferFull, get_watch_buffer
 from ..services.watch_service import WatchService
 
 router = APIRouter()
 
+def _serialize(watch) -> Optional[WatchResponse]:
+    # Build the response inside run_sync, where attribute loads can still hit the database
+    return WatchResponse.model_validate(watch) if watch is not None else None
+
+def _serialize_session(session) -> Optional[WatchSessionResponse]:
+    return WatchSessionResponse.model_validate(session) if session is not None else None
+
 @router.post("/watches/", response_model=WatchResponse)
-def record_watch(
+async def record_watch(
     watch: WatchCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Record a new watch session."""
-    service = WatchService(db)
-    return service.create_watch(watch)
+    db_watch = await db.run_sync(lambda session: _serialize(WatchService(session).create_watch(watch)))
+    if not db_watch:
+        raise HTTPException(status_code=404, detail="Content not found")
+    return db_watch
+
+@router.post("/watches/batch", status_code=202)
+async def record_watch_batch(watches: List[WatchCreate] = Body(..., max_length=10000)):
+    """Queue many watch events for recording.
+    
+    Events are buffered and written in bulk, so they show up in the history,
+    stats and watch counts within ``watch_flush_interval`` seconds. Events
+    for content or platforms that do not exist are dropped when the batch is
+    written. Answers 503 while the buffer is full (the database is not
+    keeping up); retry after the ``Retry-After`` delay.
+    """
+    buffer = get_watch_buffer()
+    try:
+        await buffer.add(watches)
+    except BufferFull as exc:
+        raise HTTPException(
+            status_code=503, detail=str(exc), headers={"Retry-After": str(max(1, math.ceil(buffer.max_delay)))}
+        )
+    return {"accepted": len(watches)}
 
 @router.get("/watches/", response_model=List[WatchResponse])
-def get_watch_history(
+async def get_watch_history(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     content_id: Optional[int] = Query(None),
     platform_id: Optional[int] = Query(None),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page; replaces skip"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get watch history with optional filtering."""
-    service = WatchService(db)
-    return service.get_watch_history(
-        skip=skip,
-        limit=limit,
-        content_id=content_id,
-        platform_id=platform_id,
-        start_date=start_date,
-        end_date=end_date
-    )
+    """Get watch history with optional filtering, most recent first.
+    
+    When more rows may follow, the response carries an ``X-Next-Cursor``
+    header to pass back as ``cursor`` for the next page.
+    """
+    try:
+        watches = await db.run_sync(lambda session: [
+            WatchResponse.model_validate(watch)
+            for watch in WatchService(session).get_watch_history(
+                skip=skip,
+                limit=limit,
+                content_id=content_id,
+                platform_id=platform_id,
+                start_date=start_date,
+                end_date=end_date,
+                cursor=cursor
+            )
+        ])
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(watches, headers=cursor_header(watches, limit, "watched_at"))
 
 @router.get("/watches/{watch_id}", response_model=WatchResponse)
-def get_watch(watch_id: int, db: Session = Depends(get_db)):
+async def get_watch(watch_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Get specific watch record."""
-    service = WatchService(db)
-    watch = service.get_watch(watch_id)
+    watch = await db.run_sync(lambda session: _serialize(WatchService(session).get_watch(watch_id)))
     if not watch:
         raise HTTPException(status_code=404, detail="Watch record not found")
     return watch
 
 @router.delete("/watches/{watch_id}")
-def delete_watch(watch_id: int, db: Session = Depends(get_db)):
+async def delete_watch(watch_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a watch record."""
-    service = WatchService(db)
-    success = service.delete_watch(watch_id)
+    success = await db.run_sync(lambda session: WatchService(session).delete_watch(watch_id))
     if not success:
         raise HTTPException(status_code=404, detail="Watch record not found")
     return {"message": "Watch record deleted successfully"}
 
-@router.post("/watches/session/start")
-def start_watch_session(
+@router.post("/watches/session/start", response_model=WatchSessionResponse)
+async def start_watch_session(
     session: WatchSessionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Start a new watch session."""
-    service = WatchService(db)
-    return service.start_watch_session(session)
+    db_session = await db.run_sync(
+        lambda sync_session: _serialize_session(WatchService(sync_session).start_watch_session(session))
+    )
+    if not db_session:
+        raise HTTPException(status_code=404, detail="Content not found")
+    return db_session
+
+@router.post("/watches/session/{session_id}/heartbeat", status_code=204)
+async def session_heartbeat(session_id: int, heartbeat: WatchHeartbeat):
+    """Report progress of an open session.
+    
+    Heartbeats are coalesced in memory and written back every
+    ``session_flush_interval`` seconds; heartbeats for sessions that are
+    closed or unknown are ignored.
+    """
+    get_heartbeat_tracker().record(session_id, heartbeat)
+    return Response(status_code=204)
+
+@router.websocket("/watches/session/{session_id}/ws")
+async def session_heartbeat_socket(websocket: WebSocket, session_id: int):
+    """Stream heartbeats for one session: one JSON ``WatchHeartbeat`` per message.
+    
+    Invalid messages are answered with ``{"error": ...}``; the connection
+    stays open.
+    """
+    await websocket.accept()
+    tracker = get_heartbeat_tracker()
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                tracker.record(session_id, WatchHeartbeat.model_validate_json(message))
+            except ValidationError as e:
+                await websocket.send_json({"error": e.errors(include_url=False, include_context=False)})
+    except WebSocketDisconnect:
+        pass
 
-@router.post("/watches/session/{session_id}/end")
-def end_watch_session(
+@router.post("/watches/session/{session_id}/end", response_model=WatchSessionResponse)
+async def end_watch_session(
     session_id: int,
-    end_position: float,
-    db: Session = Depends(get_db)
+    end_position: float = Query(..., ge=0, le=100),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """End a watch session."""
-    service = WatchService(db)
-    return service.end_watch_session(session_id, end_position)
+    heartbeat = get_heartbeat_tracker().pop(session_id)
+    db_session = await db.run_sync(lambda session: _serialize_session(
+        WatchService(session).end_watch_session(session_id, end_position, heartbeat)
+    ))
+    if not db_session:
+        raise HTTPException(status_code=404, detail="Watch session not found")
+    return db_session
 
 @router.get("/content/{content_id}/watch-count")
-def get_watch_count(content_id: int, db: Session = Depends(get_db)):
+async def get_watch_count(content_id: int, db: AsyncSession = Depends(get_async_read_db)):
     """Get total watch count for specific content."""
-    service = WatchService(db)
-    count = service.get_watch_count(content_id)
+    count = await db.run_sync(lambda session: WatchService(session).get_watch_count(content_id))
     return {"content_id": content_id, "watch_count": count}
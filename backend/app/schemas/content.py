@@ -64,6 +64,51 @@ class ContentResponse(ContentBase):
     class Config:
         from_attributes = True
 
+class ContentListItem(BaseModel):
+    """Slim row for list views: no text bodies, cast or company lists."""
+    id: int
+    title: str
+    content_type: ContentType
+    status: ContentStatus = ContentStatus.PLANNED
+    is_favorite: bool = False
+    poster_path: Optional[str] = None
+    release_date: Optional[datetime] = None
+    runtime: Optional[int] = None
+    tmdb_rating: Optional[float] = None
+    personal_rating: Optional[float] = None
+    genres: Optional[List[str]] = []
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class BulkRowStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    ERROR = "error"
+
+class ContentBulkResult(BaseModel):
+    index: int
+    status: BulkRowStatus
+    id: Optional[int] = None
+    tmdb_id: Optional[int] = None
+    imdb_id: Optional[str] = None
+    error: Optional[str] = None
+
+class ContentBulkResponse(BaseModel):
+    created: int
+    duplicates: int
+    errors: int
+    results: List[ContentBulkResult]
+
+class LibrarySearchResult(BaseModel):
+    content: ContentResponse
+    rank: float
+    snippet: Optional[str] = None
+
+class LibrarySearchResponse(BaseModel):
+    results: List[LibrarySearchResult]
+
 class ContentSearchResult(BaseModel):
     id: int
     title: str
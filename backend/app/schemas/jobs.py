@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    payload: Dict[str, Any] = {}
+    attempts: int = 0
+    max_attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
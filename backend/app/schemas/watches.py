@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+from ..models.watches import DeviceType, VideoQuality, WatchLocation
 
 class WatchBase(BaseModel):
     content_id: int
@@ -11,7 +12,7 @@ class WatchBase(BaseModel):
     episode_title: Optional[str] = None
     duration_watched: Optional[int] = Field(None, ge=1)  # in minutes
     completion_percentage: float = Field(100.0, ge=0, le=100)
-    watch_location: Optional[str] = None
+    watch_location: Optional[WatchLocation] = None
     watch_mood: Optional[str] = None
     companions: Optional[str] = None
     notes: Optional[str] = None
@@ -28,7 +29,7 @@ class WatchUpdate(BaseModel):
     episode_title: Optional[str] = None
     duration_watched: Optional[int] = Field(None, ge=1)
     completion_percentage: Optional[float] = Field(None, ge=0, le=100)
-    watch_location: Optional[str] = None
+    watch_location: Optional[WatchLocation] = None
     watch_mood: Optional[str] = None
     companions: Optional[str] = None
     notes: Optional[str] = None
@@ -45,10 +46,10 @@ class WatchResponse(WatchBase):
 class WatchSessionBase(BaseModel):
     content_id: int
     started_at: datetime
-    device_type: Optional[str] = None
+    device_type: Optional[DeviceType] = None
     platform_id: Optional[int] = None
     start_position: float = Field(0.0, ge=0, le=100)
-    quality: Optional[str] = None
+    quality: Optional[VideoQuality] = None
     audio_language: Optional[str] = None
     subtitle_language: Optional[str] = None
     watch_mood: Optional[str] = None
@@ -62,12 +63,19 @@ class WatchSessionUpdate(BaseModel):
     paused_duration: Optional[int] = Field(None, ge=0)
     interruptions: Optional[int] = Field(None, ge=0)
 
+class WatchHeartbeat(BaseModel):
+    """Progress report from a player. Counters are running totals for the session."""
+    position: float = Field(..., ge=0, le=100)
+    paused_duration: Optional[int] = Field(None, ge=0)  # in minutes
+    interruptions: Optional[int] = Field(None, ge=0)
+
 class WatchSessionResponse(WatchSessionBase):
     id: int
     ended_at: Optional[datetime] = None
     end_position: Optional[float] = None
     paused_duration: int = 0
     interruptions: int = 0
+    last_heartbeat_at: Optional[datetime] = None
     created_at: datetime
     
     class Config:
@@ -1,142 +1,99 @@
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from ..schemas.ai import *
+from ..instrumentation import instrumented
 from ..models.content import Content
-import random
+from ..models.taxonomy import Genre
+from .embedding_service import EmbeddingService
+from .library_summary import completion_rate, library_summary
+from .recommendation_service import MOOD_GENRES, get_content_features
+from .search_service import SearchService
 
+@instrumented
 class AIService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_recommendations(self, **kwargs):
-        """Get AI recommendations - stub implementation."""
-        return []
+    def get_recommendations(
+        self,
+        user_preferences: Optional[List[UserPreference]] = None,
+        mood: Optional[str] = None,
+        limit: int = 10,
+        exclude_watched: bool = True,
+        content_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Content-based recommendations from the library, scored against the user's profile."""
+        features = get_content_features(self.db)
+        
+        genres = list(MOOD_GENRES.get((mood or "").lower(), []))
+        people = []
+        for preference in user_preferences or []:
+            if preference.type == PreferenceType.GENRE:
+                genres.append(preference.value)
+            elif preference.type in (PreferenceType.ACTOR, PreferenceType.DIRECTOR):
+                people.append(preference.value)
+        
+        profile = features.profile(genres=genres, people=people)
+        ranked = features.recommend(profile, limit=limit, exclude_watched=exclude_watched, content_type=content_type)
+        if not ranked:
+            return []
+        
+        details = {
+            row.id: row for row in self.db.query(
+                Content.id, Content.content_type, Content.overview,
+                Content.poster_path, Content.tmdb_rating, Content.genres
+            ).filter(Content.id.in_([r["content_id"] for r in ranked]))
+        }
+        return [
+            {
+                "content_id": r["content_id"],
+                "title": r["title"],
+                "content_type": details[r["content_id"]].content_type,
+                "overview": details[r["content_id"]].overview,
+                "poster_path": details[r["content_id"]].poster_path,
+                "tmdb_rating": details[r["content_id"]].tmdb_rating,
+                "genres": details[r["content_id"]].genres or [],
+                "confidence_score": r["confidence"],
+                "reason": r["reason"],
+                "source": "content_based",
+            }
+            for r in ranked if r["content_id"] in details
+        ]
 
     def get_recommendations_simple(self, user_preferences: str) -> List[Dict[str, Any]]:
         """Get simple AI recommendations based on user's watchlist."""
-        # Get user's current content to analyze preferences
-        user_content = self.db.query(Content).all()
-        
-        # Analyze user preferences
-        user_genres = []
-        user_types = []
-        completed_titles = []
-        
-        for content in user_content:
-            if content.genres:
-                user_genres.extend(content.genres)
-            user_types.append(content.content_type)
-            if content.status == "completed":
-                completed_titles.append(content.title)
-        
-        # Create AI-style recommendations based on patterns
-        recommendations = []
-        
-        # Genre-based recommendations
-        if "Action" in user_genres or "Science Fiction" in user_genres:
-            recommendations.extend([
-                {
-                    "title": "Blade Runner 2049",
-                    "reason": "Based on your love for sci-fi movies like The Matrix, you'll enjoy this visually stunning cyberpunk masterpiece with deep philosophical themes.",
-                    "confidence": 0.92
-                },
-                {
-                    "title": "John Wick",
-                    "reason": "Since you enjoy action films, this stylish action thriller with incredible choreography and world-building will be perfect for you.",
-                    "confidence": 0.88
-                },
-                {
-                    "title": "Westworld",
-                    "reason": "This HBO series combines AI themes and philosophical questions similar to The Matrix, but in a Western setting.",
-                    "confidence": 0.85
-                }
-            ])
-        
-        # TV show recommendations if user watches TV
-        if "tv" in user_types:
-            recommendations.extend([
-                {
-                    "title": "Dark",
-                    "reason": "This German series offers complex storytelling and supernatural elements that will appeal to fans of mind-bending shows.",
-                    "confidence": 0.89
-                },
-                {
-                    "title": "Stranger Things",
-                    "reason": "Perfect blend of supernatural mystery and nostalgia that captures the same engaging storytelling style you enjoy.",
-                    "confidence": 0.87
-                }
-            ])
-        
-        # Movie recommendations
-        if "movie" in user_types:
-            recommendations.extend([
-                {
-                    "title": "Inception",
-                    "reason": "Christopher Nolan's masterpiece about dreams within dreams - perfect if you enjoy complex, mind-bending narratives.",
-                    "confidence": 0.94
-                },
-                {
-                    "title": "Interstellar",
-                    "reason": "Another Nolan film that combines science fiction with emotional depth and stunning visuals.",
-                    "confidence": 0.91
-                }
-            ])
-        
-        # General popular recommendations
-        if not recommendations:
-            recommendations = [
-                {
-                    "title": "Breaking Bad",
-                    "reason": "One of the greatest TV series ever made - a perfect starting point for any watchlist!",
-                    "confidence": 0.95
-                },
-                {
-                    "title": "The Godfather",
-                    "reason": "A timeless classic that every movie lover should experience at least once.",
-                    "confidence": 0.93
-                },
-                {
-                    "title": "Pulp Fiction",
-                    "reason": "Quentin Tarantino's masterpiece with non-linear storytelling and memorable characters.",
-                    "confidence": 0.90
-                }
-            ]
-        
-        # Limit and randomize recommendations
-        recommendations = random.sample(recommendations, min(5, len(recommendations)))
-        
-        return recommendations
+        features = get_content_features(self.db)
+        
+        # Genres named in the free-text preferences boost the profile
+        text = (user_preferences or "").lower()
+        known_genres = [name for (name,) in self.db.query(Genre.name)]
+        genres = [genre for genre in known_genres if genre.lower() in text]
+        
+        profile = features.profile(genres=genres)
+        return [
+            {
+                "content_id": r["content_id"],
+                "title": r["title"],
+                "reason": r["reason"],
+                "confidence": r["confidence"],
+            }
+            for r in features.recommend(profile, limit=5)
+        ]
 
     def analyze_viewing_patterns(self, **kwargs):
         """Analyze viewing patterns - enhanced implementation."""
-        user_content = self.db.query(Content).all()
-        
-        total_content = len(user_content)
-        completed_count = len([c for c in user_content if c.status == "completed"])
-        watching_count = len([c for c in user_content if c.status == "watching"])
-        planned_count = len([c for c in user_content if c.status == "planned"])
-        
-        # Analyze genres
-        all_genres = []
-        for content in user_content:
-            if content.genres:
-                all_genres.extend(content.genres)
-        
-        genre_counts = {}
-        for genre in all_genres:
-            genre_counts[genre] = genre_counts.get(genre, 0) + 1
+        summary = library_summary(self.db)
         
         return {
             "analysis_type": "viewing_patterns",
             "time_period": "all_time",
-            "summary": f"You have {total_content} items in your watchlist with {completed_count} completed",
+            "summary": f"You have {summary['total']} items in your watchlist with {summary['by_status'].get('completed', 0)} completed",
             "insights": {
-                "completion_rate": round((completed_count / total_content * 100) if total_content > 0 else 0, 1),
-                "favorite_genres": sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:3],
+                "completion_rate": completion_rate(summary),
+                "favorite_genres": list(summary["genres"].items())[:3],
                 "content_distribution": {
-                    "completed": completed_count,
-                    "watching": watching_count,
-                    "planned": planned_count
+                    status: summary["by_status"].get(status, 0)
+                    for status in ("completed", "watching", "planned")
                 }
             },
             "generated_at": "2025-07-28"
@@ -169,16 +126,15 @@ class AIService:
 
     def chat_about_watchlist(self, query: str) -> str:
         """Chat about watchlist - enhanced implementation."""
-        user_content = self.db.query(Content).all()
-        
         if "recommend" in query.lower():
             return "Based on your watchlist, I'd suggest exploring more sci-fi films like Blade Runner 2049 or TV series like Dark!"
         elif "stats" in query.lower() or "statistics" in query.lower():
-            total = len(user_content)
-            completed = len([c for c in user_content if c.status == "completed"])
+            summary = library_summary(self.db)
+            total = summary["total"]
+            completed = summary["by_status"].get("completed", 0)
             return f"You have {total} items in your watchlist with {completed} completed. That's a {round(completed/total*100) if total > 0 else 0}% completion rate!"
         elif "what should i watch" in query.lower():
-            watching = [c.title for c in user_content if c.status == "watching"]
+            watching = [title for (title,) in self.db.query(Content.title).filter(Content.status == "watching")]
             if watching:
                 return f"You're currently watching {', '.join(watching)}. Why not continue with one of those?"
             else:
@@ -187,32 +143,22 @@ class AIService:
             return "I can help you with recommendations, statistics, or suggestions about what to watch next. Just ask!"
 
     def semantic_search(self, query: str, limit: int = 10):
-        """Semantic search - enhanced implementation."""
-        user_content = self.db.query(Content).all()
-        
-        results = []
-        query_lower = query.lower()
-        
-        for content in user_content:
-            score = 0
-            if query_lower in content.title.lower():
-                score += 10
-            if content.genres:
-                for genre in content.genres:
-                    if query_lower in genre.lower():
-                        score += 5
-            if content.overview and query_lower in content.overview.lower():
-                score += 3
-                
-            if score > 0:
-                results.append({"content": content, "score": score})
-        
-        results.sort(key=lambda x: x["score"], reverse=True)
-        return [r["content"] for r in results[:limit]]
+        """Semantic search - nearest neighbours in embedding space."""
+        matches = EmbeddingService(self.db).search(query, k=limit)
+        if not matches:
+            # No embeddings yet: fall back to ranked full-text search
+            results = SearchService(self.db).search(query, limit=limit)
+            return [result["content"] for result in results]
+        
+        match_ids = [content_id for content_id, score in matches if score > 0]
+        contents = {c.id: c for c in self.db.query(Content).filter(Content.id.in_(match_ids))}
+        return [contents[i] for i in match_ids if i in contents]
 
     def generate_content_tags(self, content_id: int):
         """Generate content tags - enhanced implementation."""
-        content = self.db.query(Content).filter(Content.id == content_id).first()
+        content = self.db.query(
+            Content.genres, Content.tmdb_rating, Content.content_type
+        ).filter(Content.id == content_id).first()
         if not content:
             return []
         
@@ -232,26 +178,18 @@ class AIService:
 
     def generate_viewing_insights(self):
         """Generate viewing insights - enhanced implementation."""
-        user_content = self.db.query(Content).all()
+        summary = library_summary(self.db)
         
         insights = []
         
         # Completion rate insight
-        total = len(user_content)
-        completed = len([c for c in user_content if c.status == "completed"])
-        if total > 0:
-            completion_rate = completed / total * 100
-            insights.append(f"Your completion rate is {completion_rate:.1f}% - {'Great job!' if completion_rate > 50 else 'You have lots to catch up on!'}")
+        if summary["total"] > 0:
+            rate = completion_rate(summary)
+            insights.append(f"Your completion rate is {rate:.1f}% - {'Great job!' if rate > 50 else 'You have lots to catch up on!'}")
         
         # Genre preference insight
-        all_genres = []
-        for content in user_content:
-            if content.genres:
-                all_genres.extend(content.genres)
-        
-        if all_genres:
-            from collections import Counter
-            top_genre = Counter(all_genres).most_common(1)[0][0]
+        if summary["genres"]:
+            top_genre = next(iter(summary["genres"]))
             insights.append(f"You seem to love {top_genre} content!")
         
         return insights
@@ -1,10 +1,23 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
-from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import and_, or_, desc, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Dict, Any, Sequence
+from datetime import datetime
+from pydantic import ValidationError
+from .. import cache
+from ..instrumentation import instrumented
 from ..models.content import Content, Platform, ContentPlatform
-from ..schemas.content import ContentCreate, ContentUpdate, ContentResponse
+from ..models.taxonomy import Genre, ContentGenre
+from ..schemas.content import ContentCreate, ContentUpdate, ContentResponse, BulkRowStatus
+from .embedding_service import EMBEDDED_FIELDS, EmbeddingService
+from .library_summary import library_summary
+from .pagination import keyset_page
+from .recommendation_service import remove_content_features, update_content_features
+from .search_service import SearchService
+from .taxonomy_service import FACET_FIELDS, TaxonomyService
 import json
 
+@instrumented
 class ContentService:
     def __init__(self, db: Session):
         self.db = db
@@ -15,10 +28,18 @@ class ContentService:
         limit: int = 100,
         content_type: Optional[str] = None,
         status: Optional[str] = None,
-        genre: Optional[str] = None
+        genre: Optional[str] = None,
+        cursor: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None
     ) -> List[Content]:
-        """Get list of content with optional filtering."""
+        """Get list of content with optional filtering.
+        
+        Pages with ``cursor`` (from ``next_cursor``) when given, else skip/limit.
+        With ``columns``, only those attributes (and ``id``) are loaded.
+        """
         query = self.db.query(Content)
+        if columns:
+            query = query.options(load_only(*(getattr(Content, column) for column in columns)))
         
         if content_type:
             query = query.filter(Content.content_type == content_type)
@@ -27,10 +48,10 @@ class ContentService:
             query = query.filter(Content.status == status)
         
         if genre:
-            # Filter by genre (stored as JSON array)
-            query = query.filter(Content.genres.contains([genre]))
+            # Filter through the indexed genre association table
+            query = query.filter(Content.id.in_(self._ids_with_genre(genre)))
         
-        return query.order_by(desc(Content.updated_at)).offset(skip).limit(limit).all()
+        return keyset_page(query, Content.updated_at, Content.id, limit, skip, cursor).all()
 
     def create_content(self, content: ContentCreate) -> Content:
         """Create new content entry."""
@@ -39,10 +60,142 @@ class ContentService:
         db_content = Content(**content_data)
         
         self.db.add(db_content)
+        self.db.flush()
+        TaxonomyService(self.db).sync([db_content])
+        EmbeddingService(self.db).embed_contents([db_content])
         self.db.commit()
+        cache.invalidate(cache.CONTENT)
         self.db.refresh(db_content)
+        update_content_features([db_content])
         return db_content
 
+    def bulk_create(self, contents: Sequence[ContentCreate], chunk_size: int = 500) -> List[Dict[str, Any]]:
+        """Insert many content entries in a single transaction.
+        
+        Rows are inserted in chunks with one multi-row INSERT each. Entries whose
+        ``tmdb_id`` or ``imdb_id`` already exists (in the database or earlier in
+        the batch) are reported as duplicates instead of failing the batch.
+        Returns one result dict per input entry, in input order.
+        """
+        results: List[Dict[str, Any]] = [None] * len(contents)
+        seen_tmdb: Dict[int, Optional[int]] = {}
+        seen_imdb: Dict[str, Optional[int]] = {}
+        
+        for start in range(0, len(contents), chunk_size):
+            chunk = list(enumerate(contents[start:start + chunk_size], start))
+            self._load_existing_ids(chunk, seen_tmdb, seen_imdb)
+            
+            pending = []
+            for index, content in chunk:
+                existing_id = self._find_duplicate(content, seen_tmdb, seen_imdb)
+                if existing_id is not False:
+                    results[index] = self._bulk_result(index, content, BulkRowStatus.DUPLICATE, existing_id)
+                    continue
+                # Reserve the external IDs so later rows in the batch dedupe against them
+                if content.tmdb_id is not None:
+                    seen_tmdb[content.tmdb_id] = None
+                if content.imdb_id is not None:
+                    seen_imdb[content.imdb_id] = None
+                pending.append((index, content))
+            
+            if pending:
+                self._insert_chunk(pending, results, seen_tmdb, seen_imdb)
+                self._sync_chunk_derived(pending, results)
+        
+        self.db.commit()
+        cache.invalidate(cache.CONTENT)
+        return results
+
+    def _load_existing_ids(self, chunk, seen_tmdb: Dict[int, Optional[int]], seen_imdb: Dict[str, Optional[int]]) -> None:
+        """Look up which external IDs in ``chunk`` are already stored."""
+        tmdb_ids = {c.tmdb_id for _, c in chunk if c.tmdb_id is not None} - seen_tmdb.keys()
+        imdb_ids = {c.imdb_id for _, c in chunk if c.imdb_id is not None} - seen_imdb.keys()
+        if not tmdb_ids and not imdb_ids:
+            return
+        
+        rows = self.db.query(Content.id, Content.tmdb_id, Content.imdb_id).filter(
+            or_(Content.tmdb_id.in_(tmdb_ids), Content.imdb_id.in_(imdb_ids))
+        ).all()
+        for content_id, tmdb_id, imdb_id in rows:
+            if tmdb_id is not None:
+                seen_tmdb[tmdb_id] = content_id
+            if imdb_id is not None:
+                seen_imdb[imdb_id] = content_id
+
+    @staticmethod
+    def _find_duplicate(content: ContentCreate, seen_tmdb, seen_imdb):
+        """Return the ID of an already-seen entry (``None`` if not inserted yet), or ``False``."""
+        if content.tmdb_id is not None and content.tmdb_id in seen_tmdb:
+            return seen_tmdb[content.tmdb_id]
+        if content.imdb_id is not None and content.imdb_id in seen_imdb:
+            return seen_imdb[content.imdb_id]
+        return False
+
+    def _insert_chunk(self, pending, results, seen_tmdb, seen_imdb) -> None:
+        """Insert one chunk, falling back to row-by-row inserts on a conflict."""
+        statement = insert(Content).returning(Content.id, sort_by_parameter_order=True)
+        rows = [self._to_row(content) for _, content in pending]
+        
+        try:
+            with self.db.begin_nested():
+                ids = self.db.execute(statement, rows).scalars().all()
+        except IntegrityError:
+            # A concurrent writer inserted one of these IDs; isolate the offending rows
+            ids = []
+            for row in rows:
+                try:
+                    with self.db.begin_nested():
+                        ids.append(self.db.execute(statement, [row]).scalar_one())
+                except IntegrityError as exc:
+                    ids.append(exc)
+        
+        for (index, content), content_id in zip(pending, ids):
+            if isinstance(content_id, IntegrityError):
+                results[index] = self._bulk_result(
+                    index, content, BulkRowStatus.DUPLICATE, error="Conflicts with an existing entry"
+                )
+                continue
+            if content.tmdb_id is not None:
+                seen_tmdb[content.tmdb_id] = content_id
+            if content.imdb_id is not None:
+                seen_imdb[content.imdb_id] = content_id
+            results[index] = self._bulk_result(index, content, BulkRowStatus.CREATED, content_id)
+
+    def _sync_chunk_derived(self, pending, results) -> None:
+        """Update facet tables and embeddings for the rows a chunk created."""
+        rows = [
+            {"id": results[index]["id"], **self._to_row(content)}
+            for index, content in pending
+            if results[index]["status"] == BulkRowStatus.CREATED
+        ]
+        TaxonomyService(self.db).sync(rows)
+        EmbeddingService(self.db).embed_rows(rows)
+        update_content_features(rows)
+
+    @staticmethod
+    def _to_row(content: ContentCreate) -> Dict[str, Any]:
+        row = content.model_dump()
+        row["content_type"] = content.content_type.value
+        row["status"] = content.status.value
+        return row
+
+    @staticmethod
+    def _bulk_result(
+        index: int,
+        content: ContentCreate,
+        status: BulkRowStatus,
+        content_id: Optional[int] = None,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "status": status,
+            "id": content_id,
+            "tmdb_id": content.tmdb_id,
+            "imdb_id": content.imdb_id,
+            "error": error,
+        }
+
     def get_content(self, content_id: int) -> Optional[Content]:
         """Get content by ID."""
         return self.db.query(Content).filter(Content.id == content_id).first()
@@ -53,12 +206,21 @@ class ContentService:
         if not db_content:
             return None
         
-        update_data = content_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
+        return self._save_changes(db_content, content_update.model_dump(exclude_unset=True))
+
+    def _save_changes(self, db_content: Content, changes: Dict[str, Any]) -> Content:
+        """Set ``changes`` on ``db_content`` and refresh everything derived from it."""
+        for field, value in changes.items():
             setattr(db_content, field, value)
         
+        if changes.keys() & FACET_FIELDS:
+            TaxonomyService(self.db).sync([db_content])
+        if changes.keys() & set(EMBEDDED_FIELDS):
+            EmbeddingService(self.db).embed_contents([db_content])
         self.db.commit()
+        cache.invalidate(cache.CONTENT)
         self.db.refresh(db_content)
+        update_content_features([db_content])
         return db_content
 
     def delete_content(self, content_id: int) -> bool:
@@ -68,7 +230,11 @@ class ContentService:
             return False
         
         self.db.delete(db_content)
+        TaxonomyService(self.db).clear([content_id])
+        EmbeddingService(self.db).remove([content_id])
         self.db.commit()
+        cache.invalidate(cache.CONTENT)
+        remove_content_features([content_id])
         return True
 
     def toggle_favorite(self, content_id: int) -> Optional[Content]:
@@ -79,19 +245,15 @@ class ContentService:
         
         db_content.is_favorite = not db_content.is_favorite
         self.db.commit()
+        cache.invalidate(cache.CONTENT)
         self.db.refresh(db_content)
+        update_content_features([db_content])
         return db_content
 
     def search_content(self, query: str, content_type: Optional[str] = None) -> List[Content]:
-        """Search content by title."""
-        search_query = self.db.query(Content).filter(
-            Content.title.ilike(f"%{query}%")
-        )
-        
-        if content_type:
-            search_query = search_query.filter(Content.content_type == content_type)
-        
-        return search_query.order_by(desc(Content.tmdb_rating)).limit(20).all()
+        """Search content by title, overview, cast, director and genres."""
+        results = SearchService(self.db).search(query, content_type=content_type, limit=20)
+        return [result["content"] for result in results]
 
     def get_similar_content(self, content_id: int, limit: int = 10) -> List[Content]:
         """Get similar content based on genres and other attributes."""
@@ -99,7 +261,21 @@ class ContentService:
         if not base_content:
             return []
         
-        # Simple similarity based on shared genres
+        # Nearest neighbours in embedding space, restricted to the same type
+        neighbours = EmbeddingService(self.db).similar(content_id, k=limit * 4)
+        if neighbours:
+            neighbour_ids = [neighbour_id for neighbour_id, _ in neighbours]
+            candidates = {
+                content.id: content for content in self.db.query(Content).filter(
+                    Content.id.in_(neighbour_ids),
+                    Content.content_type == base_content.content_type
+                )
+            }
+            ranked = [candidates[i] for i in neighbour_ids if i in candidates][:limit]
+            if ranked:
+                return ranked
+        
+        # Fall back to shared genres for titles that have no embedding yet
         similar_query = self.db.query(Content).filter(
             and_(
                 Content.id != content_id,
@@ -107,60 +283,107 @@ class ContentService:
             )
         )
         
-        # If content has genres, filter by similar genres
-        if base_content.genres:
-            # Make genre matching compatible with both PostgreSQL and SQLite
-            if self.db.bind.dialect.name == 'postgresql':
-                # Use the efficient array overlap operator for PostgreSQL
-                similar_query = similar_query.filter(
-                    Content.genres.op('&&')(base_content.genres)
-                )
-            else:
-                # For SQLite (and other backends), use a series of LIKE queries
-                # This assumes genres are stored as a JSON string array, e.g., '["Action", "Adventure"]'
-                genre_filters = [Content.genres.like(f'%"{genre}"%') for genre in base_content.genres]
-                similar_query = similar_query.filter(or_(*genre_filters))
+        if not base_content.genres:
+            return similar_query.order_by(desc(Content.tmdb_rating)).limit(limit).all()
+        
+        # Rank by number of shared genres using the genre association index
+        base_genres = select(ContentGenre.genre_id).where(ContentGenre.content_id == content_id)
+        shared = select(
+            ContentGenre.content_id,
+            func.count().label("shared_genres")
+        ).where(
+            ContentGenre.genre_id.in_(base_genres)
+        ).group_by(ContentGenre.content_id).subquery()
         
-        return similar_query.order_by(desc(Content.tmdb_rating)).limit(limit).all()
+        return similar_query.join(shared, shared.c.content_id == Content.id).order_by(
+            desc(shared.c.shared_genres), desc(Content.tmdb_rating)
+        ).limit(limit).all()
+
+    @staticmethod
+    def _ids_with_genre(genre: str):
+        """Subquery of content IDs tagged with ``genre``."""
+        return select(ContentGenre.content_id).join(
+            Genre, Genre.id == ContentGenre.genre_id
+        ).where(Genre.name == genre)
 
     def get_by_tmdb_id(self, tmdb_id: int) -> Optional[Content]:
         """Get content by TMDB ID."""
         return self.db.query(Content).filter(Content.tmdb_id == tmdb_id).first()
 
-    def merge_tmdb_data(self, content: ContentCreate, tmdb_data: Dict[str, Any]) -> ContentCreate:
-        """Merge TMDB data with user input."""
-        # This would integrate with TMDB API data
-        # For now, return as-is
-        return content
+    @staticmethod
+    def merge_tmdb_data(content: ContentCreate, tmdb_data: Dict[str, Any]) -> ContentCreate:
+        """Merge TMDB data with user input.
+        
+        Values the user supplied win; TMDB only fills fields that were left
+        unset or empty.
+        """
+        user_data = {
+            field: value for field, value in content.model_dump().items()
+            if field in content.model_fields_set and value not in (None, "", [])
+        }
+        try:
+            return ContentCreate.model_validate({**ContentService._tmdb_fields(tmdb_data), **user_data})
+        except ValidationError:
+            return content
+
+    @staticmethod
+    def _tmdb_fields(tmdb_data: Dict[str, Any]) -> Dict[str, Any]:
+        """The non-empty ``ContentCreate`` fields of a parsed TMDB payload."""
+        tmdb_fields = {
+            field: value for field, value in tmdb_data.items()
+            if field in ContentCreate.model_fields and value not in (None, "", [], 0)
+        }
+        if isinstance(tmdb_fields.get("release_date"), str):
+            try:
+                tmdb_fields["release_date"] = datetime.fromisoformat(tmdb_fields["release_date"])
+            except ValueError:
+                del tmdb_fields["release_date"]
+        return tmdb_fields
+
+    def apply_tmdb_data(self, content_id: int, tmdb_data: Dict[str, Any]) -> Optional[Content]:
+        """Fill fields still empty on stored content from a TMDB payload.
+        
+        The stored-content counterpart of ``merge_tmdb_data``, used when
+        enrichment runs after the row was created: anything already set
+        (by the user or an earlier enrichment) is kept. Returns ``None`` if
+        the content no longer exists.
+        """
+        db_content = self.get_content(content_id)
+        if not db_content:
+            return None
+        
+        fields = ContentService._tmdb_fields(tmdb_data)
+        try:
+            validated = ContentCreate.model_validate({
+                "title": db_content.title, "content_type": db_content.content_type, **fields
+            })
+        except ValidationError:
+            return db_content
+        filled = {
+            field: getattr(validated, field) for field in fields
+            if field not in ("title", "content_type", "tmdb_id", "imdb_id")
+            and getattr(db_content, field) in (None, "", [])
+        }
+        return self._save_changes(db_content, filled)
 
-    def get_favorites(self, skip: int = 0, limit: int = 100) -> List[Content]:
+    def get_favorites(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Content]:
         """Get user's favorite content."""
-        return self.db.query(Content).filter(
-            Content.is_favorite == True
-        ).order_by(desc(Content.updated_at)).offset(skip).limit(limit).all()
+        query = self.db.query(Content).filter(Content.is_favorite.is_(True))
+        return keyset_page(query, Content.updated_at, Content.id, limit, skip, cursor).all()
 
-    def get_by_status(self, status: str, skip: int = 0, limit: int = 100) -> List[Content]:
+    def get_by_status(self, status: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Content]:
         """Get content by status."""
-        return self.db.query(Content).filter(
-            Content.status == status
-        ).order_by(desc(Content.updated_at)).offset(skip).limit(limit).all()
+        query = self.db.query(Content).filter(Content.status == status)
+        return keyset_page(query, Content.updated_at, Content.id, limit, skip, cursor).all()
 
     def get_statistics(self) -> Dict[str, Any]:
         """Get basic content statistics."""
-        total = self.db.query(Content).count()
-        movies = self.db.query(Content).filter(Content.content_type == "movie").count()
-        tv_shows = self.db.query(Content).filter(Content.content_type == "tv").count()
-        favorites = self.db.query(Content).filter(Content.is_favorite == True).count()
-        
-        # Get status breakdown
-        status_counts = self.db.query(
-            Content.status, func.count(Content.id)
-        ).group_by(Content.status).all()
+        summary = library_summary(self.db)
         
         return {
-            "total_content": total,
-            "movies": movies,
-            "tv_shows": tv_shows,
-            "favorites": favorites,
-            "status_breakdown": dict(status_counts)
+            "total_content": summary["total"],
+            "movies": summary["by_type"].get("movie", 0),
+            "tv_shows": summary["by_type"].get("tv", 0),
+            "favorites": summary["favorites"],
+            "status_breakdown": summary["by_status"]
         }
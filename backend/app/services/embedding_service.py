@@ -0,0 +1,319 @@
+import hashlib
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, select, update
+
+from ..config import settings
+from ..models.content import Content
+from .vector_index import VectorIndex
+
+EMBEDDING_DTYPE = np.dtype("<f4")
+EMBEDDED_FIELDS = ("title", "overview", "genres", "cast", "director")
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his in into is it its of on or "
+    "she that the their them they this to was were which while who will with".split()
+)
+
+def encode_vector(vector: np.ndarray) -> bytes:
+    """Pack a vector as little-endian float32 for the ``embedding`` column."""
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+def decode_vector(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedder that needs no model download.
+
+    Words, genres, cast and director are hashed (signed) into ``dim`` buckets
+    and the result is L2-normalized, so cosine similarity reflects weighted
+    feature overlap.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float) -> None:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+        sign = 1.0 if digest & 1 else -1.0
+        vector[(digest >> 1) % self.dim] += sign * weight
+
+    def _add_words(self, vector: np.ndarray, text: Optional[str], weight: float) -> None:
+        for word in _WORD.findall((text or "").lower()):
+            if word not in _STOPWORDS:
+                self._add(vector, word, weight)
+
+    def embed_fields(self, fields: Dict[str, Any]) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        self._add_words(vector, fields.get("title"), 2.0)
+        self._add_words(vector, fields.get("overview"), 1.0)
+        for genre in fields.get("genres") or []:
+            self._add(vector, f"genre:{genre.lower()}", 3.0)
+            self._add_words(vector, genre, 1.0)
+        for name in fields.get("cast") or []:
+            self._add(vector, f"person:{name.lower()}", 1.5)
+        if fields.get("director"):
+            self._add(vector, f"person:{fields['director'].lower()}", 2.0)
+        return _normalize(vector)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        self._add_words(vector, text, 1.0)
+        return _normalize(vector)
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model (optional dependency)."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed_fields(self, fields: Dict[str, Any]) -> np.ndarray:
+        parts = [fields.get("title") or "", fields.get("overview") or ""]
+        parts.append("Genres: " + ", ".join(fields.get("genres") or []))
+        parts.append("Starring: " + ", ".join(fields.get("cast") or []))
+        if fields.get("director"):
+            parts.append(f"Directed by {fields['director']}")
+        return self.embed_query(". ".join(parts))
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+class IndexFingerprint(NamedTuple):
+    """Summary of the embedded content an index was built from.
+
+    Any insert, delete or edit of embedded content changes at least one of
+    these, so a saved index whose fingerprint differs from the database's
+    is stale (a crash before saving, another worker's writes, a different
+    ``DATABASE_URL``) and is rebuilt instead of loaded.
+    """
+    count: int
+    max_id: Optional[int]
+    max_updated_at: Optional[datetime]
+
+    def __str__(self) -> str:
+        updated = self.max_updated_at.isoformat() if self.max_updated_at else ""
+        return f"{self.count}:{self.max_id or 0}:{updated}"
+
+_embedder = None
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+def get_embedder():
+    """Return the configured embedder, falling back to hashing if the model is unavailable."""
+    global _embedder
+    if _embedder is None:
+        if settings.embedding_backend == "sentence-transformers":
+            try:
+                _embedder = SentenceTransformerEmbedder(settings.local_embedding_model)
+            except ImportError:
+                _embedder = HashingEmbedder(settings.embedding_dim)
+        else:
+            _embedder = HashingEmbedder(settings.embedding_dim)
+    return _embedder
+
+def get_vector_index(db: Session) -> VectorIndex:
+    """Return the process-wide vector index, loading or building it on first use.
+
+    A saved index is only loaded when its fingerprint matches the database.
+    """
+    global _index
+    if _index is None:
+        # Built outside the lock: under AsyncSession.run_sync the queries yield to
+        # the event loop, and another request on that loop blocking on a held
+        # lock would stall the worker. Concurrent cold starts may build twice.
+        service = EmbeddingService(db)
+        fingerprint = service.index_fingerprint()
+        dim = get_embedder().dim
+        path = settings.vector_index_path
+        index = None
+        if path and os.path.exists(path):
+            index = VectorIndex.load(path, nprobe=settings.vector_index_nprobe)
+            if index.dim != dim or index.fingerprint != str(fingerprint):
+                index = None
+        if index is None:
+            index = VectorIndex(dim, nprobe=settings.vector_index_nprobe)
+            service.load_index(index)
+        index.synced_through = fingerprint.max_updated_at
+        with _index_lock:
+            published = _index is None
+            if published:
+                _index = index
+        if published:
+            # Writes that committed during the build found no index to update
+            service.sync_index(index)
+    return _index
+
+def save_vector_index(db: Optional[Session] = None) -> None:
+    """Persist the index if it changed since it was loaded (called on shutdown).
+
+    The index first picks up writes made by other processes, then is saved
+    with the database's fingerprint taken before that catch-up, so a write
+    racing the save makes the file stale rather than wrongly current.
+    """
+    if _index is None or not _index.dirty or not settings.vector_index_path:
+        return
+    from ..database import SessionLocal
+    session = db or SessionLocal()
+    try:
+        service = EmbeddingService(session)
+        fingerprint = service.index_fingerprint()
+        service.sync_index(_index)
+    finally:
+        if db is None:
+            session.close()
+    _index.fingerprint = str(fingerprint)
+    _index.save(settings.vector_index_path)
+
+def reset_vector_index() -> None:
+    """Drop the in-memory index so the next use reloads it."""
+    global _index
+    _index = None
+
+class EmbeddingService:
+    """Computes content embeddings and keeps the vector index in sync."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.embedder = get_embedder()
+
+    def embed_rows(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """Embed rows (dicts with ``id`` and EMBEDDED_FIELDS), store and index them.
+
+        Does not commit.
+        """
+        if not rows:
+            return
+        vectors = np.stack([self.embedder.embed_fields(row) for row in rows])
+        table = Content.__table__
+        # Keep updated_at as is: a derived column changing is not a content edit
+        statement = update(table).where(table.c.id == bindparam("content_id")).values(
+            embedding=bindparam("blob"), updated_at=table.c.updated_at
+        )
+        self.db.execute(
+            statement,
+            [{"content_id": row["id"], "blob": encode_vector(vector)} for row, vector in zip(rows, vectors)]
+        )
+        if _index is not None:
+            _index.upsert([row["id"] for row in rows], vectors)
+
+    def embed_contents(self, contents: Iterable[Content]) -> None:
+        """Embed ORM content objects in place. Does not commit."""
+        contents = list(contents)
+        vectors = [self.embedder.embed_fields({f: getattr(c, f) for f in EMBEDDED_FIELDS}) for c in contents]
+        for content, vector in zip(contents, vectors):
+            content.embedding = encode_vector(vector)
+        if _index is not None and contents:
+            _index.upsert([c.id for c in contents], np.stack(vectors))
+
+    def remove(self, content_ids: Iterable[int]) -> None:
+        if _index is not None:
+            _index.remove(content_ids)
+
+    def embed_pending(self, batch_size: int = 500, force: bool = False) -> int:
+        """Fill embeddings in batches for rows missing one (or all rows with ``force``)."""
+        columns = [Content.id] + [getattr(Content, field) for field in EMBEDDED_FIELDS]
+        last_id = 0
+        total = 0
+
+        while True:
+            query = select(*columns).where(Content.id > last_id)
+            if not force:
+                query = query.where(Content.embedding.is_(None))
+            batch = self.db.execute(query.order_by(Content.id).limit(batch_size)).mappings().all()
+            if not batch:
+                break
+            self.embed_rows([dict(row) for row in batch])
+            self.db.commit()
+            last_id = batch[-1]["id"]
+            total += len(batch)
+
+        return total
+
+    def load_index(self, index: VectorIndex, batch_size: int = 5000) -> None:
+        """Fill ``index`` from stored embeddings."""
+        query = select(Content.id, Content.embedding).where(Content.embedding.is_not(None))
+        ids: List[int] = []
+        vectors: List[np.ndarray] = []
+        for content_id, blob in self.db.execute(query.execution_options(yield_per=batch_size)):
+            vector = decode_vector(blob)
+            if len(vector) == index.dim:
+                ids.append(content_id)
+                vectors.append(vector)
+            if len(ids) >= batch_size:
+                index.upsert(ids, np.stack(vectors))
+                ids, vectors = [], []
+        if ids:
+            index.upsert(ids, np.stack(vectors))
+        if len(index) >= index.ivf_threshold:
+            index.train()
+        index.dirty = True
+
+    def index_fingerprint(self) -> IndexFingerprint:
+        count, max_id, max_updated_at = self.db.execute(
+            select(func.count(Content.id), func.max(Content.id), func.max(Content.updated_at))
+            .where(Content.embedding.is_not(None))
+        ).one()
+        return IndexFingerprint(count, max_id, max_updated_at)
+
+    def sync_index(self, index: VectorIndex, batch_size: int = 5000) -> None:
+        """Bring ``index`` up to date with rows written since ``index.synced_through``.
+
+        Removes titles that are gone, loads titles the index lacks and
+        reloads titles edited since; ``synced_through`` advances to the
+        newest edit seen.
+        """
+        stored = set(self.db.scalars(select(Content.id).where(Content.embedding.is_not(None))))
+        indexed = set(index.ids())
+        if indexed - stored:
+            index.remove(indexed - stored)
+
+        rows = select(Content.id, Content.embedding, Content.updated_at).where(Content.embedding.is_not(None))
+        queries = []
+        if index.synced_through is not None:
+            queries.append(rows.where(Content.updated_at >= index.synced_through))
+        missing = sorted(stored - indexed)
+        queries += [rows.where(Content.id.in_(missing[i:i + batch_size])) for i in range(0, len(missing), batch_size)]
+        for query in queries:
+            ids: List[int] = []
+            vectors: List[np.ndarray] = []
+            for content_id, blob, updated_at in self.db.execute(query):
+                vector = decode_vector(blob)
+                if len(vector) == index.dim:
+                    ids.append(content_id)
+                    vectors.append(vector)
+                if updated_at is not None and (index.synced_through is None or updated_at > index.synced_through):
+                    index.synced_through = updated_at
+            if ids:
+                index.upsert(ids, np.stack(vectors))
+
+    def search(self, query: str, k: int = 10) -> List[tuple]:
+        """Top ``k`` ``(content_id, score)`` pairs for free text."""
+        vector = self.embedder.embed_query(query)
+        if not vector.any():
+            return []
+        return get_vector_index(self.db).search(vector, k)
+
+    def similar(self, content_id: int, k: int = 10) -> Optional[List[tuple]]:
+        """Nearest neighbours of a stored title, or ``None`` if it has no embedding."""
+        index = get_vector_index(self.db)
+        vector = index.get(content_id)
+        if vector is None:
+            return None
+        return index.search(vector, k, exclude=[content_id])
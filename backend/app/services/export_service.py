@@ -0,0 +1,105 @@
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models.content import Content
+from ..models.watches import Watch
+from .pagination import timestamp_bound
+
+# Rows fetched per round trip. With yield_per the driver streams the result
+# (a server-side cursor on PostgreSQL), so memory is bounded by one batch.
+EXPORT_BATCH = 1000
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Embeddings are derived data and binary; everything else is exported
+CONTENT_COLUMNS = [column for column in Content.__table__.columns if column.name != "embedding"]
+WATCH_COLUMNS = list(Watch.__table__.columns)
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _csv_cell(value: Any) -> Any:
+    # Lists and objects (genres, cast, ...) go out as JSON text
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+def ndjson_chunks(columns: List[str], batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """One JSON object per line, one chunk per batch."""
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, map(_plain, row))), separators=(",", ":")) + "\n"
+            for row in batch
+        ).encode()
+
+def csv_chunks(columns: List[str], batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """A header line followed by one chunk of rows per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([_csv_cell(_plain(value)) for value in row] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only: nothing matched
+        yield buffer.getvalue().encode()
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream incrementally into a single gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+class ExportService:
+    """Stream whole tables out as NDJSON or CSV without loading them."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _batches(self, table, columns, updated_since: Optional[datetime]) -> Iterator[List[tuple]]:
+        query = select(*columns).order_by(table.c.id)
+        if updated_since is not None:
+            bound = timestamp_bound(self.db.get_bind().dialect.name, table.c.updated_at, updated_since)
+            query = query.where(table.c.updated_at >= bound)
+        result = self.db.execute(query.execution_options(yield_per=EXPORT_BATCH))
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            result.close()
+
+    def export(self, table_name: str, format: str = "ndjson", updated_since: Optional[datetime] = None) -> Iterator[bytes]:
+        """Encoded chunks of every ``content`` or ``watches`` row, in id order.
+
+        ``updated_since`` limits the export to rows created or changed at or
+        after that time, for incremental syncs.
+        """
+        table, columns = {
+            "content": (Content.__table__, CONTENT_COLUMNS),
+            "watches": (Watch.__table__, WATCH_COLUMNS),
+        }[table_name]
+        names = [column.name for column in columns]
+        batches = self._batches(table, columns, updated_since)
+        if format == "csv":
+            return csv_chunks(names, batches)
+        return ndjson_chunks(names, batches)
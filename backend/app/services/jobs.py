@@ -0,0 +1,461 @@
+import asyncio
+import heapq
+import json
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from ..config import settings
+from ..instrumentation import REGISTRY, Counter, Histogram
+from ..schemas.content import ContentUpdate
+from ..schemas.jobs import JobStatus
+from .ai_service import AIService
+from .content_service import ContentService
+from .tmdb_client import TMDBNotFound
+from .tmdb_service import TMDBService
+
+logger = logging.getLogger(__name__)
+
+# Work that does not have to finish before a response goes out (TMDB
+# enrichment, tag generation) is enqueued as a job: a JSON record with a kind,
+# a payload and a status that ``GET /jobs/{id}`` reports. Worker tasks on the
+# event loop claim jobs, run the handler registered for the kind and retry
+# failures with exponential backoff (``job_retry_delay`` doubling) up to
+# ``job_max_attempts``; a handler raises ``JobFailed`` to give up at once.
+#
+# A job enqueued with a ``dedup_key`` while another job holding that key is
+# still queued or running is not added; the caller gets the existing job.
+#
+# The memory backend keeps jobs in this process, so queued jobs are lost on
+# restart. The Redis backend (``job_backend="redis"``) shares the queue
+# between processes and survives restarts; web workers can then enqueue only
+# (``job_workers=0``) and leave the work to ``python -m app.maintenance
+# process-jobs``. Its calls run in a worker thread so a slow Redis does not
+# stall the event loop. A claim moves the job to a processing list and takes
+# a lease of ``job_claim_timeout`` seconds; when the lease lapses (the worker
+# died) the job is requeued, so a job may run more than once.
+
+ACTIVE = (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+FINISHED = (JobStatus.SUCCEEDED.value, JobStatus.FAILED.value)
+
+JOB_ATTEMPTS = REGISTRY.register(Counter(
+    "job_attempts_total", "Background job attempts by kind and outcome (succeeded, retried, failed).", ("kind", "outcome")
+))
+JOB_DURATION = REGISTRY.register(Histogram(
+    "job_duration_seconds", "Run time of background job attempts.", ("kind",)
+))
+
+
+class JobFailed(Exception):
+    """Raised by a handler to fail its job without further retries."""
+
+
+HANDLERS: Dict[str, Callable[..., Awaitable[Any]]] = {}
+
+def job_handler(kind: str):
+    """Register ``fn(session_factory, **payload)`` as the handler for ``kind``."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+class MemoryJobBackend:
+    """Jobs, the ready queue and retry schedule in this process."""
+
+    def __init__(self, result_ttl: float = 86400):
+        self.result_ttl = result_ttl
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._ready: Deque[str] = deque()
+        self._delayed: List[Tuple[float, str]] = []
+        self._dedup: Dict[str, str] = {}
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+
+    async def add(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        key = job["dedup_key"]
+        if key:
+            existing = self.jobs.get(self._dedup.get(key, ""))
+            if existing is not None and existing["status"] in ACTIVE:
+                return existing
+            self._dedup[key] = job["id"]
+        self.jobs[job["id"]] = job
+        self._ready.append(job["id"])
+        self._expire()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        self.jobs[job["id"]] = job
+        if job["status"] in FINISHED:
+            self._finished[job["id"]] = time.monotonic()
+            if job["dedup_key"] and self._dedup.get(job["dedup_key"]) == job["id"]:
+                del self._dedup[job["dedup_key"]]
+
+    async def schedule(self, job_id: str, ready_at: float) -> None:
+        heapq.heappush(self._delayed, (ready_at, job_id))
+
+    async def claim(self, now: float) -> Optional[str]:
+        while self._delayed and self._delayed[0][0] <= now:
+            self._ready.append(heapq.heappop(self._delayed)[1])
+        return self._ready.popleft() if self._ready else None
+
+    async def release(self, job_id: str) -> None:
+        pass
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.result_ttl
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > cutoff:
+                break
+            del self._finished[job_id]
+            self.jobs.pop(job_id, None)
+
+
+class RedisJobBackend:
+    """Jobs as JSON strings, ready and processing lists and a retry sorted set in Redis."""
+
+    def __init__(self, client, result_ttl: float = 86400, claim_timeout: float = 600, prefix: str = "watchlist:jobs:"):
+        self.client = client
+        self.result_ttl = int(result_ttl)
+        self.claim_timeout = claim_timeout
+        self.prefix = prefix
+        self._next_reclaim = 0.0
+
+    @classmethod
+    def from_url(cls, url: str, result_ttl: float, claim_timeout: float) -> "RedisJobBackend":
+        import redis
+        return cls(redis.Redis.from_url(url), result_ttl, claim_timeout)
+
+    async def add(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._add, job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._save, job)
+
+    async def schedule(self, job_id: str, ready_at: float) -> None:
+        await asyncio.to_thread(self._schedule, job_id, ready_at)
+
+    async def claim(self, now: float) -> Optional[str]:
+        return await asyncio.to_thread(self._claim, now)
+
+    async def release(self, job_id: str) -> None:
+        await asyncio.to_thread(self._release, job_id)
+
+    def _add(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        key = job["dedup_key"]
+        if key:
+            dedup = f"{self.prefix}dedup:{key}"
+            # Expires in case the job holding the key is lost with its process
+            if not self.client.set(dedup, job["id"], ex=self.result_ttl, nx=True):
+                holder = self.client.get(dedup)
+                existing = self._get(holder.decode()) if holder else None
+                if existing is not None and existing["status"] in ACTIVE:
+                    return existing
+                self.client.set(dedup, job["id"], ex=self.result_ttl)
+        self.client.set(f"{self.prefix}job:{job['id']}", json.dumps(job))
+        self.client.lpush(f"{self.prefix}ready", job["id"])
+        return job
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(f"{self.prefix}job:{job_id}")
+        return json.loads(raw) if raw else None
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        finished = job["status"] in FINISHED
+        self.client.set(f"{self.prefix}job:{job['id']}", json.dumps(job), ex=self.result_ttl if finished else None)
+        if finished:
+            self._release(job["id"])
+            if job["dedup_key"]:
+                dedup = f"{self.prefix}dedup:{job['dedup_key']}"
+                holder = self.client.get(dedup)
+                if holder is not None and holder.decode() == job["id"]:
+                    self.client.delete(dedup)
+
+    def _schedule(self, job_id: str, ready_at: float) -> None:
+        self._release(job_id)
+        self.client.zadd(f"{self.prefix}delayed", {job_id: ready_at})
+
+    def _claim(self, now: float) -> Optional[str]:
+        delayed = f"{self.prefix}delayed"
+        for job_id in self.client.zrangebyscore(delayed, 0, now):
+            # Only the process whose ZREM removed the entry moves it
+            if self.client.zrem(delayed, job_id):
+                self.client.lpush(f"{self.prefix}ready", job_id)
+        if now >= self._next_reclaim:
+            self._next_reclaim = now + min(self.claim_timeout, 60)
+            self._reclaim()
+        job_id = self.client.lmove(f"{self.prefix}ready", f"{self.prefix}processing", "RIGHT", "LEFT")
+        if job_id is None:
+            return None
+        job_id = job_id.decode()
+        self.client.set(f"{self.prefix}claim:{job_id}", 1, ex=max(1, math.ceil(self.claim_timeout)))
+        return job_id
+
+    def _release(self, job_id: str) -> None:
+        """Drop a claimed job from the processing list once it is finished or rescheduled."""
+        self.client.lrem(f"{self.prefix}processing", 1, job_id)
+        self.client.delete(f"{self.prefix}claim:{job_id}")
+
+    def _reclaim(self) -> None:
+        """Requeue processing jobs whose claim lapsed, failing those out of attempts."""
+        processing = f"{self.prefix}processing"
+        for raw in self.client.lrange(processing, 0, -1):
+            job_id = raw.decode()
+            # Only the process whose LREM removed the entry requeues it
+            if self.client.get(f"{self.prefix}claim:{job_id}") is not None or not self.client.lrem(processing, 1, raw):
+                continue
+            job = self._get(job_id)
+            if job is None or job["status"] not in ACTIVE:
+                continue
+            if job["attempts"] >= job["max_attempts"]:
+                logger.error("Job %s (%s) lost its worker on its last attempt", job_id, job["kind"])
+                job.update(status=JobStatus.FAILED.value, error="Worker stopped while running the job")
+                self._save(job)
+                continue
+            logger.warning("Requeueing job %s (%s) after its worker stopped", job_id, job["kind"])
+            job["status"] = JobStatus.QUEUED.value
+            self.client.set(f"{self.prefix}job:{job_id}", json.dumps(job))
+            self.client.lpush(f"{self.prefix}ready", job_id)
+
+
+class JobQueue:
+    """Enqueues jobs and runs them on a pool of worker tasks."""
+
+    def __init__(
+        self,
+        backend,
+        session_factory: Callable,
+        workers: int = 4,
+        max_attempts: int = 3,
+        retry_delay: float = 2.0,
+        poll_interval: float = 1.0
+    ):
+        self.backend = backend
+        self.session_factory = session_factory
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._unfinished: Set[str] = set()
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], dedup_key: Optional[str] = None) -> Dict[str, Any]:
+        """Add a job and return its record (the existing one if ``dedup_key`` is taken)."""
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        now = datetime.now().isoformat()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "payload": payload,
+            "status": JobStatus.QUEUED.value,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "dedup_key": dedup_key,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        stored = await self.backend.add(job)
+        if stored["id"] == job["id"]:
+            self.start()
+            self._unfinished.add(job["id"])
+            self._idle.clear()
+            self._wakeup.set()
+        return stored
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.backend.get(job_id)
+
+    async def join(self) -> None:
+        """Wait until the jobs enqueued through this queue have finished here.
+
+        For tests and draining; with a shared backend, jobs another process
+        picks up are not seen finishing.
+        """
+        if self._unfinished:
+            await self._idle.wait()
+
+    async def _save(self, job: Dict[str, Any], **changes) -> None:
+        job.update(changes, updated_at=datetime.now().isoformat())
+        await self.backend.save(job)
+
+    def _finished(self, job: Dict[str, Any], outcome: str) -> None:
+        JOB_ATTEMPTS.inc(job["kind"], outcome)
+        if outcome != "retried" and job["id"] in self._unfinished:
+            self._unfinished.discard(job["id"])
+            if not self._unfinished:
+                self._idle.set()
+
+    async def run(self, job_id: str) -> None:
+        """Run one attempt of a claimed job and record the outcome."""
+        job = await self.backend.get(job_id)
+        if job is None or job["status"] != JobStatus.QUEUED.value:
+            await self.backend.release(job_id)
+            return
+        handler = HANDLERS.get(job["kind"])
+        if handler is None:
+            await self._save(job, status=JobStatus.FAILED.value, error=f"Unknown job kind: {job['kind']}")
+            self._finished(job, "failed")
+            return
+
+        await self._save(job, status=JobStatus.RUNNING.value, attempts=job["attempts"] + 1)
+        start = time.perf_counter()
+        try:
+            result = await handler(self.session_factory, **job["payload"])
+        except asyncio.CancelledError:
+            # Shutting down mid-job: hand it to the next worker to start
+            await self._save(job, status=JobStatus.QUEUED.value, attempts=job["attempts"] - 1)
+            await self.backend.schedule(job_id, 0)
+            raise
+        except JobFailed as exc:
+            await self._save(job, status=JobStatus.FAILED.value, error=str(exc))
+            self._finished(job, "failed")
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            if job["attempts"] < job["max_attempts"]:
+                delay = self.retry_delay * 2 ** (job["attempts"] - 1)
+                logger.warning("Job %s (%s) attempt %d failed, retrying in %.1fs: %s",
+                               job_id, job["kind"], job["attempts"], delay, error)
+                await self._save(job, status=JobStatus.QUEUED.value, error=error)
+                await self.backend.schedule(job_id, time.time() + delay)
+                if delay < self.poll_interval:
+                    asyncio.get_running_loop().call_later(delay, self._wakeup.set)
+                self._finished(job, "retried")
+            else:
+                logger.error("Job %s (%s) failed after %d attempts: %s", job_id, job["kind"], job["attempts"], error)
+                await self._save(job, status=JobStatus.FAILED.value, error=error)
+                self._finished(job, "failed")
+        else:
+            await self._save(job, status=JobStatus.SUCCEEDED.value, result=result, error=None)
+            self._finished(job, "succeeded")
+        finally:
+            JOB_DURATION.observe(time.perf_counter() - start, job["kind"])
+
+    async def _work(self) -> None:
+        while True:
+            self._wakeup.clear()
+            job_id = await self.backend.claim(time.time())
+            if job_id is None:
+                try:
+                    # Woken by enqueue and by retries coming due; the timeout
+                    # picks up jobs other processes put in a shared backend
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self.run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Running job %s failed", job_id)
+
+    def start(self) -> None:
+        """Start the worker tasks on the running loop (once)."""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._idle.set()
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; jobs they were running go back to the queue."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _store_tags(db, content_id: int) -> Optional[List[str]]:
+    tags = AIService(db).generate_content_tags(content_id)
+    if ContentService(db).update_content(content_id, ContentUpdate(ai_tags=tags)) is None:
+        return None
+    return tags
+
+@job_handler("enrich_content")
+async def enrich_content(session_factory: Callable, content_id: int, tmdb_id: int, content_type: str) -> Dict[str, Any]:
+    """Fill content from TMDB details and credits, then re-tag it (the update re-embeds it).
+
+    Only a failure to reach TMDB is retried; a title TMDB does not have, or
+    no API key to ask with, fails the job at once.
+    """
+    service = TMDBService()
+    try:
+        details = await service.get_content_details(tmdb_id, content_type)
+    except TMDBNotFound:
+        raise JobFailed(f"TMDB has no {content_type} {tmdb_id}")
+    if details is None:
+        if not service.client.api_key:
+            raise JobFailed(f"No TMDB details for {content_type} {tmdb_id}: no TMDB API key is configured")
+        raise RuntimeError(f"No TMDB details for {content_type} {tmdb_id}")
+    async with session_factory() as session:
+        content = await session.run_sync(lambda db: ContentService(db).apply_tmdb_data(content_id, details))
+        if content is None:
+            raise JobFailed(f"Content {content_id} no longer exists")
+        tags = await session.run_sync(lambda db: _store_tags(db, content_id))
+    return {"content_id": content_id, "ai_tags": tags}
+
+@job_handler("generate_tags")
+async def generate_tags(session_factory: Callable, content_id: int) -> Dict[str, Any]:
+    async with session_factory() as session:
+        tags = await session.run_sync(lambda db: _store_tags(db, content_id))
+    if tags is None:
+        raise JobFailed(f"Content {content_id} no longer exists")
+    return {"content_id": content_id, "ai_tags": tags}
+
+
+_queue: Optional[JobQueue] = None
+
+def _create_queue(session_factory: Callable) -> JobQueue:
+    backend = None
+    if settings.job_backend == "redis":
+        try:
+            backend = RedisJobBackend.from_url(settings.redis_url, settings.job_result_ttl, settings.job_claim_timeout)
+        except ImportError:
+            backend = None
+    if backend is None:
+        backend = MemoryJobBackend(settings.job_result_ttl)
+    return JobQueue(backend, session_factory, settings.job_workers, settings.job_max_attempts, settings.job_retry_delay)
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide queue for the configured backend.
+
+    ``job_backend="redis"`` falls back to the in-process backend when the
+    ``redis`` package is not installed.
+    """
+    global _queue
+    if _queue is None:
+        from ..database import AsyncSessionLocal
+        _queue = _create_queue(AsyncSessionLocal)
+    return _queue
+
+def reset_job_queue(session_factory: Optional[Callable] = None) -> None:
+    """Drop the process-wide queue (without stopping its workers).
+
+    With ``session_factory``, the next queue's jobs use it instead of the
+    application's sessions.
+    """
+    global _queue
+    _queue = None
+    if session_factory is not None:
+        _queue = _create_queue(session_factory)
+
+async def close_job_queue() -> None:
+    if _queue is not None:
+        await _queue.stop()
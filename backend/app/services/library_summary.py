@@ -0,0 +1,54 @@
+from typing import Any, Dict
+
+from sqlalchemy import Integer, case, func, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from ..models.content import Content
+from ..models.taxonomy import Genre, ContentGenre
+
+# Library-wide counts for dashboards and the AI helpers, in one round trip.
+# The first branch groups content by (type, status) with favorites counted
+# conditionally: at most a handful of rows from which every total, per-type,
+# per-status and favorite count is derived. The second branch is the genre
+# histogram from the indexed association table. Both are combined with
+# UNION ALL and tagged by ``kind``.
+
+def _summary_query():
+    library = select(
+        literal("library").label("kind"),
+        Content.content_type.label("key"),
+        Content.status.label("status"),
+        func.count(Content.id).label("count"),
+        func.sum(case((Content.is_favorite.is_(True), 1), else_=0)).label("favorites")
+    ).group_by(Content.content_type, Content.status)
+    genres = select(
+        literal("genre"),
+        Genre.name,
+        null(),
+        func.count(ContentGenre.content_id),
+        literal(0, Integer)
+    ).join(Genre, Genre.id == ContentGenre.genre_id).group_by(Genre.id, Genre.name)
+    return union_all(library, genres)
+
+def library_summary(db: Session) -> Dict[str, Any]:
+    """Totals, per-type, per-status, favorites and genre counts for the whole library.
+
+    ``genres`` maps genre name to title count, most common first.
+    """
+    summary = {"total": 0, "favorites": 0, "by_type": {}, "by_status": {}, "genres": {}}
+    genres = []
+    for kind, key, status, count, favorites in db.execute(_summary_query()):
+        if kind == "genre":
+            genres.append((key, count))
+            continue
+        summary["total"] += count
+        summary["favorites"] += favorites or 0
+        summary["by_type"][key] = summary["by_type"].get(key, 0) + count
+        summary["by_status"][status] = summary["by_status"].get(status, 0) + count
+    summary["genres"] = dict(sorted(genres, key=lambda item: (-item[1], item[0])))
+    return summary
+
+def completion_rate(summary: Dict[str, Any]) -> float:
+    """Percentage of the library marked completed."""
+    total = summary["total"]
+    return round(summary["by_status"].get("completed", 0) / total * 100, 1) if total else 0
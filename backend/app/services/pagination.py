@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import desc, literal, tuple_
+
+# Keyset ("cursor") pagination. Listings are ordered newest first on a
+# (timestamp, id) pair backed by a composite index; a cursor is the pair of
+# the last row on the previous page, and the next page is the rows strictly
+# after it. Every page is an index range scan, so page 500 costs the same as
+# page 1, and rows inserted meanwhile cannot shift later pages.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not produced by ``encode_cursor``."""
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Opaque, URL-safe cursor for the position after ``(timestamp, row_id)``."""
+    raw = json.dumps([timestamp.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+def timestamp_bound(dialect: str, column, value: datetime):
+    """Bind ``value`` for comparison against the timestamp ``column``.
+    
+    SQLite compares datetimes as text. Server-generated timestamps
+    (CURRENT_TIMESTAMP) are stored without fractional seconds while
+    SQLAlchemy binds "HH:MM:SS.ffffff", so match the stored form or rows
+    sharing a second would compare as earlier than the bound.
+    """
+    if dialect == "sqlite" and column.server_default is not None and value.microsecond == 0:
+        return literal(value.strftime("%Y-%m-%d %H:%M:%S"))
+    return value
+
+def keyset_page(query, timestamp_column, id_column, limit: int, skip: int = 0, cursor: Optional[str] = None):
+    """Order ``query`` newest first and apply either the cursor or skip/limit."""
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        bound = timestamp_bound(query.session.bind.dialect.name, timestamp_column, timestamp)
+        query = query.filter(tuple_(timestamp_column, id_column) < tuple_(bound, row_id))
+    query = query.order_by(desc(timestamp_column), desc(id_column))
+    if skip and not cursor:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def next_cursor(rows: Sequence[Any], limit: int, timestamp_field: str) -> Optional[str]:
+    """Cursor for the page after ``rows``, or ``None`` if this was the last page."""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    get = last.get if isinstance(last, dict) else lambda field: getattr(last, field)
+    timestamp = get(timestamp_field)
+    return encode_cursor(timestamp, get("id")) if timestamp is not None else None
+
+def cursor_header(rows: Sequence[Any], limit: int, timestamp_field: str) -> Dict[str, str]:
+    """``X-Next-Cursor`` response header for ``rows``, empty on the last page."""
+    cursor = next_cursor(rows, limit, timestamp_field)
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
@@ -0,0 +1,328 @@
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+
+from ..models.content import Content
+
+# Content-based recommender over the local library.
+#
+# Each title's categorical features -- genres (one column per TMDB genre,
+# hashed overflow buckets for anything else) and hashed cast/director -- are
+# stored as a fixed-width sparse row (ELLPACK: up to MAX_FEATURES column/value
+# pairs) alongside dense rating, runtime and type arrays. Fixed width means
+# rows are inserted or replaced in place as content changes, and the user
+# profile (an engagement-weighted sum of rows) is maintained incrementally.
+# Scoring every candidate is a single gather-and-sum over the sparse rows.
+
+# TMDB's movie and TV genre names get dedicated columns so they never collide
+KNOWN_GENRES = (
+    "Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama",
+    "Family", "Fantasy", "History", "Horror", "Music", "Mystery", "Romance",
+    "Science Fiction", "TV Movie", "Thriller", "War", "Western", "Action & Adventure",
+    "Kids", "News", "Reality", "Sci-Fi & Fantasy", "Soap", "Talk", "War & Politics",
+)
+_GENRE_COLUMNS = {genre.lower(): column for column, genre in enumerate(KNOWN_GENRES)}
+GENRE_OVERFLOW_BUCKETS = 32
+PEOPLE_BUCKETS = 4096
+PEOPLE_OFFSET = len(KNOWN_GENRES) + GENRE_OVERFLOW_BUCKETS
+WIDTH = PEOPLE_OFFSET + PEOPLE_BUCKETS
+MAX_FEATURES = 12  # 5 genres + 6 top-billed cast + director
+
+FEATURE_FIELDS = (
+    "id", "title", "content_type", "genres", "cast", "director", "tmdb_rating",
+    "runtime", "status", "is_favorite", "personal_rating",
+)
+
+# Statuses the user has already engaged with; excluded when exclude_watched
+WATCHED_STATUSES = ("completed", "watching", "dropped")
+
+MOOD_GENRES = {
+    "happy": ["Comedy", "Family", "Animation", "Music"],
+    "sad": ["Drama", "Romance"],
+    "excited": ["Action", "Adventure", "Thriller", "Science Fiction"],
+    "relaxed": ["Documentary", "Animation", "Family"],
+    "scared": ["Horror", "Thriller", "Mystery"],
+    "thoughtful": ["Drama", "History", "Documentary", "Science Fiction"],
+}
+
+# Score = profile similarity + RATING_PRIOR * rating/10 - RUNTIME_PENALTY * runtime gap
+RATING_PRIOR = 0.15
+RUNTIME_PENALTY = 0.1
+
+def _bucket(feature: str, buckets: int) -> int:
+    digest = hashlib.blake2b(feature.lower().encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % buckets
+
+def genre_column(genre: str) -> int:
+    column = _GENRE_COLUMNS.get(genre.lower())
+    if column is None:
+        column = len(KNOWN_GENRES) + _bucket(genre, GENRE_OVERFLOW_BUCKETS)
+    return column
+
+def person_column(name: str) -> int:
+    return PEOPLE_OFFSET + _bucket(name, PEOPLE_BUCKETS)
+
+def feature_row(fields: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sparse categorical features for one title as padded (columns, values) arrays."""
+    features: Dict[int, float] = {}
+    for genre in (fields.get("genres") or [])[:5]:
+        features[genre_column(genre)] = 1.0
+    for name in (fields.get("cast") or [])[:6]:
+        column = person_column(name)
+        features[column] = features.get(column, 0.0) + 0.5
+    if fields.get("director"):
+        column = person_column(fields["director"])
+        features[column] = features.get(column, 0.0) + 1.0
+
+    columns = np.zeros(MAX_FEATURES, dtype=np.int32)
+    values = np.zeros(MAX_FEATURES, dtype=np.float32)
+    columns[:len(features)] = list(features)
+    values[:len(features)] = list(features.values())
+    return columns, values
+
+def engagement_weight(fields: Dict[str, Any]) -> float:
+    """How strongly a title should pull the profile toward (or away from) it."""
+    weight = {"completed": 1.0, "watching": 0.5, "dropped": -0.5}.get(fields.get("status"), 0.0)
+    if fields.get("is_favorite"):
+        weight += 1.5
+    if fields.get("personal_rating") is not None:
+        # 1..10 mapped to -1..+1 around a neutral 5.5
+        weight += (fields["personal_rating"] - 5.5) / 4.5
+    return weight
+
+class ContentFeatures:
+    """In-memory feature matrix for the library, updated incrementally."""
+
+    _ARRAYS = (
+        ("_columns", np.int32, MAX_FEATURES),
+        ("_values", np.float32, MAX_FEATURES),
+        ("_inverse_norms", np.float32, None),
+        ("_rating", np.float32, None),
+        ("_runtime", np.float32, None),
+        ("_weights", np.float32, None),
+        ("_watched", bool, None),
+        ("_movie", bool, None),
+        ("_alive", bool, None),
+        ("_ids", np.int64, None),
+    )
+
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.RLock()
+        for name, dtype, width in self._ARRAYS:
+            setattr(self, name, np.zeros((capacity, width) if width else capacity, dtype=dtype))
+        self._titles: List[Optional[str]] = [None] * capacity
+        self._genres: List[List[str]] = [[] for _ in range(capacity)]
+        self._positions: Dict[int, int] = {}
+        self._size = 0
+        # Running sums over engaged titles: profile vector and runtime preference
+        self._profile_sum = np.zeros(WIDTH, dtype=np.float64)
+        self._runtime_sum = 0.0
+        self._runtime_weight = 0.0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for fields in rows:
+                position = self._positions.get(fields["id"])
+                if position is None:
+                    position = self._append(fields["id"])
+                else:
+                    self._retract(position)
+
+                columns, values = feature_row(fields)
+                self._columns[position] = columns
+                self._values[position] = values
+                self._inverse_norms[position] = 1.0 / max(float(np.linalg.norm(values)), 1e-6)
+                self._rating[position] = (fields.get("tmdb_rating") or 0) / 10
+                self._runtime[position] = min(fields.get("runtime") or 0, 240) / 240
+                self._weights[position] = engagement_weight(fields)
+                self._watched[position] = fields.get("status") in WATCHED_STATUSES
+                self._movie[position] = fields.get("content_type") == "movie"
+                self._alive[position] = True
+                self._titles[position] = fields.get("title")
+                self._genres[position] = list(fields.get("genres") or [])
+                self._contribute(position, 1.0)
+
+    def remove(self, content_ids: Iterable[int]) -> None:
+        with self._lock:
+            for content_id in content_ids:
+                position = self._positions.pop(content_id, None)
+                if position is not None:
+                    self._retract(position)
+                    self._alive[position] = False
+                    self._weights[position] = 0.0
+
+    def _contribute(self, position: int, sign: float) -> None:
+        """Add (or with ``sign=-1`` remove) a row's share of the running profile."""
+        weight = float(self._weights[position])
+        if weight == 0:
+            return
+        np.add.at(self._profile_sum, self._columns[position], sign * weight * self._values[position])
+        # Only titles the user liked shape the preferred runtime
+        if weight > 0 and self._runtime[position] > 0:
+            self._runtime_sum += sign * weight * float(self._runtime[position])
+            self._runtime_weight += sign * weight
+
+    def _retract(self, position: int) -> None:
+        self._contribute(position, -1.0)
+
+    def _append(self, content_id: int) -> int:
+        if self._size == len(self._ids):
+            capacity = len(self._ids) * 2
+            for name, _, _ in self._ARRAYS:
+                old = getattr(self, name)
+                new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+                new[:len(old)] = old
+                setattr(self, name, new)
+            self._titles.extend([None] * (capacity - len(self._titles)))
+            self._genres.extend([] for _ in range(capacity - len(self._genres)))
+        position = self._size
+        self._size += 1
+        self._ids[position] = content_id
+        self._positions[content_id] = position
+        return position
+
+    def profile(self, genres: Sequence[str] = (), people: Sequence[str] = (), weight: float = 1.0) -> np.ndarray:
+        """User profile: engagement-weighted sum of rows plus explicit preferences."""
+        vector = self._profile_sum.astype(np.float32)
+        for genre in genres:
+            vector[genre_column(genre)] += weight
+        for name in people:
+            vector[person_column(name)] += weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def recommend(
+        self,
+        profile: np.ndarray,
+        limit: int = 10,
+        exclude_watched: bool = True,
+        content_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Top ``limit`` candidates as dicts with ``content_id``, ``score`` and ``reason``."""
+        with self._lock:
+            n = self._size
+            if n == 0:
+                return []
+            similarity = np.einsum(
+                "ij,ij->i", self._values[:n], profile[self._columns[:n]]
+            ) * self._inverse_norms[:n]
+            scores = similarity + RATING_PRIOR * self._rating[:n]
+            if self._runtime_weight > 1e-6:
+                preferred_runtime = self._runtime_sum / self._runtime_weight
+                scores -= RUNTIME_PENALTY * np.abs(self._runtime[:n] - preferred_runtime)
+
+            candidates = self._alive[:n].copy()
+            if exclude_watched:
+                candidates &= ~self._watched[:n]
+            if content_type:
+                candidates &= self._movie[:n] == (content_type == "movie")
+            scores[~candidates] = -np.inf
+
+            k = min(limit, int(candidates.sum()))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+
+            best = max(float(scores[top[0]]), 1e-6)
+            return [
+                {
+                    "content_id": int(self._ids[i]),
+                    "title": self._titles[i],
+                    "score": float(scores[i]),
+                    "confidence": round(min(max(float(scores[i]) / best, 0.0), 1.0), 2),
+                    "reason": self._reason(self._genres[i], profile),
+                }
+                for i in top
+            ]
+
+    @staticmethod
+    def _reason(genres: Sequence[str], profile: np.ndarray) -> str:
+        """Explain a pick by the genres it shares with the profile, strongest first."""
+        affinity = {genre: profile[genre_column(genre)] for genre in genres}
+        shared = sorted((g for g in genres if affinity[g] > 0), key=lambda g: -affinity[g])
+        if shared:
+            return f"Matches genres you enjoy: {', '.join(shared[:3])}"
+        return "Highly rated title from your watchlist"
+
+_features: Optional[ContentFeatures] = None
+_features_lock = threading.Lock()
+# While a cold build runs there is no matrix for writes to update, so they are
+# queued as ("upsert", rows) or ("remove", ids) and replayed when it is published
+_features_builds = 0
+_pending_feature_writes: List[Tuple[str, List[Any]]] = []
+
+def _build_content_features(db: Session) -> ContentFeatures:
+    features = ContentFeatures()
+    columns = [getattr(Content, field) for field in FEATURE_FIELDS]
+    query = select(*columns).execution_options(yield_per=5000)
+    batch = []
+    for row in db.execute(query).mappings():
+        batch.append(row)
+        if len(batch) == 5000:
+            features.upsert(batch)
+            batch = []
+    features.upsert(batch)
+    return features
+
+def _apply_feature_write(features: ContentFeatures, action: str, items: List[Any]) -> None:
+    if action == "upsert":
+        features.upsert(items)
+    else:
+        features.remove(items)
+
+def get_content_features(db: Session) -> ContentFeatures:
+    """Return the process-wide feature matrix, building it on first use."""
+    global _features, _features_builds
+    if _features is None:
+        # Built outside the lock, as in get_vector_index
+        with _features_lock:
+            _features_builds += 1
+        features = None
+        try:
+            features = _build_content_features(db)
+        finally:
+            with _features_lock:
+                _features_builds -= 1
+                if features is not None and _features is None:
+                    for action, items in _pending_feature_writes:
+                        _apply_feature_write(features, action, items)
+                    _pending_feature_writes.clear()
+                    _features = features
+                if not _features_builds:
+                    _pending_feature_writes.clear()
+    return _features
+
+def _record_feature_write(action: str, items: List[Any]) -> None:
+    with _features_lock:
+        features = _features
+        if features is None:
+            if _features_builds:
+                _pending_feature_writes.append((action, items))
+            return
+    _apply_feature_write(features, action, items)
+
+def update_content_features(rows: Iterable[Any]) -> None:
+    """Refresh feature rows for changed content (Content objects or mappings)."""
+    if _features is None and not _features_builds:
+        return
+    _record_feature_write("upsert", [
+        row if isinstance(row, dict) else {field: getattr(row, field) for field in FEATURE_FIELDS}
+        for row in rows
+    ])
+
+def remove_content_features(content_ids: Iterable[int]) -> None:
+    if _features is not None or _features_builds:
+        _record_feature_write("remove", list(content_ids))
+
+def reset_content_features() -> None:
+    """Drop the in-memory matrix so the next use rebuilds it."""
+    global _features
+    _features = None
@@ -0,0 +1,168 @@
+from collections import defaultdict
+from datetime import date
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, and_, cast, delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Dict, Iterable, List, Tuple
+from .. import cache
+from ..models.rollups import (
+    ROLLUP_MODELS, ContentWatchStats, DailyWatchStats, MonthlyContentStats, MonthlyGenreStats, MonthlyPlatformStats
+)
+from ..models.taxonomy import ContentGenre
+from ..models.watches import Watch
+
+UPSERT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+def month_of(day: date) -> date:
+    return day.replace(day=1)
+
+class RollupService:
+    """Keeps the watch stats rollup tables in step with the watches table."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.bind.dialect.name
+
+    def apply(self, watches: Iterable[Watch], sign: int = 1) -> None:
+        """Add (``sign=1``) or subtract (``sign=-1``) watches from every rollup.
+
+        Does not commit.
+        """
+        watches = list(watches)
+        if not watches:
+            return
+
+        daily: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0])
+        per_title: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0])
+        per_content: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0])
+        per_platform: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0])
+        for watch in watches:
+            day = watch.watched_at.date()
+            minutes = watch.duration_watched or 0
+            targets = [daily[(day,)], per_title[(watch.content_id,)], per_content[(month_of(day), watch.content_id)]]
+            if watch.platform_id is not None:
+                targets.append(per_platform[(month_of(day), watch.platform_id)])
+            for totals in targets:
+                totals[0] += sign
+                totals[1] += sign * minutes
+
+        # Genre rollups follow from the per-title deltas
+        genre_ids = defaultdict(list)
+        content_ids = {content_id for _, content_id in per_content}
+        for content_id, genre_id in self.db.query(ContentGenre.content_id, ContentGenre.genre_id).filter(
+            ContentGenre.content_id.in_(content_ids)
+        ):
+            genre_ids[content_id].append(genre_id)
+        per_genre: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0])
+        for (month, content_id), (count, minutes) in per_content.items():
+            for genre_id in genre_ids[content_id]:
+                per_genre[(month, genre_id)][0] += count
+                per_genre[(month, genre_id)][1] += minutes
+
+        for model, deltas in (
+            (DailyWatchStats, daily),
+            (ContentWatchStats, per_title),
+            (MonthlyContentStats, per_content),
+            (MonthlyPlatformStats, per_platform),
+            (MonthlyGenreStats, per_genre),
+        ):
+            self._increment(model, deltas)
+            if sign < 0:
+                self._delete_emptied(model, list(deltas))
+
+    def _increment(self, model, deltas: Dict[Tuple, List[int]]) -> None:
+        """Add ``(watches, minutes)`` deltas to rows keyed by primary key, creating rows as needed."""
+        if not deltas:
+            return
+        table = model.__table__
+        keys = [column.name for column in table.primary_key]
+        rows = [
+            dict(zip(keys, key), watches=watches, minutes=minutes)
+            for key, (watches, minutes) in deltas.items()
+        ]
+
+        upsert = UPSERT_INSERTS.get(self.dialect)
+        if upsert is not None:
+            statement = upsert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=keys,
+                set_={
+                    "watches": table.c.watches + statement.excluded.watches,
+                    "minutes": table.c.minutes + statement.excluded.minutes,
+                }
+            )
+            self.db.execute(statement, rows)
+            return
+
+        for row in rows:
+            match = and_(*(table.c[key] == row[key] for key in keys))
+            result = self.db.execute(update(table).where(match).values(
+                watches=table.c.watches + row["watches"],
+                minutes=table.c.minutes + row["minutes"]
+            ))
+            if result.rowcount == 0:
+                self.db.execute(insert(table).values(**row))
+
+    def _delete_emptied(self, model, keys: List[Tuple], batch_size: int = 500) -> None:
+        """Delete the rows among ``keys`` (primary keys) whose watch count reached zero."""
+        table = model.__table__
+        primary_key = tuple_(*table.primary_key.columns)
+        for start in range(0, len(keys), batch_size):
+            self.db.execute(delete(table).where(
+                primary_key.in_(keys[start:start + batch_size]), table.c.watches <= 0
+            ))
+
+    def _day(self, column):
+        if self.dialect == "postgresql":
+            return cast(func.date_trunc("day", column), Date)
+        # SQLite keeps datetimes as ISO text and dates as YYYY-MM-DD
+        return func.substr(column, 1, 10)
+
+    def _month(self, column):
+        if self.dialect == "postgresql":
+            return cast(func.date_trunc("month", column), Date)
+        return func.substr(column, 1, 7).concat(literal("-01"))
+
+    def rebuild(self) -> int:
+        """Recompute every rollup from the watches table in SQL; returns the watch count."""
+        for model in ROLLUP_MODELS:
+            self.db.execute(delete(model))
+
+        minutes = func.coalesce(func.sum(Watch.duration_watched), 0)
+        day = self._day(Watch.watched_at)
+        self.db.execute(insert(DailyWatchStats).from_select(
+            ["day", "watches", "minutes"],
+            select(day, func.count(Watch.id), minutes).group_by(day)
+        ))
+
+        self.db.execute(insert(ContentWatchStats).from_select(
+            ["content_id", "watches", "minutes"],
+            select(Watch.content_id, func.count(Watch.id), minutes).group_by(Watch.content_id)
+        ))
+
+        month = self._month(Watch.watched_at)
+        self.db.execute(insert(MonthlyContentStats).from_select(
+            ["month", "content_id", "watches", "minutes"],
+            select(month, Watch.content_id, func.count(Watch.id), minutes).group_by(month, Watch.content_id)
+        ))
+        self.db.execute(insert(MonthlyPlatformStats).from_select(
+            ["month", "platform_id", "watches", "minutes"],
+            select(month, Watch.platform_id, func.count(Watch.id), minutes).where(
+                Watch.platform_id.is_not(None)
+            ).group_by(month, Watch.platform_id)
+        ))
+        # Genres from the (much smaller) per-title rollup
+        self.db.execute(insert(MonthlyGenreStats).from_select(
+            ["month", "genre_id", "watches", "minutes"],
+            select(
+                MonthlyContentStats.month, ContentGenre.genre_id,
+                func.sum(MonthlyContentStats.watches), func.sum(MonthlyContentStats.minutes)
+            ).join(
+                ContentGenre, ContentGenre.content_id == MonthlyContentStats.content_id
+            ).group_by(MonthlyContentStats.month, ContentGenre.genre_id)
+        ))
+
+        self.db.commit()
+        cache.invalidate(cache.WATCHES)
+        return self.db.query(func.coalesce(func.sum(DailyWatchStats.watches), 0)).scalar()
@@ -0,0 +1,100 @@
+import re
+from sqlalchemy.orm import Session
+from sqlalchemy import desc, func, literal_column, select, table, column, text
+from typing import List, Optional, Dict, Any
+from ..models.content import Content
+from ..models.search import FTS_TABLE, SEARCH_DOCUMENT_PG
+
+# Column weights for bm25(), in FTS_COLUMNS order: title, overview, cast, director, genres
+BM25_WEIGHTS = (10.0, 1.0, 3.0, 3.0, 5.0)
+SNIPPET_TOKENS = 12
+
+class SearchService:
+    """Ranked full-text search over the local library."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.bind.dialect.name
+
+    def search(
+        self,
+        query: str,
+        content_type: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Search title, overview, cast, director and genres.
+
+        Returns dicts with ``content``, ``rank`` (higher is better) and a
+        highlighted ``snippet``, best match first.
+        """
+        if self.dialect == "sqlite":
+            statement = self._sqlite_statement(query)
+        elif self.dialect == "postgresql":
+            statement = self._postgres_statement(query)
+        else:
+            statement = self._fallback_statement(query)
+
+        if statement is None:
+            return []
+        if content_type:
+            statement = statement.where(Content.content_type == content_type)
+
+        rows = self.db.execute(statement.limit(limit)).all()
+        return [{"content": content, "rank": rank, "snippet": snippet} for content, rank, snippet in rows]
+
+    def _sqlite_statement(self, query: str):
+        match = self.fts5_query(query)
+        if not match:
+            return None
+
+        fts = table(FTS_TABLE, column("rowid"))
+        weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+        # bm25() is lower-is-better, so negate it for a conventional score
+        rank = literal_column(f"-bm25({FTS_TABLE}, {weights})").label("rank")
+        snippet = literal_column(
+            f"snippet({FTS_TABLE}, -1, '<mark>', '</mark>', '…', {SNIPPET_TOKENS})"
+        ).label("snippet")
+
+        return select(Content, rank, snippet).join(
+            fts, fts.c.rowid == Content.id
+        ).where(
+            text(f"{FTS_TABLE} MATCH :match").bindparams(match=match)
+        ).order_by(desc("rank"))
+
+    def _postgres_statement(self, query: str):
+        if not query.strip():
+            return None
+
+        tsquery = func.websearch_to_tsquery("english", query)
+        document = literal_column(f"({SEARCH_DOCUMENT_PG})")
+        rank = func.ts_rank_cd(document, tsquery).label("rank")
+        snippet = func.ts_headline(
+            "english",
+            func.coalesce(Content.overview, Content.title),
+            tsquery,
+            f"StartSel=<mark>, StopSel=</mark>, MaxWords={SNIPPET_TOKENS}, MinWords=3"
+        ).label("snippet")
+
+        return select(Content, rank, snippet).where(
+            document.op("@@")(tsquery)
+        ).order_by(desc("rank"))
+
+    def _fallback_statement(self, query: str):
+        if not query.strip():
+            return None
+
+        return select(
+            Content,
+            func.coalesce(Content.tmdb_rating, 0).label("rank"),
+            Content.title.label("snippet")
+        ).where(Content.title.ilike(f"%{query}%")).order_by(desc(Content.tmdb_rating))
+
+    @staticmethod
+    def fts5_query(query: str) -> str:
+        """Turn free text into an FTS5 query: every word must match, last word as a prefix."""
+        words = re.findall(r"\w+", query)
+        if not words:
+            return ""
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += "*"
+        return " ".join(terms)
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from ..config import settings
+from ..schemas.watches import WatchHeartbeat
+from .watch_service import WatchService
+
+logger = logging.getLogger(__name__)
+
+# Players send a heartbeat every few seconds for as long as a session is open.
+# Heartbeats only replace the session's entry in an in-memory dict; every
+# ``session_flush_interval`` seconds the latest heartbeat of each session is
+# written back with one batched UPDATE, so the database sees at most one row
+# write per open session per interval however often players report. The same
+# tick closes sessions whose last written heartbeat is older than
+# ``session_idle_timeout`` (players that crashed or lost the network).
+#
+# With several worker processes each one tracks the heartbeats it received;
+# the idle timeout must be well above the flush interval so a session is not
+# reaped while its latest heartbeat is still waiting in another worker.
+
+class HeartbeatTracker:
+    """Coalesces session heartbeats and writes them back periodically."""
+
+    def __init__(self, session_factory: Callable, flush_interval: float = 5.0, idle_timeout: float = 300.0):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self._latest: Dict[int, WatchHeartbeat] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def record(self, session_id: int, heartbeat: WatchHeartbeat) -> None:
+        """Keep ``heartbeat`` as the session's latest; counters it omits carry over."""
+        previous = self._latest.get(session_id)
+        if previous is not None and (heartbeat.paused_duration is None or heartbeat.interruptions is None):
+            heartbeat = heartbeat.model_copy(update={
+                "paused_duration": previous.paused_duration if heartbeat.paused_duration is None else heartbeat.paused_duration,
+                "interruptions": previous.interruptions if heartbeat.interruptions is None else heartbeat.interruptions,
+            })
+        self._latest[session_id] = heartbeat
+
+    def pop(self, session_id: int) -> Optional[WatchHeartbeat]:
+        """Take the session's unwritten heartbeat, e.g. when the session ends."""
+        return self._latest.pop(session_id, None)
+
+    async def flush(self) -> int:
+        """Write every pending heartbeat; returns the number of sessions updated."""
+        pending, self._latest = self._latest, {}
+        if not pending:
+            return 0
+        try:
+            async with self.session_factory() as session:
+                return await session.run_sync(lambda db: WatchService(db).apply_heartbeats(pending))
+        except Exception:
+            # Newer heartbeats that arrived meanwhile win
+            self._latest = {**pending, **self._latest}
+            raise
+
+    async def close_idle(self, now: Optional[datetime] = None) -> int:
+        """End sessions idle for longer than ``idle_timeout``; returns how many."""
+        idle_since = (now or datetime.now()) - timedelta(seconds=self.idle_timeout)
+        async with self.session_factory() as session:
+            return await session.run_sync(lambda db: WatchService(db).close_idle_sessions(idle_since))
+
+    async def tick(self) -> None:
+        await self.flush()
+        await self.close_idle()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Writing back %d session heartbeats failed", len(self._latest))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic task and write back what is pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+_tracker: Optional[HeartbeatTracker] = None
+
+def get_heartbeat_tracker() -> HeartbeatTracker:
+    """Return the process-wide tracker, writing through the async primary session."""
+    global _tracker
+    if _tracker is None:
+        from ..database import AsyncSessionLocal
+        _tracker = HeartbeatTracker(AsyncSessionLocal, settings.session_flush_interval, settings.session_idle_timeout)
+    return _tracker
+
+def reset_heartbeat_tracker(session_factory: Optional[Callable] = None) -> None:
+    """Drop the process-wide tracker (without flushing it).
+
+    With ``session_factory``, the next tracker writes through it instead of
+    the application's sessions.
+    """
+    global _tracker
+    _tracker = None
+    if session_factory is not None:
+        _tracker = HeartbeatTracker(session_factory, settings.session_flush_interval, settings.session_idle_timeout)
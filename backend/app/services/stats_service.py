@@ -1,82 +1,385 @@
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from sqlalchemy import Integer, case, cast, desc, distinct, func, select
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from ..instrumentation import instrumented
+from ..models.content import Content, Platform
+from ..models.rollups import DailyWatchStats, MonthlyContentStats, MonthlyGenreStats, MonthlyPlatformStats
+from ..models.taxonomy import Genre, ContentGenre
+from ..models.watches import Watch
 
+# Every aggregation here is pushed down to the database. Rolling windows
+# (viewing time, platforms, trending) GROUP BY over the watches table, where
+# the composite indexes on (watched_at), (content_id, watched_at) and
+# (platform_id, watched_at), each covering duration_watched, keep them to
+# index range scans. All-time and calendar dashboards (overview, personal
+# records, monthly summary, year in review) read the daily and monthly rollup
+# tables instead, so their cost does not grow with the watch history.
+
+PERIOD_DAYS = {"day": 1, "week": 7, "month": 30, "quarter": 90, "year": 365}
+WEEKDAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+# Date buckets: prefix length of SQLite's ISO datetime text, to_char format on PostgreSQL
+BUCKET_FORMATS = {
+    "day": (10, "YYYY-MM-DD"),
+    "month": (7, "YYYY-MM"),
+}
+
+def period_start(period: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Start of a rolling ``period`` window, or ``None`` for ``all``."""
+    days = PERIOD_DAYS.get(period)
+    if days is None:
+        return None
+    return (now or datetime.now()) - timedelta(days=days)
+
+def month_range(year: int, month: int) -> Tuple[datetime, datetime]:
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+def hours(minutes: Optional[int]) -> float:
+    return round((minutes or 0) / 60, 1)
+
+@instrumented
 class StatsService:
     def __init__(self, db: Session):
         self.db = db
+        self.dialect = db.bind.dialect.name
+
+    def _bucket(self, column, unit: str):
+        """SQL expression truncating a datetime column to a ``day``/``month`` string."""
+        prefix, postgres_format = BUCKET_FORMATS[unit]
+        if self.dialect == "postgresql":
+            return func.to_char(column, postgres_format)
+        # SQLite stores datetimes as ISO text; slicing it is far cheaper than strftime()
+        return func.substr(column, 1, prefix)
+
+    def _weekday(self, column):
+        """SQL expression for the day of week, 0 = Sunday."""
+        if self.dialect == "postgresql":
+            return cast(func.extract("dow", column), Integer)
+        return cast(func.strftime("%w", column), Integer)
+
+    @staticmethod
+    def _in_range(start: Optional[datetime], end: Optional[datetime] = None) -> List[Any]:
+        conditions = []
+        if start is not None:
+            conditions.append(Watch.watched_at >= start)
+        if end is not None:
+            conditions.append(Watch.watched_at < end)
+        return conditions
+
+    def _watch_totals(self, *conditions) -> Dict[str, Any]:
+        """Watch count, minutes and distinct titles in one pass."""
+        row = self.db.query(
+            func.count(Watch.id),
+            func.coalesce(func.sum(Watch.duration_watched), 0),
+            func.count(distinct(Watch.content_id)),
+            func.avg(Watch.duration_watched)
+        ).filter(*conditions).one()
+        return {
+            "watches": row[0],
+            "minutes": int(row[1]),
+            "titles": row[2],
+            "average_minutes": round(row[3] or 0, 1)
+        }
+
+    def _top_platforms(self, conditions, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        minutes = func.coalesce(func.sum(Watch.duration_watched), 0).label("minutes")
+        query = self.db.query(
+            Platform.name, func.count(Watch.id), minutes
+        ).select_from(Watch).join(
+            Platform, Platform.id == Watch.platform_id
+        ).filter(*conditions).group_by(Platform.id).order_by(desc(minutes), Platform.name)
+        if limit:
+            query = query.limit(limit)
+        return [
+            {"platform": name, "watches": count, "minutes": int(total), "hours": hours(total)}
+            for name, count, total in query.all()
+        ]
+
+    def _top_content(self, conditions, limit: int) -> List[Dict[str, Any]]:
+        watches = func.count(Watch.id).label("watches")
+        # Aggregate watches first, then join the few winning rows to content
+        ranked = select(
+            Watch.content_id,
+            watches,
+            func.coalesce(func.sum(Watch.duration_watched), 0).label("minutes"),
+            func.max(Watch.watched_at).label("last_watched")
+        ).where(*conditions).group_by(Watch.content_id).order_by(
+            desc(watches), desc("minutes")
+        ).limit(limit).subquery()
+        rows = self.db.query(
+            Content.id, Content.title, Content.content_type, Content.poster_path,
+            ranked.c.watches, ranked.c.minutes, ranked.c.last_watched
+        ).join(ranked, ranked.c.content_id == Content.id).order_by(
+            desc(ranked.c.watches), desc(ranked.c.minutes)
+        ).all()
+        return [
+            {
+                "content_id": row[0],
+                "title": row[1],
+                "content_type": row[2],
+                "poster_path": row[3],
+                "watches": row[4],
+                "minutes": int(row[5]),
+                "last_watched": row[6]
+            }
+            for row in rows
+        ]
+
+    def _series(self, unit: str, conditions) -> List[Dict[str, Any]]:
+        bucket = self._bucket(Watch.watched_at, unit).label("bucket")
+        rows = self.db.query(
+            bucket, func.count(Watch.id), func.coalesce(func.sum(Watch.duration_watched), 0)
+        ).filter(*conditions).group_by(bucket).order_by(bucket).all()
+        return [{unit: key, "watches": count, "minutes": int(minutes)} for key, count, minutes in rows]
+
+    def _busiest_weekday(self, conditions) -> Optional[str]:
+        weekday = self._weekday(Watch.watched_at).label("weekday")
+        minutes = func.coalesce(func.sum(Watch.duration_watched), 0).label("minutes")
+        row = self.db.query(weekday, minutes).filter(*conditions).group_by(weekday).order_by(
+            desc(minutes), desc(func.count(Watch.id))
+        ).first()
+        return WEEKDAYS[row[0]] if row else None
+
+    @staticmethod
+    def _between(column, start: Optional[date], end: Optional[date]) -> List[Any]:
+        conditions = []
+        if start is not None:
+            conditions.append(column >= start)
+        if end is not None:
+            conditions.append(column < end)
+        return conditions
+
+    def _rollup_totals(self, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, Any]:
+        watches, minutes = self.db.query(
+            func.coalesce(func.sum(DailyWatchStats.watches), 0),
+            func.coalesce(func.sum(DailyWatchStats.minutes), 0)
+        ).filter(*self._between(DailyWatchStats.day, start, end)).one()
+        titles = self.db.query(func.count(distinct(MonthlyContentStats.content_id))).filter(
+            *self._between(MonthlyContentStats.month, start, end)
+        ).scalar()
+        return {"watches": int(watches), "minutes": int(minutes), "titles": titles}
+
+    def _ranked(self, model, key, start: Optional[date], end: Optional[date], limit: Optional[int], by_minutes: bool = False):
+        """Subquery of rollup rows summed per ``key`` over the months in range, best first."""
+        watches = func.sum(model.watches).label("watches")
+        minutes = func.sum(model.minutes).label("minutes")
+        order = (desc(minutes), desc(watches)) if by_minutes else (desc(watches), desc(minutes))
+        query = select(key.label("key"), watches, minutes).where(
+            *self._between(model.month, start, end)
+        ).group_by(key).order_by(*order)
+        if limit:
+            query = query.limit(limit)
+        return query.subquery()
+
+    def _rollup_genres(self, start: Optional[date], end: Optional[date], limit: int) -> List[Dict[str, Any]]:
+        ranked = self._ranked(MonthlyGenreStats, MonthlyGenreStats.genre_id, start, end, limit)
+        rows = self.db.query(Genre.name, ranked.c.watches, ranked.c.minutes).join(
+            ranked, ranked.c.key == Genre.id
+        ).order_by(desc(ranked.c.watches), Genre.name).all()
+        return [{"genre": name, "watches": int(count), "minutes": int(minutes)} for name, count, minutes in rows]
+
+    def _rollup_platforms(self, start: Optional[date], end: Optional[date], limit: int) -> List[Dict[str, Any]]:
+        ranked = self._ranked(MonthlyPlatformStats, MonthlyPlatformStats.platform_id, start, end, limit, by_minutes=True)
+        rows = self.db.query(Platform.name, ranked.c.watches, ranked.c.minutes).join(
+            ranked, ranked.c.key == Platform.id
+        ).order_by(desc(ranked.c.minutes), Platform.name).all()
+        return [
+            {"platform": name, "watches": int(count), "minutes": int(total), "hours": hours(total)}
+            for name, count, total in rows
+        ]
+
+    def _rollup_content(self, start: Optional[date], end: Optional[date], limit: int) -> List[Dict[str, Any]]:
+        ranked = self._ranked(MonthlyContentStats, MonthlyContentStats.content_id, start, end, limit)
+        rows = self.db.query(
+            Content.id, Content.title, Content.content_type, Content.poster_path,
+            ranked.c.watches, ranked.c.minutes
+        ).join(ranked, ranked.c.key == Content.id).order_by(
+            desc(ranked.c.watches), desc(ranked.c.minutes)
+        ).all()
+        return [
+            {
+                "content_id": row[0],
+                "title": row[1],
+                "content_type": row[2],
+                "poster_path": row[3],
+                "watches": int(row[4]),
+                "minutes": int(row[5])
+            }
+            for row in rows
+        ]
+
+    def _rollup_series(self, unit: str, start: Optional[date], end: Optional[date]) -> List[Dict[str, Any]]:
+        bucket = self._bucket(DailyWatchStats.day, unit).label("bucket")
+        rows = self.db.query(
+            bucket, func.sum(DailyWatchStats.watches), func.sum(DailyWatchStats.minutes)
+        ).filter(*self._between(DailyWatchStats.day, start, end)).group_by(bucket).order_by(bucket).all()
+        return [{unit: key, "watches": int(count), "minutes": int(minutes)} for key, count, minutes in rows]
+
+    def _rollup_weekday(self, start: Optional[date], end: Optional[date]) -> Optional[str]:
+        weekday = self._weekday(DailyWatchStats.day).label("weekday")
+        minutes = func.sum(DailyWatchStats.minutes).label("minutes")
+        row = self.db.query(weekday, minutes).filter(
+            *self._between(DailyWatchStats.day, start, end)
+        ).group_by(weekday).order_by(desc(minutes), desc(func.sum(DailyWatchStats.watches))).first()
+        return WEEKDAYS[row[0]] if row else None
 
     def get_overview_stats(self) -> Dict[str, Any]:
-        """Get overview statistics - stub implementation."""
+        """Library and watch-history headline numbers."""
+        month_start = date.today().replace(day=1)
+        totals = self._rollup_totals()
+        this_month = self.db.query(func.coalesce(func.sum(DailyWatchStats.watches), 0)).filter(
+            DailyWatchStats.day >= month_start
+        ).scalar()
+
+        top_genre = self._rollup_genres(None, None, limit=1)
         return {
-            "total_content": 0,
-            "total_watches": 0,
-            "total_hours": 0,
-            "favorite_genre": "Not available",
-            "this_month_watches": 0
+            "total_content": self.db.query(func.count(Content.id)).scalar(),
+            "total_watches": totals["watches"],
+            "total_hours": hours(totals["minutes"]),
+            "favorite_genre": top_genre[0]["genre"] if top_genre else "Not available",
+            "this_month_watches": int(this_month)
         }
 
     def get_viewing_time_stats(self, period: str) -> Dict[str, Any]:
-        """Get viewing time stats - stub implementation."""
+        """Viewing time over a rolling period with a per-day breakdown."""
+        conditions = self._in_range(period_start(period))
+        totals = self._watch_totals(*conditions)
         return {
             "period": period,
-            "total_hours": 0,
-            "average_session": 0,
-            "most_active_day": "Monday"
+            "total_hours": hours(totals["minutes"]),
+            "total_watches": totals["watches"],
+            "average_session": totals["average_minutes"],
+            "most_active_day": self._busiest_weekday(conditions) or "Not available",
+            "daily": self._series("day", conditions)
         }
 
     def get_genre_stats(self, limit: int) -> Dict[str, Any]:
-        """Get genre statistics - stub implementation."""
+        """Get genre distribution across the library."""
+        title_count = func.count(ContentGenre.content_id).label("count")
+        rows = self.db.query(Genre.name, title_count).join(
+            ContentGenre, ContentGenre.genre_id == Genre.id
+        ).group_by(Genre.id).order_by(desc(title_count), Genre.name).all()
+
+        tagged = sum(count for _, count in rows)
         return {
-            "genres": [],
-            "total_genres": 0
+            "genres": [
+                {
+                    "genre": name,
+                    "count": count,
+                    "percentage": round(count / tagged * 100, 1)
+                }
+                for name, count in rows[:limit]
+            ],
+            "total_genres": len(rows)
         }
 
     def get_platform_stats(self, period: str) -> Dict[str, Any]:
-        """Get platform statistics - stub implementation."""
+        """Watches and hours per platform over a rolling period."""
+        platforms = self._top_platforms(self._in_range(period_start(period)))
+        total = sum(platform["minutes"] for platform in platforms)
+        for platform in platforms:
+            platform["percentage"] = round(platform["minutes"] / total * 100, 1) if total else 0
         return {
-            "platforms": [],
-            "most_used": "Not available"
+            "platforms": platforms,
+            "most_used": platforms[0]["platform"] if platforms else "Not available"
         }
 
     def get_rating_stats(self) -> Dict[str, Any]:
-        """Get rating statistics - stub implementation."""
+        """Personal rating average and distribution (whole points, 1-10)."""
+        point = cast(func.round(Content.personal_rating), Integer).label("point")
+        rows = self.db.query(point, func.count(Content.id)).filter(
+            Content.personal_rating.is_not(None)
+        ).group_by(point).order_by(point).all()
+        average = self.db.query(func.avg(Content.personal_rating)).scalar()
+        after_watch = self.db.query(func.avg(Watch.rating_after_watch)).scalar()
         return {
-            "average_rating": 0,
-            "distribution": {}
+            "average_rating": round(average or 0, 2),
+            "rated_content": sum(count for _, count in rows),
+            "average_rating_after_watch": round(after_watch or 0, 2),
+            "distribution": {str(value): count for value, count in rows}
         }
 
     def get_completion_stats(self) -> Dict[str, Any]:
-        """Get completion statistics - stub implementation."""
+        """Status breakdown of the library and average watch completion."""
+        row = self.db.query(
+            func.count(case((Content.status == "completed", Content.id))),
+            func.count(case((Content.status == "watching", Content.id))),
+            func.count(case((Content.status == "dropped", Content.id))),
+            func.count(case((Content.status == "planned", Content.id)))
+        ).one()
+        completed, watching, dropped, planned = row
+        started = completed + watching + dropped
+        average_completion = self.db.query(func.avg(Watch.completion_percentage)).scalar()
         return {
-            "completion_rate": 0,
-            "dropped_content": 0
+            "completion_rate": round(completed / started * 100, 1) if started else 0,
+            "completed_content": completed,
+            "watching_content": watching,
+            "dropped_content": dropped,
+            "planned_content": planned,
+            "average_watch_completion": round(average_completion or 0, 1)
         }
 
     def get_trending_content(self, period: str, limit: int) -> Dict[str, Any]:
-        """Get trending content - stub implementation."""
+        """Most-watched titles over a rolling period."""
         return {
-            "trending": [],
+            "trending": self._top_content(self._in_range(period_start(period)), limit),
             "period": period
         }
 
     def get_personal_records(self) -> Dict[str, Any]:
-        """Get personal records - stub implementation."""
+        """All-time records from the watch rollups."""
+        # Longest binge: the day with the most minutes watched
+        binge = self.db.query(DailyWatchStats).order_by(
+            desc(DailyWatchStats.minutes), desc(DailyWatchStats.watches)
+        ).first()
+
+        month = self._bucket(DailyWatchStats.day, "month").label("month")
+        busiest_month = self.db.query(month, func.sum(DailyWatchStats.watches).label("watches")).group_by(
+            month
+        ).order_by(desc("watches")).first()
+
+        top_genre = self._rollup_genres(None, None, limit=1)
+        top_content = self._rollup_content(None, None, limit=1)
         return {
-            "longest_binge": "0 hours",
-            "most_watched_genre": "Not available"
+            "longest_binge": f"{hours(binge.minutes)} hours" if binge else "0 hours",
+            "longest_binge_date": binge.day.isoformat() if binge else None,
+            "longest_binge_watches": binge.watches if binge else 0,
+            "most_watched_genre": top_genre[0]["genre"] if top_genre else "Not available",
+            "most_watched_title": top_content[0]["title"] if top_content else None,
+            "busiest_month": busiest_month[0] if busiest_month else None
         }
 
     def get_monthly_summary(self, year: int, month: int) -> Dict[str, Any]:
-        """Get monthly summary - stub implementation."""
+        """Totals, top genres/platforms/titles and a daily series for one month."""
+        start, end = (moment.date() for moment in month_range(year, month))
+        totals = self._rollup_totals(start, end)
         return {
             "year": year,
             "month": month,
-            "summary": "Stats service not implemented yet"
+            "total_watches": totals["watches"],
+            "total_hours": hours(totals["minutes"]),
+            "unique_titles": totals["titles"],
+            "top_genres": self._rollup_genres(start, end, limit=5),
+            "top_platforms": self._rollup_platforms(start, end, limit=5),
+            "top_content": self._rollup_content(start, end, limit=5),
+            "daily": self._rollup_series("day", start, end)
         }
 
     def get_year_in_review(self, year: int) -> Dict[str, Any]:
-        """Get year in review - stub implementation."""
+        """Totals, top genres/platforms/titles and a monthly series for one year."""
+        start, end = date(year, 1, 1), date(year + 1, 1, 1)
+        totals = self._rollup_totals(start, end)
         return {
             "year": year,
-            "summary": "Year in review not implemented yet"
+            "total_watches": totals["watches"],
+            "total_hours": hours(totals["minutes"]),
+            "unique_titles": totals["titles"],
+            "most_active_day": self._rollup_weekday(start, end),
+            "top_genres": self._rollup_genres(start, end, limit=10),
+            "top_platforms": self._rollup_platforms(start, end, limit=5),
+            "top_content": self._rollup_content(start, end, limit=10),
+            "monthly": self._rollup_series("month", start, end)
         }
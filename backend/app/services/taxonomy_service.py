@@ -0,0 +1,125 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence
+from ..models.content import Content
+from ..models.taxonomy import (
+    Genre, ContentGenre,
+    Person, ContentCast,
+    Country, ContentCountry,
+    Language, ContentLanguage,
+)
+from .rollup_service import UPSERT_INSERTS
+
+class Facet(NamedTuple):
+    """A JSON list column on Content and the tables that normalize it."""
+    field: str
+    lookup: Any
+    association: Any
+    key: str
+
+FACETS = (
+    Facet("genres", Genre, ContentGenre, "genre_id"),
+    Facet("cast", Person, ContentCast, "person_id"),
+    Facet("countries", Country, ContentCountry, "country_id"),
+    Facet("languages", Language, ContentLanguage, "language_id"),
+)
+
+FACET_FIELDS = frozenset(facet.field for facet in FACETS)
+
+class TaxonomyService:
+    """Keeps the normalized facet tables in sync with Content's JSON columns."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def sync(self, rows: Sequence[Any]) -> None:
+        """Rewrite facet associations for the given content rows.
+
+        ``rows`` may be ``Content`` instances or any objects/mappings exposing
+        ``id`` and the facet fields. Does not commit.
+        """
+        if not rows:
+            return
+
+        rows = [self._as_mapping(row) for row in rows]
+        content_ids = [row["id"] for row in rows]
+
+        for facet in FACETS:
+            self.db.execute(delete(facet.association).where(facet.association.content_id.in_(content_ids)))
+
+            names = {name for row in rows for name in self._names(row.get(facet.field))}
+            if not names:
+                continue
+            ids_by_name = self._get_or_create(facet.lookup, names)
+
+            associations = []
+            for row in rows:
+                for position, name in enumerate(self._names(row.get(facet.field))):
+                    association = {"content_id": row["id"], facet.key: ids_by_name[name]}
+                    if facet.association is ContentCast:
+                        association["position"] = position
+                    associations.append(association)
+            self.db.execute(insert(facet.association), associations)
+
+    def clear(self, content_ids: Iterable[int]) -> None:
+        """Remove facet associations for deleted content. Does not commit."""
+        content_ids = list(content_ids)
+        for facet in FACETS:
+            self.db.execute(delete(facet.association).where(facet.association.content_id.in_(content_ids)))
+
+    def backfill(self, batch_size: int = 1000) -> int:
+        """Rebuild facet tables from the JSON columns of every content row."""
+        columns = [Content.id] + [getattr(Content, facet.field) for facet in FACETS]
+        last_id = 0
+        total = 0
+
+        while True:
+            batch = self.db.execute(
+                select(*columns).where(Content.id > last_id).order_by(Content.id).limit(batch_size)
+            ).mappings().all()
+            if not batch:
+                break
+            self.sync([dict(row) for row in batch])
+            self.db.commit()
+            last_id = batch[-1]["id"]
+            total += len(batch)
+
+        return total
+
+    def _get_or_create(self, model, names: Iterable[str]) -> Dict[str, int]:
+        """Return ``{name: id}``, inserting names that do not exist yet.
+
+        Another writer may insert the same name between the lookup and the
+        insert; such names are skipped and picked up by the re-select.
+        """
+        names = set(names)
+        existing = dict(self.db.execute(select(model.name, model.id).where(model.name.in_(names))).all())
+        missing = names - existing.keys()
+        if missing:
+            rows = [{"name": name} for name in sorted(missing)]
+            upsert = UPSERT_INSERTS.get(self.db.bind.dialect.name)
+            if upsert is not None:
+                self.db.execute(upsert(model).on_conflict_do_nothing(index_elements=["name"]), rows)
+            else:
+                for row in rows:
+                    try:
+                        with self.db.begin_nested():
+                            self.db.execute(insert(model), [row])
+                    except IntegrityError:
+                        pass
+            existing.update(self.db.execute(select(model.name, model.id).where(model.name.in_(missing))).all())
+        return existing
+
+    @staticmethod
+    def _as_mapping(row: Any) -> Dict[str, Any]:
+        if isinstance(row, dict):
+            return row
+        return {field: getattr(row, field, None) for field in ("id", *FACET_FIELDS)}
+
+    @staticmethod
+    def _names(values: Any) -> List[str]:
+        """Unique, non-empty names from a JSON list column, in order."""
+        if not values:
+            return []
+        return list(dict.fromkeys(v for v in values if isinstance(v, str) and v))
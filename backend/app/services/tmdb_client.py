@@ -0,0 +1,434 @@
+import asyncio
+import math
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+
+import httpx
+
+from ..config import settings
+from ..instrumentation import REGISTRY, Counter
+
+# TMDB rate-limits per IP and answers 429 when we go over. Every request
+# first takes a token from the client's rate limiter (per process, or shared
+# through Redis with ``tmdb_rate_limit_backend="redis"``), so bursts queue
+# here instead of being rejected upstream. A 429, a 502-504 or a connection
+# error is retried after ``Retry-After`` when TMDB sends one, otherwise after
+# an exponential backoff with full jitter. Once ``tmdb_breaker_threshold``
+# calls in a row have failed the circuit opens: calls fail at once without a
+# request for ``tmdb_breaker_reset`` seconds, then one trial call decides
+# whether it closes again. A failed ``get`` answers from the response cache
+# even if the entry has expired, and identical concurrent ``get`` calls share
+# one request.
+
+# Rate limited, or TMDB's edge briefly unavailable
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+TMDB_REQUESTS = REGISTRY.register(Counter(
+    "tmdb_requests_total",
+    "TMDB API calls by outcome (ok, failed, retried, short_circuited, coalesced, stale).",
+    ("outcome",)
+))
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after a fixed time-to-live.
+
+    Expired entries stay until the LRU evicts them, for ``get_stale``.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """The value for ``key`` whether or not it has expired."""
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TokenBucket:
+    """In-process limiter: ``rate`` requests per second, in bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait before using it.
+
+        The balance may go negative, so callers queue up in arrival order
+        with one sleep each.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class RedisRateLimiter:
+    """Limiter shared by every process through Redis.
+
+    Counts requests in fixed windows of ``burst / rate`` seconds using only
+    ``SET NX`` and ``INCR``, which are atomic without a script. That gives the
+    same average rate as the token bucket, with up to twice the burst across
+    a window boundary.
+    """
+
+    def __init__(self, client, rate: float, burst: int, prefix: str = "watchlist:tmdb:rate:"):
+        self.client = client
+        self.burst = burst
+        self.window = burst / rate
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, rate: float, burst: int) -> "RedisRateLimiter":
+        import redis
+        return cls(redis.Redis.from_url(url), rate, burst)
+
+    def _take(self, key: str) -> int:
+        """Count one request in the window ``key``; returns the window's count."""
+        self.client.set(key, 0, ex=math.ceil(self.window) + 1, nx=True)
+        return self.client.incr(key)
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.time()
+            window = int(now // self.window)
+            # The client blocks, so the round trips run off the event loop
+            if await asyncio.to_thread(self._take, f"{self.prefix}{window}") <= self.burst:
+                return
+            # This window is used up; try again just after it ends, spread out
+            await asyncio.sleep((window + 1) * self.window - now + random.uniform(0, self.window / 10))
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures; half-opens after ``reset_timeout`` seconds."""
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out; while half-open only one trial call does."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial = False
+        if self.failures >= self.threshold:
+            self._opened_at = time.monotonic()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def make_rate_limiter():
+    """The limiter for ``tmdb_rate_limit_backend``, or ``None`` without a rate limit.
+
+    ``"redis"`` falls back to the in-process bucket when the ``redis``
+    package is not installed.
+    """
+    if settings.tmdb_rate_limit <= 0:
+        return None
+    if settings.tmdb_rate_limit_backend == "redis":
+        try:
+            return RedisRateLimiter.from_url(settings.redis_url, settings.tmdb_rate_limit, settings.tmdb_rate_burst)
+        except ImportError:
+            pass
+    return TokenBucket(settings.tmdb_rate_limit, settings.tmdb_rate_burst)
+
+
+class TMDBNotFound(Exception):
+    """TMDB answered 404: the requested title (or resource) does not exist."""
+
+
+class TMDBResponse(NamedTuple):
+    """A successful TMDB response; ``data`` is ``None`` for ``304 Not Modified``."""
+    status: int
+    data: Optional[Dict]
+    etag: Optional[str]
+
+
+class TMDBClient:
+    """Async HTTP client for the TMDB API.
+
+    One instance is shared by every ``TMDBService`` so that all calls reuse the
+    same keep-alive connection pool, response cache, concurrency limit, rate
+    limiter and circuit breaker.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
+        cache_size: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        rate_limiter=None,
+        max_retries: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+        retry_max_delay: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = base_url or settings.tmdb_base_url
+        self.api_key = settings.tmdb_api_key if api_key is None else api_key
+        self.timeout = timeout or settings.tmdb_timeout
+        self.max_connections = max_connections or settings.tmdb_max_connections
+        self.max_concurrency = max_concurrency or settings.tmdb_max_concurrency
+        self.cache = TTLCache(
+            ttl=settings.tmdb_cache_ttl if cache_ttl is None else cache_ttl,
+            max_entries=cache_size or settings.tmdb_cache_size,
+        )
+        self.rate_limiter = make_rate_limiter() if rate_limiter is None else rate_limiter
+        self.max_retries = settings.tmdb_max_retries if max_retries is None else max_retries
+        self.retry_backoff = settings.tmdb_retry_backoff if retry_backoff is None else retry_backoff
+        self.retry_max_delay = settings.tmdb_retry_max_delay if retry_max_delay is None else retry_max_delay
+        self.breaker = breaker or CircuitBreaker(settings.tmdb_breaker_threshold, settings.tmdb_breaker_reset)
+        self._transport = transport
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+    def _get_http(self) -> httpx.AsyncClient:
+        """Return the pooled client, recreating it if the event loop changed."""
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._loop is not loop:
+            if self._http is not None:
+                self._discard_http(self._http, self._loop)
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self._transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+            self._inflight = {}
+        return self._http
+
+    @staticmethod
+    def cache_key(endpoint: str, params: Optional[Dict[str, Any]]) -> Tuple:
+        return (endpoint, tuple(sorted((params or {}).items())))
+
+    async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict]:
+        """GET ``endpoint`` and return the decoded JSON body, or ``None`` on failure.
+
+        Identical concurrent calls share one request. When the request fails,
+        an expired cached body is returned if there is one. Raises
+        ``TMDBNotFound`` on a 404.
+        """
+        if not self.api_key:
+            return None
+
+        key = self.cache_key(endpoint, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        self._get_http()
+        call = self._inflight.get(key)
+        if call is None:
+            call = asyncio.ensure_future(self._get_uncached(key, endpoint, params))
+            self._inflight[key] = call
+            call.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            TMDB_REQUESTS.inc("coalesced")
+        # A cancelled caller leaves the shared request running for the others
+        return await asyncio.shield(call)
+
+    async def _get_uncached(self, key: Tuple, endpoint: str, params: Optional[Dict[str, Any]]) -> Optional[Dict]:
+        response = await self.fetch(endpoint, params)
+        if response is None:
+            stale = self.cache.get_stale(key)
+            if stale is not None:
+                TMDB_REQUESTS.inc("stale")
+            return stale
+
+        self.cache.set(key, response.data)
+        return response.data
+
+    async def fetch(
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None, etag: Optional[str] = None
+    ) -> Optional[TMDBResponse]:
+        """GET ``endpoint`` past the response cache, or ``None`` on failure.
+
+        With ``etag`` the request is conditional: an unchanged resource comes
+        back as a 304 without a body. Returns ``None`` without a request
+        while the circuit breaker is open. Raises ``TMDBNotFound`` on a 404,
+        which unlike a failure is a definite answer.
+        """
+        if not self.api_key:
+            return None
+        if not self.breaker.allow():
+            TMDB_REQUESTS.inc("short_circuited")
+            return None
+
+        http = self._get_http()
+        request_params = {"api_key": self.api_key}
+        if params:
+            request_params.update(params)
+        headers = {"If-None-Match": etag} if etag else None
+
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            async with self._semaphore:
+                try:
+                    response = await http.get(f"/{endpoint}", params=request_params, headers=headers)
+                except httpx.TransportError:
+                    response = None
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                break
+            delay = self._retry_delay(attempt, response)
+            if attempt == self.max_retries or delay is None:
+                break
+            TMDB_REQUESTS.inc("retried")
+            await asyncio.sleep(delay)
+
+        if response is None or response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+            TMDB_REQUESTS.inc("failed")
+            return None
+        self.breaker.record_success()
+
+        if response.status_code == 404:
+            TMDB_REQUESTS.inc("not_found")
+            raise TMDBNotFound(endpoint)
+        if response.status_code == 304:
+            TMDB_REQUESTS.inc("ok")
+            return TMDBResponse(304, None, response.headers.get("etag", etag))
+        try:
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, ValueError):
+            TMDB_REQUESTS.inc("failed")
+            return None
+
+        TMDB_REQUESTS.inc("ok")
+        return TMDBResponse(response.status_code, data, response.headers.get("etag"))
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> Optional[float]:
+        """Seconds to wait before retry ``attempt + 1``; ``None`` if TMDB asked for longer than we wait."""
+        retry_after = parse_retry_after(response.headers.get("retry-after")) if response is not None else None
+        if retry_after is None:
+            return min(random.uniform(0, self.retry_backoff * 2 ** attempt), self.retry_max_delay)
+        if retry_after > self.retry_max_delay:
+            return None
+        return retry_after + random.uniform(0, self.retry_backoff)
+
+    @staticmethod
+    def _discard_http(http: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close a client whose connections belong to another event loop.
+
+        They can only be closed on that loop, so the close is scheduled there
+        while it still runs; a stopped loop's sockets are released with it.
+        """
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(http.aclose(), loop)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._http is not None:
+            http, loop = self._http, self._loop
+            self._http = None
+            self._loop = None
+            if loop is asyncio.get_running_loop():
+                await http.aclose()
+            else:
+                self._discard_http(http, loop)
+
+
+_client: Optional[TMDBClient] = None
+
+
+def get_tmdb_client() -> TMDBClient:
+    """Return the process-wide TMDB client."""
+    global _client
+    if _client is None:
+        _client = TMDBClient()
+    return _client
+
+
+async def close_tmdb_client() -> None:
+    """Release the shared client's connection pool (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,299 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..instrumentation import REGISTRY, Counter
+from ..models.tmdb import TMDBMetadata
+from .rollup_service import UPSERT_INSERTS
+from .tmdb_client import TMDBClient, TMDBNotFound, get_tmdb_client
+
+logger = logging.getLogger(__name__)
+
+# TMDB detail payloads are mirrored in the ``tmdb_metadata`` table, so a title
+# is fetched from TMDB once and served from the database after that. A lookup
+# is answered by age of the stored copy:
+#
+# - younger than ``tmdb_mirror_max_age``: served as is, no network;
+# - younger than ``tmdb_mirror_max_stale``: served as is while a background
+#   task revalidates it with ``If-None-Match``, so an unchanged title costs a
+#   bodiless 304;
+# - older, or missing: fetched before returning. If TMDB cannot be reached the
+#   stale copy is still served.
+#
+# Concurrent fetches of one title share a single request. ``refresh_stale``
+# revalidates the least recently fetched rows in bulk and ``load_export``
+# seeds rows from TMDB's daily ID exports; both are exposed as maintenance
+# commands (``refresh-tmdb-mirror``, ``preload-tmdb-export``).
+
+Key = Tuple[str, int]
+
+# What a fetch task returns when TMDB answered 404
+NOT_FOUND = object()
+
+MIRROR_LOOKUPS = REGISTRY.register(Counter(
+    "tmdb_mirror_lookups_total", "TMDB detail lookups by how the mirror answered (fresh, stale, miss).", ("result",)
+))
+
+
+class MirrorEntry(NamedTuple):
+    payload: Optional[Dict]
+    etag: Optional[str]
+    fetched_at: Optional[datetime]
+
+
+def details_endpoint(content_type: str, tmdb_id: int) -> str:
+    return f"movie/{tmdb_id}" if content_type == "movie" else f"tv/{tmdb_id}"
+
+
+class TMDBMetadataStore:
+    """Reads and writes ``tmdb_metadata`` rows; async code calls it through ``run_sync``."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.bind.dialect.name
+
+    def get(self, key: Key) -> Optional[MirrorEntry]:
+        row = self.db.execute(
+            select(TMDBMetadata.payload, TMDBMetadata.etag, TMDBMetadata.fetched_at).where(
+                TMDBMetadata.content_type == key[0], TMDBMetadata.tmdb_id == key[1]
+            )
+        ).first()
+        return MirrorEntry(*row) if row is not None else None
+
+    def save(self, key: Key, payload: Dict, etag: Optional[str], fetched_at: datetime) -> None:
+        """Store a freshly fetched payload, creating the row if needed."""
+        title = payload.get("title" if key[0] == "movie" else "name")
+        self._upsert([{
+            "content_type": key[0], "tmdb_id": key[1], "title": title, "popularity": payload.get("popularity"),
+            "payload": payload, "etag": etag, "fetched_at": fetched_at,
+        }], ("title", "popularity", "payload", "etag", "fetched_at"))
+        self.db.commit()
+
+    def touch(self, key: Key, etag: Optional[str], fetched_at: datetime) -> Optional[Dict]:
+        """Mark the stored payload as revalidated (TMDB answered 304) and return it."""
+        self.db.execute(
+            update(TMDBMetadata)
+            .where(TMDBMetadata.content_type == key[0], TMDBMetadata.tmdb_id == key[1])
+            .values(etag=etag, fetched_at=fetched_at)
+        )
+        self.db.commit()
+        entry = self.get(key)
+        return entry.payload if entry is not None else None
+
+    def stale(self, before: datetime, limit: int) -> List[Tuple[Key, Optional[str]]]:
+        """``(key, etag)`` of up to ``limit`` rows fetched before ``before`` or never.
+
+        Never-fetched rows come first, most popular first, then the least
+        recently fetched.
+        """
+        rows = self.db.execute(
+            select(TMDBMetadata.content_type, TMDBMetadata.tmdb_id, TMDBMetadata.payload.is_not(None), TMDBMetadata.etag)
+            .where(TMDBMetadata.fetched_at.is_(None) | (TMDBMetadata.fetched_at < before))
+            .order_by(TMDBMetadata.fetched_at.is_not(None), TMDBMetadata.fetched_at, TMDBMetadata.popularity.desc())
+            .limit(limit)
+        )
+        return [((content_type, tmdb_id), etag if has_payload else None) for content_type, tmdb_id, has_payload, etag in rows]
+
+    def load_export(
+        self, lines: Iterable[str], content_type: str, min_popularity: float = 0.0, batch_size: int = 5000
+    ) -> int:
+        """Add the titles of a TMDB daily ID export (one JSON object per line).
+
+        Exports (``movie_ids_MM_DD_YYYY.json.gz``, ``tv_series_ids_...``) hold
+        only IDs, original titles and popularity, so new rows have no payload
+        until their details are fetched. Existing rows get the new title and
+        popularity and keep their payload. Returns the number of rows loaded.
+        """
+        title_field = "original_title" if content_type == "movie" else "original_name"
+        total = 0
+        batch = []
+        for line in lines:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if item.get("adult") or (item.get("popularity") or 0) < min_popularity:
+                continue
+            batch.append({
+                "content_type": content_type, "tmdb_id": item["id"],
+                "title": item.get(title_field), "popularity": item.get("popularity"),
+            })
+            if len(batch) >= batch_size:
+                total += self._load_batch(batch)
+                batch = []
+        if batch:
+            total += self._load_batch(batch)
+        return total
+
+    def _load_batch(self, rows: List[Dict]) -> int:
+        self._upsert(rows, ("title", "popularity"))
+        self.db.commit()
+        return len(rows)
+
+    def _upsert(self, rows: List[Dict], columns: Tuple[str, ...]) -> None:
+        upsert = UPSERT_INSERTS.get(self.dialect)
+        if upsert is not None:
+            statement = upsert(TMDBMetadata)
+            statement = statement.on_conflict_do_update(
+                index_elements=["content_type", "tmdb_id"],
+                set_={column: statement.excluded[column] for column in columns}
+            )
+            self.db.execute(statement, rows)
+            return
+
+        for row in rows:
+            existing = self.db.get(TMDBMetadata, (row["content_type"], row["tmdb_id"]))
+            if existing is None:
+                self.db.add(TMDBMetadata(**row))
+            else:
+                for column in columns:
+                    setattr(existing, column, row[column])
+        self.db.flush()
+
+
+class TMDBMirror:
+    """Serves TMDB detail payloads from ``tmdb_metadata``, fetching and refreshing as needed."""
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        client: Optional[TMDBClient] = None,
+        max_age: float = 7 * 86400,
+        max_stale: float = 90 * 86400,
+        concurrency: int = 8,
+    ):
+        self.session_factory = session_factory
+        self._client = client
+        self.max_age = max_age
+        self.max_stale = max_stale
+        self.concurrency = concurrency
+        self._fetches: Dict[Key, asyncio.Task] = {}
+
+    @property
+    def client(self) -> TMDBClient:
+        return self._client or get_tmdb_client()
+
+    async def _run(self, fn: Callable[[TMDBMetadataStore], object]):
+        async with self.session_factory() as session:
+            return await session.run_sync(lambda db: fn(TMDBMetadataStore(db)))
+
+    async def get(self, content_type: str, tmdb_id: int) -> Optional[Dict]:
+        """The TMDB detail payload (with credits) for a title.
+
+        ``None`` if it is not stored and TMDB cannot be reached; raises
+        ``TMDBNotFound`` if TMDB has no such title.
+        """
+        key = (content_type, tmdb_id)
+        entry = await self._run(lambda store: store.get(key))
+        if entry is not None and entry.payload is not None:
+            age = (datetime.now() - entry.fetched_at).total_seconds()
+            if age < self.max_age:
+                MIRROR_LOOKUPS.inc("fresh")
+                return entry.payload
+            if age < self.max_stale:
+                MIRROR_LOOKUPS.inc("stale")
+                self._fetch(key, entry.etag)
+                return entry.payload
+
+        MIRROR_LOOKUPS.inc("miss")
+        etag = entry.etag if entry is not None and entry.payload is not None else None
+        payload = await asyncio.shield(self._fetch(key, etag))
+        if payload is NOT_FOUND:
+            raise TMDBNotFound(details_endpoint(content_type, tmdb_id))
+        if payload is None and entry is not None:
+            return entry.payload
+        return payload
+
+    def _fetch(self, key: Key, etag: Optional[str]) -> asyncio.Task:
+        """The in-flight fetch of ``key``, starting one if there is none."""
+        task = self._fetches.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key, etag))
+            self._fetches[key] = task
+            task.add_done_callback(lambda _: self._fetches.pop(key, None))
+        return task
+
+    async def _refresh(self, key: Key, etag: Optional[str]) -> Optional[Dict]:
+        try:
+            return await self.refresh(*key, etag=etag)
+        except TMDBNotFound:
+            return NOT_FOUND
+        except Exception:
+            logger.exception("Refreshing TMDB %s %s failed", *key)
+            return None
+
+    async def refresh(self, content_type: str, tmdb_id: int, etag: Optional[str] = None) -> Optional[Dict]:
+        """Fetch a title from TMDB, revalidating ``etag``, and store it.
+
+        ``None`` on failure; raises ``TMDBNotFound`` if TMDB has no such title.
+        """
+        key = (content_type, tmdb_id)
+        response = await self.client.fetch(
+            details_endpoint(content_type, tmdb_id), {"append_to_response": "credits"}, etag=etag
+        )
+        if response is None:
+            return None
+
+        fetched_at = datetime.now()
+        if response.data is None:
+            return await self._run(lambda store: store.touch(key, response.etag, fetched_at))
+        await self._run(lambda store: store.save(key, response.data, response.etag, fetched_at))
+        return response.data
+
+    async def refresh_stale(self, limit: int = 1000) -> int:
+        """Refresh up to ``limit`` rows older than ``max_age`` (or never fetched); returns how many succeeded."""
+        before = datetime.now() - timedelta(seconds=self.max_age)
+        stale = await self._run(lambda store: store.stale(before, limit))
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(key: Key, etag: Optional[str]) -> Optional[Dict]:
+            async with semaphore:
+                return await self._fetch(key, etag)
+
+        results = await asyncio.gather(*(refresh(key, etag) for key, etag in stale))
+        return sum(result is not None and result is not NOT_FOUND for result in results)
+
+    async def join(self) -> None:
+        """Wait for every in-flight fetch, including background refreshes."""
+        while self._fetches:
+            await asyncio.gather(*self._fetches.values())
+
+
+_mirror: Optional[TMDBMirror] = None
+
+def _create_mirror(session_factory: Callable) -> TMDBMirror:
+    return TMDBMirror(
+        session_factory,
+        max_age=settings.tmdb_mirror_max_age,
+        max_stale=settings.tmdb_mirror_max_stale,
+        concurrency=settings.tmdb_hydration_concurrency,
+    )
+
+def get_tmdb_mirror() -> Optional[TMDBMirror]:
+    """Return the process-wide mirror, or ``None`` when ``tmdb_mirror_enabled`` is off."""
+    global _mirror
+    if _mirror is None and settings.tmdb_mirror_enabled:
+        from ..database import AsyncSessionLocal
+        _mirror = _create_mirror(AsyncSessionLocal)
+    return _mirror
+
+def reset_tmdb_mirror(session_factory: Optional[Callable] = None) -> None:
+    """Drop the process-wide mirror.
+
+    With ``session_factory``, the next mirror stores rows through it instead
+    of the application's sessions (whether or not the mirror is enabled).
+    """
+    global _mirror
+    _mirror = None
+    if session_factory is not None:
+        _mirror = _create_mirror(session_factory)
+
+async def close_tmdb_mirror() -> None:
+    """Let background refreshes finish (called on app shutdown)."""
+    if _mirror is not None:
+        await _mirror.join()
@@ -1,53 +1,47 @@
-import requests
-from typing import List, Optional, Dict, Any
+import asyncio
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 from ..config import settings
+from ..instrumentation import instrumented
+from .tmdb_client import TMDBClient, TMDBNotFound, get_tmdb_client
+from .tmdb_mirror import TMDBMirror, details_endpoint, get_tmdb_mirror
 
+@instrumented
 class TMDBService:
     """Service for interacting with The Movie Database (TMDB) API."""
     
-    def __init__(self):
-        self.base_url = "https://api.themoviedb.org/3"
-        self.api_key = settings.tmdb_api_key
+    def __init__(self, client: Optional[TMDBClient] = None, mirror: Optional[TMDBMirror] = None):
+        self.client = client or get_tmdb_client()
+        self.mirror = mirror or get_tmdb_mirror()
         self.image_base_url = "https://image.tmdb.org/t/p/w500"
 
-    def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Optional[Dict]:
-        """Make a request to the TMDB API."""
-        if not self.api_key:
-            return None
-        
-        url = f"{self.base_url}/{endpoint}"
-        default_params = {"api_key": self.api_key}
-        
-        if params:
-            default_params.update(params)
-        
+    async def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Optional[Dict]:
+        """Make a request to the TMDB API; ``None`` if it fails or TMDB has nothing there."""
         try:
-            response = requests.get(url, params=default_params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException:
+            return await self.client.get(endpoint, params)
+        except TMDBNotFound:
             return None
 
-    def search_content(self, query: str, content_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def search_content(self, query: str, content_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search for movies or TV shows."""
-        results = []
+        searches = []
         
         if not content_type or content_type == "movie":
-            movie_results = self._search_movies(query)
-            if movie_results:
-                results.extend(movie_results)
+            searches.append(self._search_movies(query))
         
         if not content_type or content_type == "tv":
-            tv_results = self._search_tv(query)
-            if tv_results:
-                results.extend(tv_results)
+            searches.append(self._search_tv(query))
+        
+        # Movie and TV searches are independent, so send them together
+        results = []
+        for search_results in await asyncio.gather(*searches):
+            results.extend(search_results)
         
         # Sort by popularity
         return sorted(results, key=lambda x: x.get("popularity", 0), reverse=True)[:20]
 
-    def _search_movies(self, query: str) -> List[Dict[str, Any]]:
+    async def _search_movies(self, query: str) -> List[Dict[str, Any]]:
         """Search for movies."""
-        data = self._make_request("search/movie", {"query": query})
+        data = await self._make_request("search/movie", {"query": query})
         if not data:
             return []
         
@@ -68,9 +62,9 @@ class TMDBService:
         
         return results
 
-    def _search_tv(self, query: str) -> List[Dict[str, Any]]:
+    async def _search_tv(self, query: str) -> List[Dict[str, Any]]:
         """Search for TV shows."""
-        data = self._make_request("search/tv", {"query": query})
+        data = await self._make_request("search/tv", {"query": query})
         if not data:
             return []
         
@@ -91,17 +85,50 @@ class TMDBService:
         
         return results
 
-    def get_content_details(self, tmdb_id: int, content_type: str) -> Optional[Dict[str, Any]]:
-        """Get detailed information about a movie or TV show."""
-        endpoint = f"movie/{tmdb_id}" if content_type == "movie" else f"tv/{tmdb_id}"
-        data = self._make_request(endpoint)
+    async def get_content_details(self, tmdb_id: int, content_type: str) -> Optional[Dict[str, Any]]:
+        """Get detailed information about a movie or TV show.
+        
+        Served from the local mirror when it is enabled, so a title already
+        fetched once does not go to the network again. Returns ``None`` if
+        TMDB cannot be reached and raises ``TMDBNotFound`` if it has no such
+        title.
+        """
+        if self.mirror is not None:
+            data = await self.mirror.get(content_type, tmdb_id)
+        else:
+            # Fetch credits in the same round trip as the details
+            data = await self.client.get(details_endpoint(content_type, tmdb_id), {"append_to_response": "credits"})
         
         if not data:
             return None
         
-        # Get credits (cast and crew)
-        credits = self._make_request(f"{endpoint}/credits")
-        
+        return self._parse_details(data, content_type)
+
+    async def get_many_details(
+        self,
+        items: Iterable[Tuple[int, str]],
+        concurrency: Optional[int] = None
+    ) -> Dict[Tuple[int, str], Optional[Dict[str, Any]]]:
+        """Hydrate many ``(tmdb_id, content_type)`` pairs concurrently.
+        
+        Returns a dict keyed by the input pair; titles that could not be
+        fetched or do not exist map to ``None``.
+        """
+        pairs = list(dict.fromkeys(items))
+        semaphore = asyncio.Semaphore(concurrency or settings.tmdb_hydration_concurrency)
+        
+        async def hydrate(tmdb_id: int, content_type: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self.get_content_details(tmdb_id, content_type)
+                except TMDBNotFound:
+                    return None
+        
+        details = await asyncio.gather(*(hydrate(tmdb_id, content_type) for tmdb_id, content_type in pairs))
+        return dict(zip(pairs, details))
+
+    def _parse_details(self, data: Dict[str, Any], content_type: str) -> Dict[str, Any]:
+        """Convert a TMDB detail payload (with appended credits) to content fields."""
         result = {
             "tmdb_id": data.get("id"),
             "title": data.get("title" if content_type == "movie" else "name"),
@@ -119,6 +146,7 @@ class TMDBService:
         }
         
         # Add cast and crew information
+        credits = data.get("credits")
         if credits:
             result["cast"] = [actor["name"] for actor in credits.get("cast", [])[:10]]  # Top 10 cast
             crew = credits.get("crew", [])
@@ -134,10 +162,10 @@ class TMDBService:
         
         return result
 
-    def get_trending(self, content_type: str = "all", time_window: str = "week") -> List[Dict[str, Any]]:
+    async def get_trending(self, content_type: str = "all", time_window: str = "week") -> List[Dict[str, Any]]:
         """Get trending content."""
         endpoint = f"trending/{content_type}/{time_window}"
-        data = self._make_request(endpoint)
+        data = await self._make_request(endpoint)
         
         if not data:
             return []
@@ -158,10 +186,10 @@ class TMDBService:
         
         return results
 
-    def get_popular(self, content_type: str = "movie") -> List[Dict[str, Any]]:
+    async def get_popular(self, content_type: str = "movie") -> List[Dict[str, Any]]:
         """Get popular movies or TV shows."""
         endpoint = f"{content_type}/popular"
-        data = self._make_request(endpoint)
+        data = await self._make_request(endpoint)
         
         if not data:
             return []
@@ -0,0 +1,217 @@
+import os
+import threading
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# In-process approximate nearest-neighbour index over unit-length float32
+# vectors. Small collections are searched exactly; once the collection grows
+# past ``ivf_threshold`` an inverted-file (IVF) index is trained with k-means
+# and each query only scores the ``nprobe`` closest clusters.
+
+class VectorIndex:
+    """Cosine-similarity index keyed by content ID."""
+
+    def __init__(self, dim: int, nprobe: int = 8, ivf_threshold: int = 4096):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.ivf_threshold = ivf_threshold
+        self._lock = threading.RLock()
+        self._reset(capacity=1024)
+
+    def _reset(self, capacity: int) -> None:
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._assignments = np.zeros(capacity, dtype=np.int32)
+        self._size = 0
+        self._positions = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: Optional[List[np.ndarray]] = None
+        self.dirty = False
+        # The database state the vectors were taken from, and the newest
+        # ``updated_at`` applied since (maintained by embedding_service)
+        self.fingerprint = ""
+        self.synced_through = None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, content_id: int) -> bool:
+        return content_id in self._positions
+
+    def ids(self) -> List[int]:
+        with self._lock:
+            return list(self._positions)
+
+    def upsert(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """Insert or replace vectors. ``vectors`` must be unit length."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            rows = np.empty(len(vectors), dtype=np.int64)
+            new = []
+            for i, content_id in enumerate(ids):
+                row = self._positions.get(content_id)
+                if row is None:
+                    new.append(i)
+                else:
+                    rows[i] = row
+            if new:
+                start = self._reserve(len(new))
+                rows[new] = np.arange(start, start + len(new))
+                for i, row in zip(new, rows[new]):
+                    self._positions[ids[i]] = int(row)
+                self._ids[rows[new]] = [ids[i] for i in new]
+
+            self._vectors[rows] = vectors
+            self._alive[rows] = True
+            if self._centroids is not None:
+                self._assignments[rows] = np.argmax(vectors @ self._centroids.T, axis=1)
+            self._lists = None
+            self.dirty = True
+            if self._centroids is None and len(self) >= self.ivf_threshold:
+                self.train()
+
+    def remove(self, ids: Iterable[int]) -> None:
+        with self._lock:
+            for content_id in ids:
+                row = self._positions.pop(content_id, None)
+                if row is not None:
+                    self._alive[row] = False
+            self._lists = None
+            self.dirty = True
+
+    def get(self, content_id: int) -> Optional[np.ndarray]:
+        row = self._positions.get(content_id)
+        return None if row is None else self._vectors[row].copy()
+
+    def _reserve(self, count: int) -> int:
+        """Claim ``count`` new rows, growing the buffers geometrically; return the first."""
+        if self._size + count > len(self._ids):
+            capacity = len(self._ids)
+            while capacity < self._size + count:
+                capacity *= 2
+            self._grow(capacity)
+        start = self._size
+        self._size += count
+        return start
+
+    def _grow(self, capacity: int) -> None:
+        for name in ("_ids", "_alive", "_assignments"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:len(self._vectors)] = self._vectors
+        self._vectors = vectors
+
+    def train(self, iterations: int = 8, sample_size: int = 20000, seed: int = 0) -> None:
+        """Cluster the vectors with spherical k-means and build the inverted lists."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            if len(rows) < self.ivf_threshold:
+                self._centroids = None
+                self._lists = None
+                return
+
+            rng = np.random.default_rng(seed)
+            nlist = int(np.sqrt(len(rows)))
+            sample = self._vectors[rng.choice(rows, size=min(sample_size, len(rows)), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                order = np.argsort(labels, kind="stable")
+                members, starts = np.unique(labels[order], return_index=True)
+                sums = np.zeros_like(centroids)
+                sums[members] = np.add.reduceat(sample[order], starts)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                # Keep the previous centroid for clusters that lost all members
+                centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+            self._centroids = centroids.astype(np.float32)
+            for start in range(0, self._size, 8192):
+                block = self._vectors[start:start + 8192]
+                self._assignments[start:start + len(block)] = np.argmax(block @ self._centroids.T, axis=1)
+            self._lists = None
+            self.dirty = True
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            rows = np.flatnonzero(self._alive[:self._size])
+            order = np.argsort(self._assignments[rows], kind="stable")
+            rows = rows[order]
+            bounds = np.searchsorted(self._assignments[rows], np.arange(len(self._centroids) + 1))
+            self._lists = [rows[bounds[i]:bounds[i + 1]] for i in range(len(self._centroids))]
+        return self._lists
+
+    def search(self, query: np.ndarray, k: int = 10, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """Return up to ``k`` ``(content_id, cosine similarity)`` pairs, best first."""
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        excluded = {self._positions[i] for i in exclude if i in self._positions}
+
+        with self._lock:
+            if self._centroids is None:
+                # Exact search: score the whole buffer and mask dead rows
+                scores = self._vectors[:self._size] @ query
+                scores[~self._alive[:self._size]] = -np.inf
+                scores[list(excluded)] = -np.inf
+                k = min(k, len(self))
+                if k == 0:
+                    return []
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                return [(int(self._ids[i]), float(scores[i])) for i in top if scores[i] > -np.inf]
+
+            lists = self._inverted_lists()
+            probes = np.argsort(-(self._centroids @ query))[:self.nprobe]
+            rows = np.concatenate([lists[p] for p in probes])
+            if len(rows) < k + len(excluded):
+                rows = np.flatnonzero(self._alive[:self._size])
+            if excluded:
+                rows = rows[~np.isin(rows, list(excluded))]
+            if len(rows) == 0:
+                return []
+
+            scores = self._vectors[rows] @ query
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._ids[rows[i]]), float(scores[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        """Persist the index and its ``fingerprint`` atomically as an ``.npz`` file."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            arrays = {
+                "dim": np.array(self.dim),
+                "fingerprint": np.array(self.fingerprint),
+                "ids": self._ids[rows],
+                "vectors": self._vectors[rows],
+                "assignments": self._assignments[rows],
+            }
+            if self._centroids is not None:
+                arrays["centroids"] = self._centroids
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "VectorIndex":
+        with np.load(path) as data:
+            index = cls(dim=int(data["dim"]), **kwargs)
+            count = len(data["ids"])
+            index._reset(capacity=max(count, 1024))
+            index._ids[:count] = data["ids"]
+            index._vectors[:count] = data["vectors"]
+            index._assignments[:count] = data["assignments"]
+            index._alive[:count] = True
+            index._size = count
+            index._positions = {int(content_id): row for row, content_id in enumerate(data["ids"])}
+            if "centroids" in data:
+                index._centroids = data["centroids"]
+            if "fingerprint" in data:
+                index.fingerprint = str(data["fingerprint"])
+        return index
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy.exc import OperationalError
+
+from ..config import settings
+from ..instrumentation import REGISTRY, Counter
+from ..schemas.watches import WatchCreate
+from .watch_service import WatchService
+
+logger = logging.getLogger(__name__)
+
+# Player clients report watch events far more often than anyone reads them
+# back, so POST /watches/batch only appends to an in-process buffer. The
+# buffer is written out with one bulk INSERT (plus the rollup upserts) when it
+# reaches ``watch_batch_size`` events or when its oldest event has waited
+# ``watch_flush_interval`` seconds, whichever comes first. Events still
+# buffered when the process stops are flushed on shutdown.
+#
+# A batch the database rejects (a constraint or data error) is split in
+# halves until the offending events are isolated; those are dropped and
+# logged, so one bad event cannot hold up the rest. When the database is
+# unavailable (an operational error such as a lost connection or a lock
+# timeout) the batch stays buffered for the next attempt instead. The buffer
+# never holds more than ``watch_buffer_max_pending`` events: beyond that
+# ``add`` raises ``BufferFull`` and the endpoint answers 503.
+
+WATCHES_DROPPED = REGISTRY.register(Counter(
+    "watch_events_dropped_total", "Buffered watch events the database rejected."
+))
+
+
+class BufferFull(Exception):
+    """Raised by ``WatchBuffer.add`` when the events would exceed ``max_pending``."""
+
+class WatchBuffer:
+    """Collects watch events and writes them out in batches."""
+
+    def __init__(
+        self, session_factory: Callable, max_size: int = 500, max_delay: float = 1.0, max_pending: int = 50000
+    ):
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._pending: List[WatchCreate] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def add(self, watches: Sequence[WatchCreate]) -> None:
+        """Buffer ``watches``, flushing right away if the buffer is full.
+
+        Raises ``BufferFull`` (and buffers nothing) when the events would
+        take the buffer past ``max_pending``. Once this returns the events
+        are accepted: a failed flush leaves them buffered for the timer.
+        """
+        if len(self._pending) + len(watches) > self.max_pending:
+            raise BufferFull(f"{len(self._pending)} watch events are already waiting to be written")
+        self._pending.extend(watches)
+        if len(self._pending) >= self.max_size:
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing %d buffered watches failed; retrying", len(self._pending))
+        if self._pending and self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> int:
+        """Write every buffered event; returns the number recorded.
+
+        Events that cannot be written (rejected by the database, or
+        failing in the service) are dropped. On an operational error the
+        events not yet written go back to the front of the buffer and the
+        error is raised.
+        """
+        async with self._lock:
+            timer, self._timer = self._timer, None
+            if timer is not None and timer is not asyncio.current_task():
+                timer.cancel()
+            batch, self._pending = self._pending, []
+            chunks = [batch] if batch else []
+            recorded = 0
+            while chunks:
+                chunk = chunks.pop(0)
+                try:
+                    recorded += await self._record(chunk)
+                except OperationalError:
+                    self._pending[:0] = [watch for unwritten in [chunk, *chunks] for watch in unwritten]
+                    raise
+                except Exception:
+                    # Bisect to find the events at fault and keep the rest
+                    if len(chunk) > 1:
+                        middle = len(chunk) // 2
+                        chunks[:0] = [chunk[:middle], chunk[middle:]]
+                    else:
+                        WATCHES_DROPPED.inc()
+                        logger.exception("Dropping watch event that could not be written: %r", chunk[0])
+            return recorded
+
+    async def _record(self, watches: List[WatchCreate]) -> int:
+        async with self.session_factory() as session:
+            return await session.run_sync(lambda db: WatchService(db).record_watches(watches))
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Flushing %d buffered watches failed; retrying", len(self._pending))
+            if self._timer is None:
+                self._timer = asyncio.create_task(self._flush_later())
+
+    async def close(self) -> None:
+        """Flush whatever is left and stop the timer."""
+        await self.flush()
+
+
+_buffer: Optional[WatchBuffer] = None
+
+def _create_buffer(session_factory: Callable) -> WatchBuffer:
+    return WatchBuffer(
+        session_factory, settings.watch_batch_size, settings.watch_flush_interval, settings.watch_buffer_max_pending
+    )
+
+def get_watch_buffer() -> WatchBuffer:
+    """Return the process-wide buffer, writing through the async primary session."""
+    global _buffer
+    if _buffer is None:
+        from ..database import AsyncSessionLocal
+        _buffer = _create_buffer(AsyncSessionLocal)
+    return _buffer
+
+def reset_watch_buffer(session_factory: Optional[Callable] = None) -> None:
+    """Drop the process-wide buffer (without flushing it).
+
+    With ``session_factory``, the next buffer writes through it instead of
+    the application's sessions.
+    """
+    global _buffer
+    _buffer = None
+    if session_factory is not None:
+        _buffer = _create_buffer(session_factory)
+
+async def close_watch_buffer() -> None:
+    if _buffer is not None:
+        await _buffer.close()
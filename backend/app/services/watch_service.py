@@ -1,36 +1,199 @@
+from sqlalchemy import bindparam, func, insert, update
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Mapping, Sequence
 from datetime import datetime
-from ..schemas.watches import WatchCreate, WatchResponse, WatchSessionCreate
+from .. import cache
+from ..models.content import Content, Platform
+from ..models.rollups import ContentWatchStats
+from ..models.watches import Watch, WatchSession
+from ..schemas.watches import WatchCreate, WatchHeartbeat, WatchResponse, WatchSessionCreate
+from .pagination import keyset_page
+from .rollup_service import RollupService
 
 class WatchService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_watch(self, watch: WatchCreate):
-        """Create a new watch record - stub implementation."""
-        return {"message": "Watch service not implemented yet"}
+    def create_watch(self, watch: WatchCreate) -> Optional[Watch]:
+        """Record a watch and add it to the stats rollups. Returns ``None`` if the content does not exist."""
+        if self.db.get(Content, watch.content_id) is None:
+            return None
 
-    def get_watch_history(self, **kwargs):
-        """Get watch history - stub implementation."""
-        return []
+        db_watch = Watch(**watch.model_dump())
+        self.db.add(db_watch)
+        self.db.flush()
+        RollupService(self.db).apply([db_watch])
+        self.db.commit()
+        cache.invalidate(cache.WATCHES)
+        self.db.refresh(db_watch)
+        return db_watch
 
-    def get_watch(self, watch_id: int):
-        """Get watch by ID - stub implementation."""
-        return None
+    def record_watches(self, watches: Sequence[WatchCreate]) -> int:
+        """Insert many watches with one bulk INSERT and apply them to the rollups.
+
+        Everything happens in a single transaction. Watches of content or
+        platforms that do not exist are skipped; returns the number recorded.
+        """
+        rows = [watch.model_dump() for watch in watches]
+        if not rows:
+            return 0
+        known = {
+            content_id for (content_id,) in
+            self.db.query(Content.id).filter(Content.id.in_({row["content_id"] for row in rows}))
+        }
+        platform_ids = {row["platform_id"] for row in rows if row["platform_id"] is not None}
+        known_platforms = {
+            platform_id for (platform_id,) in
+            self.db.query(Platform.id).filter(Platform.id.in_(platform_ids))
+        } if platform_ids else set()
+        rows = [
+            row for row in rows
+            if row["content_id"] in known and (row["platform_id"] is None or row["platform_id"] in known_platforms)
+        ]
+        if not rows:
+            return 0
+
+        self.db.execute(insert(Watch), rows)
+        # Rollups only need the field values, so transient objects will do
+        RollupService(self.db).apply(Watch(**row) for row in rows)
+        self.db.commit()
+        cache.invalidate(cache.WATCHES)
+        return len(rows)
+
+    def get_watch_history(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        content_id: Optional[int] = None,
+        platform_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None
+    ) -> List[Watch]:
+        """Watches, most recent first, with optional filters.
+        
+        Pages with ``cursor`` (from ``next_cursor``) when given, else skip/limit.
+        """
+        query = self.db.query(Watch)
+
+        if content_id is not None:
+            query = query.filter(Watch.content_id == content_id)
+        if platform_id is not None:
+            query = query.filter(Watch.platform_id == platform_id)
+        if start_date is not None:
+            query = query.filter(Watch.watched_at >= start_date)
+        if end_date is not None:
+            query = query.filter(Watch.watched_at <= end_date)
+
+        return keyset_page(query, Watch.watched_at, Watch.id, limit, skip, cursor).all()
+
+    def get_watch(self, watch_id: int) -> Optional[Watch]:
+        return self.db.query(Watch).filter(Watch.id == watch_id).first()
 
     def delete_watch(self, watch_id: int) -> bool:
-        """Delete watch - stub implementation."""
-        return False
+        """Delete a watch and take it back out of the stats rollups."""
+        db_watch = self.get_watch(watch_id)
+        if not db_watch:
+            return False
+
+        RollupService(self.db).apply([db_watch], sign=-1)
+        self.db.delete(db_watch)
+        self.db.commit()
+        cache.invalidate(cache.WATCHES)
+        return True
+
+    def start_watch_session(self, session: WatchSessionCreate) -> Optional[WatchSession]:
+        """Open a watch session. Returns ``None`` if the content does not exist."""
+        if self.db.get(Content, session.content_id) is None:
+            return None
+
+        data = session.model_dump()
+        db_session = WatchSession(
+            **data,
+            end_position=data["start_position"],
+            paused_duration=0,
+            interruptions=0,
+            last_heartbeat_at=datetime.now()
+        )
+        self.db.add(db_session)
+        self.db.commit()
+        self.db.refresh(db_session)
+        return db_session
+
+    def end_watch_session(
+        self,
+        session_id: int,
+        end_position: float,
+        heartbeat: Optional[WatchHeartbeat] = None
+    ) -> Optional[WatchSession]:
+        """Close a session at ``end_position``; ``heartbeat`` is its last unwritten heartbeat, if any.
+
+        Ending a session that is already closed returns it unchanged.
+        """
+        db_session = self.db.get(WatchSession, session_id)
+        if db_session is None or db_session.ended_at is not None:
+            return db_session
+
+        if heartbeat is not None:
+            if heartbeat.paused_duration is not None:
+                db_session.paused_duration = heartbeat.paused_duration
+            if heartbeat.interruptions is not None:
+                db_session.interruptions = heartbeat.interruptions
+        now = datetime.now()
+        db_session.end_position = end_position
+        db_session.ended_at = now
+        db_session.last_heartbeat_at = now
+        self.db.commit()
+        self.db.refresh(db_session)
+        return db_session
+
+    def apply_heartbeats(self, heartbeats: Mapping[int, WatchHeartbeat], at: Optional[datetime] = None) -> int:
+        """Write the latest heartbeat of each open session in one batched UPDATE.
 
-    def start_watch_session(self, session: WatchSessionCreate):
-        """Start watch session - stub implementation."""
-        return {"message": "Watch session service not implemented yet"}
+        Heartbeats of sessions that are closed or do not exist are ignored.
+        Returns the number of sessions updated.
+        """
+        if not heartbeats:
+            return 0
+        table = WatchSession.__table__
+        statement = update(table).where(
+            table.c.id == bindparam("session_id"),
+            table.c.ended_at.is_(None)
+        ).values(
+            end_position=bindparam("position"),
+            paused_duration=func.coalesce(bindparam("paused", type_=table.c.paused_duration.type), table.c.paused_duration),
+            interruptions=func.coalesce(bindparam("interrupted", type_=table.c.interruptions.type), table.c.interruptions),
+            last_heartbeat_at=bindparam("seen_at")
+        )
+        at = at or datetime.now()
+        result = self.db.execute(statement, [
+            {
+                "session_id": session_id,
+                "position": heartbeat.position,
+                "paused": heartbeat.paused_duration,
+                "interrupted": heartbeat.interruptions,
+                "seen_at": at,
+            }
+            for session_id, heartbeat in heartbeats.items()
+        ])
+        self.db.commit()
+        return result.rowcount
 
-    def end_watch_session(self, session_id: int, end_position: float):
-        """End watch session - stub implementation."""
-        return {"message": "Watch session ended"}
+    def close_idle_sessions(self, idle_since: datetime) -> int:
+        """End open sessions without a heartbeat since ``idle_since``, at their last heartbeat."""
+        last_seen = func.coalesce(WatchSession.last_heartbeat_at, WatchSession.started_at)
+        result = self.db.execute(
+            update(WatchSession)
+            .where(WatchSession.ended_at.is_(None), last_seen < idle_since)
+            .values(ended_at=last_seen)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount
 
     def get_watch_count(self, content_id: int) -> int:
-        """Get watch count - stub implementation."""
-        return 0
+        """All-time watches of a title, read from its counter row."""
+        count = self.db.query(ContentWatchStats.watches).filter(
+            ContentWatchStats.content_id == content_id
+        ).scalar()
+        return count or 0
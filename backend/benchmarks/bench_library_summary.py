@@ -0,0 +1,121 @@
+"""Library summary cost: per-call-site queries versus one aggregate pass.
+
+    python -m benchmarks.bench_library_summary --rows 50000
+
+Times the previous ContentService.get_statistics (four counts and a
+group-by) and the previous AI analysis loop (load every row, count in
+Python) against library_summary, and reports the SQL round trips of each.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, enable_sqlite_transactions
+from app.models import content as _content, search as _search, taxonomy as _taxonomy  # noqa: F401 (register tables)
+from app.models.content import Content
+from app.services.library_summary import library_summary
+from app.services.taxonomy_service import TaxonomyService
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama",
+          "Family", "Fantasy", "History", "Horror", "Music", "Mystery", "Romance",
+          "Science Fiction", "Thriller", "War", "Western"]
+STATUSES = ["planned", "watching", "completed", "dropped", "on_hold"]
+
+
+def seed(session, rows: int, seed_value: int = 42) -> None:
+    rng = random.Random(seed_value)
+    session.execute(insert(Content), [
+        {
+            "title": f"Title {i}",
+            "content_type": rng.choice(["movie", "tv"]),
+            "overview": "An overview of a few sentences. " * 8,
+            "genres": rng.sample(GENRES, rng.randint(1, 3)),
+            "cast": [f"Actor {rng.randrange(5000)}" for _ in range(6)],
+            "status": rng.choice(STATUSES),
+            "is_favorite": rng.random() < 0.1,
+        }
+        for i in range(rows)
+    ])
+    session.commit()
+    TaxonomyService(session).backfill()
+    session.commit()
+
+
+def previous_statistics(session):
+    """Previous ContentService.get_statistics."""
+    return {
+        "total_content": session.query(Content).count(),
+        "movies": session.query(Content).filter(Content.content_type == "movie").count(),
+        "tv_shows": session.query(Content).filter(Content.content_type == "tv").count(),
+        "favorites": session.query(Content).filter(Content.is_favorite.is_(True)).count(),
+        "status_breakdown": dict(session.query(Content.status, func.count(Content.id)).group_by(Content.status).all()),
+    }
+
+
+def previous_analysis(session):
+    """Previous AIService.analyze_viewing_patterns."""
+    user_content = session.query(Content).all()
+    completed = len([c for c in user_content if c.status == "completed"])
+    genre_counts = {}
+    for content in user_content:
+        for genre in content.genres or []:
+            genre_counts[genre] = genre_counts.get(genre, 0) + 1
+    return completed, sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:3]
+
+
+def measure(fn, session, repeat):
+    statements = []
+
+    def listener(*args):
+        statements.append(1)
+
+    event.listen(session.get_bind(), "before_cursor_execute", listener)
+    timings = []
+    try:
+        for _ in range(repeat):
+            session.expunge_all()
+            start = time.perf_counter()
+            fn(session)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", listener)
+    return timings, len(statements) // repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        enable_sqlite_transactions(engine)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+        start = time.perf_counter()
+        seed(session, args.rows)
+        print(f"Seeded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        for name, fn in (
+            ("get_statistics (old)", previous_statistics),
+            ("ai analysis (old)", previous_analysis),
+            ("library_summary", library_summary),
+        ):
+            timings, round_trips = measure(fn, session, args.repeat)
+            print(f"{name:22s} median {statistics.median(timings):8.2f} ms   "
+                  f"max {max(timings):8.2f} ms   {round_trips} round trips")
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
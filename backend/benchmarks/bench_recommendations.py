@@ -0,0 +1,57 @@
+"""Recommendation latency on a synthetic library.
+
+    python -m benchmarks.bench_recommendations --rows 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.services.recommendation_service import KNOWN_GENRES, ContentFeatures
+
+
+def synthetic_rows(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    people = [f"Person {i}" for i in range(5000)]
+    for i in range(count):
+        yield {
+            "id": i + 1,
+            "title": f"Title {i}",
+            "content_type": rng.choice(["movie", "tv"]),
+            "genres": rng.sample(KNOWN_GENRES[:19], rng.randint(1, 3)),
+            "cast": rng.sample(people, 5),
+            "director": rng.choice(people),
+            "tmdb_rating": round(rng.uniform(1, 10), 1),
+            "runtime": rng.randint(20, 180),
+            "status": rng.choices(["planned", "completed", "watching", "dropped"], [6, 3, 1, 0.5])[0],
+            "is_favorite": rng.random() < 0.05,
+            "personal_rating": rng.choice([None, None, rng.randint(1, 10)]),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    features = ContentFeatures()
+    start = time.perf_counter()
+    features.upsert(synthetic_rows(args.rows))
+    print(f"Built {args.rows}-row feature matrix in {time.perf_counter() - start:.2f}s")
+
+    timings = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        profile = features.profile(genres=[KNOWN_GENRES[i % 19]])
+        features.recommend(profile, limit=10)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"profile + recommend   median {statistics.median(timings):.2f} ms   max {max(timings):.2f} ms")
+
+    start = time.perf_counter()
+    features.upsert(synthetic_rows(1, seed=1))
+    print(f"incremental upsert    {(time.perf_counter() - start) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Compare library search implementations on a synthetic library.
+
+    python -m benchmarks.bench_search --rows 50000 --queries 200
+
+Measures the previous title ILIKE query and the previous Python-side
+substring scan (AIService.semantic_search) against the FTS index.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from faker import Faker
+from sqlalchemy import create_engine, desc, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, enable_sqlite_transactions
+from app.models import content as _content, search as _search, taxonomy as _taxonomy  # noqa: F401 (register tables)
+from app.models.content import Content
+from app.services.search_service import SearchService
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama",
+          "Family", "Fantasy", "History", "Horror", "Music", "Mystery", "Romance",
+          "Science Fiction", "Thriller", "War", "Western"]
+
+
+def seed(session, rows: int, seed_value: int = 42) -> None:
+    fake = Faker()
+    Faker.seed(seed_value)
+    rng = random.Random(seed_value)
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "title": fake.catch_phrase(),
+            "content_type": rng.choice(["movie", "tv"]),
+            "overview": fake.paragraph(nb_sentences=3),
+            "genres": rng.sample(GENRES, rng.randint(1, 3)),
+            "cast": [fake.name() for _ in range(5)],
+            "director": fake.name(),
+            "tmdb_rating": round(rng.uniform(1, 10), 1),
+        })
+        if len(batch) == 5000:
+            session.execute(insert(Content), batch)
+            batch = []
+    if batch:
+        session.execute(insert(Content), batch)
+    session.commit()
+
+
+def ilike_search(session, query):
+    """Previous ContentService.search_content."""
+    return session.query(Content).filter(Content.title.ilike(f"%{query}%")).order_by(
+        desc(Content.tmdb_rating)).limit(20).all()
+
+
+def python_scan(session, query):
+    """Previous AIService.semantic_search."""
+    results = []
+    query_lower = query.lower()
+    for content in session.query(Content).all():
+        score = 0
+        if query_lower in content.title.lower():
+            score += 10
+        for genre in content.genres or []:
+            if query_lower in genre.lower():
+                score += 5
+        if content.overview and query_lower in content.overview.lower():
+            score += 3
+        if score > 0:
+            results.append((score, content))
+    results.sort(key=lambda r: r[0], reverse=True)
+    return results[:20]
+
+
+def fts_search(session, query):
+    return SearchService(session).search(query, limit=20)
+
+
+def time_queries(fn, session, queries):
+    timings = []
+    for query in queries:
+        session.expunge_all()
+        start = time.perf_counter()
+        fn(session, query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--scan-queries", type=int, default=5, help="queries for the slow Python scan")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        enable_sqlite_transactions(engine)
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+        start = time.perf_counter()
+        seed(session, args.rows)
+        print(f"Seeded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        words = Faker().words(args.queries)
+        for name, fn, queries in (
+            ("title ILIKE", ilike_search, words),
+            ("python scan", python_scan, words[:args.scan_queries]),
+            ("fts index", fts_search, words),
+        ):
+            timings = time_queries(fn, session, queries)
+            print(f"{name:12s} median {statistics.median(timings):8.2f} ms   "
+                  f"max {max(timings):8.2f} ms   ({len(queries)} queries)")
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Per-item cost of serializing a content list page.
+
+    python -m benchmarks.bench_serialization --items 1000
+
+Builds one page of fully populated Content rows, validates them into
+ContentResponse models once (``model_validate`` with ``from_attributes``,
+which every path needs and is reported separately), and times turning the
+models into response bytes:
+
+  fastapi default   what FastAPI does for a ``response_model``: validate the
+                    models again, ``jsonable_encoder``, stdlib ``json``
+  jsonable + json   ``jsonable_encoder`` and stdlib ``json`` (the previous
+                    response cache path)
+  dump_json         one pydantic-core call (``app.responses.dump_json``)
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.content import Content
+from app.responses import dump_json
+from app.schemas.content import ContentResponse
+
+
+def make_rows(count: int) -> List[Content]:
+    created = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        Content(
+            id=i,
+            title=f"Title {i}",
+            content_type="movie" if i % 2 else "tv",
+            overview="An overview of a few sentences. " * 8,
+            release_date=created - timedelta(days=i),
+            runtime=100 + i % 60,
+            tmdb_id=1000 + i,
+            tmdb_rating=7.5,
+            poster_path=f"/poster{i}.jpg",
+            backdrop_path=f"/backdrop{i}.jpg",
+            genres=["Drama", "Crime", "Thriller"],
+            cast=[f"Actor {j}" for j in range(6)],
+            director="Director",
+            countries=["US"],
+            languages=["en"],
+            status="planned",
+            is_favorite=bool(i % 3),
+            created_at=created,
+            updated_at=created,
+        )
+        for i in range(count)
+    ]
+
+
+RESPONSE_FIELD = create_response_field(name="response", type_=List[ContentResponse])
+
+
+def fastapi_default(items):
+    content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=items, is_coroutine=True))
+    return json.dumps(content).encode()
+
+
+def jsonable_json(items):
+    return json.dumps(jsonable_encoder(items), separators=(",", ":")).encode()
+
+
+def per_item_us(fn, arg, items: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) / items * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.items)
+
+    def validate(rows):
+        return [ContentResponse.model_validate(row) for row in rows]
+
+    items = validate(rows)
+    assert json.loads(fastapi_default(items)) == json.loads(jsonable_json(items)) == json.loads(dump_json(items))
+
+    print(f"{'model_validate':16s} {per_item_us(validate, rows, args.items, args.repeat):7.2f} us/item   (every path)")
+    baseline = None
+    for name, fn in (
+        ("fastapi default", fastapi_default),
+        ("jsonable + json", jsonable_json),
+        ("dump_json", dump_json),
+    ):
+        cost = per_item_us(fn, items, args.items, args.repeat)
+        baseline = baseline or cost
+        print(f"{name:16s} {cost:7.2f} us/item   {baseline / cost:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Concurrent commit throughput on SQLite: library defaults versus the tuned engine.
+
+    python -m benchmarks.bench_sqlite_pragmas --writers 8 --commits 200 --readers 4
+
+Each writer thread commits one watch per transaction while reader threads
+run the stats overview query in a loop. ``default`` is a bare
+``create_engine``; ``tuned`` is ``app.database.make_engine`` (WAL,
+synchronous=NORMAL, busy_timeout, sized pool) with readers on the
+read-only pool.
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, enable_sqlite_transactions, make_engine
+from app.models import content as _content, rollups as _rollups, search as _search, taxonomy as _taxonomy, watches as _watches  # noqa: F401 (register tables)
+from app.models.content import Content
+from app.models.watches import Watch
+from app.services.stats_service import StatsService
+
+
+def default_engines(url):
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    enable_sqlite_transactions(engine)
+    return engine, engine
+
+
+def tuned_engines(url):
+    return make_engine(url), make_engine(url, read_only=True)
+
+
+def run(engines, writers: int, commits: int, readers: int):
+    write_engine, read_engine = engines
+    Base.metadata.create_all(write_engine)
+    with write_engine.begin() as connection:
+        connection.execute(insert(Content), [{"title": f"Title {i}", "content_type": "movie"} for i in range(100)])
+
+    latencies, errors, reads = [], [], []
+    done = threading.Event()
+    start_time = datetime(2024, 1, 1)
+
+    def writer(n):
+        Session = sessionmaker(bind=write_engine)
+        for i in range(commits):
+            start = time.perf_counter()
+            try:
+                with Session() as session:
+                    session.add(Watch(content_id=i % 100 + 1, watched_at=start_time + timedelta(minutes=n * commits + i), duration_watched=45))
+                    session.commit()
+                latencies.append((time.perf_counter() - start) * 1000)
+            except OperationalError:
+                errors.append(1)
+
+    def reader():
+        Session = sessionmaker(bind=read_engine)
+        while not done.is_set():
+            try:
+                with Session() as session:
+                    StatsService(session).get_viewing_time_stats("all")
+                reads.append(1)
+            except OperationalError:
+                errors.append(1)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    background = [threading.Thread(target=reader) for _ in range(readers)]
+    start = time.perf_counter()
+    for thread in threads + background:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in background:
+        thread.join()
+    for engine in {write_engine, read_engine}:
+        engine.dispose()
+    return latencies, errors, len(reads), elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--commits", type=int, default=200, help="commits per writer")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--dir", help="directory for the database file (fsync cost depends on the disk)")
+    args = parser.parse_args(argv)
+
+    for name, factory in (("default", default_engines), ("tuned", tuned_engines)):
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            latencies, errors, reads, elapsed = run(
+                factory(f"sqlite:///{Path(tmp) / 'bench.db'}"), args.writers, args.commits, args.readers
+            )
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        print(f"{name:8s} {len(latencies) / elapsed:7.0f} commits/s   p50 {statistics.median(latencies or [0]):7.2f} ms   "
+              f"p95 {p95:7.2f} ms   {reads / elapsed:6.0f} reads/s   {len(errors)} locked errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Stats endpoint latency over a seeded watch history.
+
+    python -m benchmarks.bench_stats --watches 1000000
+
+Times each StatsService method against a synthetic history spread over
+five years. ``--no-indexes`` drops the watches indexes for comparison.
+The history is inserted in bulk, so the rollup tables are built with a
+single rebuild afterwards.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, enable_sqlite_transactions
+from app.models import content as _content, search as _search, taxonomy as _taxonomy, watches as _watches  # noqa: F401 (register tables)
+from app.models.content import Content, Platform
+from app.models.watches import Watch
+from app.services.rollup_service import RollupService
+from app.services.stats_service import StatsService
+from app.services.taxonomy_service import TaxonomyService
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama",
+          "Family", "Fantasy", "History", "Horror", "Music", "Mystery", "Romance",
+          "Science Fiction", "Thriller", "War", "Western"]
+PLATFORMS = ["Netflix", "Prime Video", "Disney+", "Max", "Apple TV+", "Cinema"]
+HISTORY_DAYS = 5 * 365
+
+
+def seed(session, titles: int, watches: int, seed_value: int = 42) -> None:
+    rng = random.Random(seed_value)
+    session.execute(insert(Platform), [{"name": name} for name in PLATFORMS])
+    session.execute(insert(Content), [
+        {
+            "title": f"Title {i}",
+            "content_type": rng.choice(["movie", "tv"]),
+            "genres": rng.sample(GENRES, rng.randint(1, 3)),
+            "status": rng.choice(["planned", "watching", "completed", "dropped"]),
+            "personal_rating": rng.choice([None, rng.randint(1, 10)]),
+        }
+        for i in range(titles)
+    ])
+    session.commit()
+    TaxonomyService(session).backfill()
+
+    end = datetime.now()
+    batch = []
+    for _ in range(watches):
+        batch.append({
+            "content_id": rng.randint(1, titles),
+            "platform_id": rng.randint(1, len(PLATFORMS)),
+            "watched_at": end - timedelta(minutes=rng.randint(0, HISTORY_DAYS * 24 * 60)),
+            "duration_watched": rng.randint(20, 180),
+            "completion_percentage": rng.choice([100.0, 100.0, 100.0, rng.uniform(5, 95)]),
+        })
+        if len(batch) == 20000:
+            session.execute(insert(Watch), batch)
+            batch = []
+    if batch:
+        session.execute(insert(Watch), batch)
+    session.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--watches", type=int, default=1000000)
+    parser.add_argument("--titles", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-indexes", action="store_true", help="drop the watches indexes first")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        enable_sqlite_transactions(engine)
+        Base.metadata.create_all(engine)
+        if args.no_indexes:
+            for index in Watch.__table__.indexes:
+                index.drop(engine)
+        session = sessionmaker(bind=engine)()
+
+        start = time.perf_counter()
+        seed(session, args.titles, args.watches)
+        with engine.connect() as connection:
+            connection.exec_driver_sql("ANALYZE")
+        print(f"Seeded {args.watches} watches over {args.titles} titles in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        RollupService(session).rebuild()
+        print(f"Rebuilt rollups in {time.perf_counter() - start:.1f}s")
+
+        today = datetime.now()
+        service = StatsService(session)
+        for name, call in (
+            ("overview", service.get_overview_stats),
+            ("viewing-time week", lambda: service.get_viewing_time_stats("week")),
+            ("viewing-time all", lambda: service.get_viewing_time_stats("all")),
+            ("platforms month", lambda: service.get_platform_stats("month")),
+            ("trending week", lambda: service.get_trending_content("week", 10)),
+            ("ratings", service.get_rating_stats),
+            ("completion", service.get_completion_stats),
+            ("personal-records", service.get_personal_records),
+            ("monthly-summary", lambda: service.get_monthly_summary(today.year, today.month)),
+            ("year-in-review", lambda: service.get_year_in_review(today.year - 1)),
+        ):
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{name:18s} median {statistics.median(timings):9.2f} ms   max {max(timings):9.2f} ms")
+
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
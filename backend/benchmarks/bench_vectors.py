@@ -0,0 +1,68 @@
+"""Vector index latency and recall at library scale.
+
+    python -m benchmarks.bench_vectors --rows 100000 --queries 200
+
+Uses clustered synthetic unit vectors (real embeddings are clustered by
+genre/cast, unlike uniform noise) and compares IVF search with exact search.
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+
+
+def clustered_vectors(rows: int, dim: int, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, rows)] + 0.5 * rng.normal(size=(rows, dim))
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def timed(fn, queries):
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        timings.append((time.perf_counter() - start) * 1000)
+    return results, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    vectors = clustered_vectors(args.rows, args.dim)
+    queries = clustered_vectors(args.queries, args.dim, seed=1)
+
+    exact = VectorIndex(args.dim, ivf_threshold=args.rows + 1)
+    exact.upsert(range(args.rows), vectors)
+
+    start = time.perf_counter()
+    ivf = VectorIndex(args.dim, nprobe=args.nprobe, ivf_threshold=args.rows + 1)
+    ivf.upsert(range(args.rows), vectors)
+    ivf.ivf_threshold = 0
+    ivf.train()
+    print(f"Built IVF index over {args.rows} x {args.dim} in {time.perf_counter() - start:.2f}s")
+
+    truth, exact_ms = timed(lambda q: exact.search(q, args.k), queries)
+    approx, ivf_ms = timed(lambda q: ivf.search(q, args.k), queries)
+    recall = np.mean([
+        len({i for i, _ in a} & {i for i, _ in t}) / args.k for a, t in zip(approx, truth)
+    ])
+
+    print(f"exact  median {statistics.median(exact_ms):7.2f} ms   p99 {np.percentile(exact_ms, 99):7.2f} ms")
+    print(f"ivf    median {statistics.median(ivf_ms):7.2f} ms   p99 {np.percentile(ivf_ms, 99):7.2f} ms   "
+          f"recall@{args.k} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
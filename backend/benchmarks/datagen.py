@@ -0,0 +1,214 @@
+"""Seeded synthetic libraries for benchmarks and load tests.
+
+    python -m benchmarks.datagen --database-url sqlite:///./bench.db --content 100000 --watches 2000000
+
+Fills an empty database with content rows that look like TMDB imports
+(genres, cast and crew JSON, ratings, a popularity skew), platforms, and a
+watch history spread over ``--days`` days, then brings the derived tables up
+to date the way production does: facet tables, watch rollups, the
+full-text index and, with ``--embed``, embeddings. History ends at midnight
+today, so period stats ("this month") have data; the same seed on the same
+day produces the same library.
+
+Faker generates pools of names, titles and overviews once; rows are then
+assembled from the pools with ``random.Random``, which keeps a million-row
+library to a couple of minutes instead of hours of per-row Faker calls.
+"""
+import argparse
+import math
+import random
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional
+
+from faker import Faker
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base, make_engine
+from app.models import content as _content, rollups as _rollups, search as _search, taxonomy as _taxonomy, watches as _watches  # noqa: F401 (register tables)
+from app.models.content import Content, Platform
+from app.models.search import rebuild_search_index
+from app.models.watches import Watch, WatchLocation
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama",
+          "Family", "Fantasy", "History", "Horror", "Music", "Mystery", "Romance",
+          "Science Fiction", "Thriller", "War", "Western"]
+STATUSES = ["planned", "watching", "completed", "dropped", "on_hold"]
+STATUS_WEIGHTS = [40, 10, 40, 5, 5]
+PLATFORMS = ["Netflix", "Prime Video", "Disney+", "Max", "Hulu", "Apple TV+", "Paramount+", "Peacock"]
+COUNTRIES = ["US", "GB", "FR", "DE", "JP", "KR", "IN", "ES", "IT", "CA"]
+LANGUAGES = ["en", "fr", "de", "ja", "ko", "hi", "es", "it"]
+MOODS = ["relaxed", "excited", "thoughtful", "bored", "happy", "sad"]
+LOCATIONS = list(WatchLocation)
+
+BATCH_SIZE = 5000
+
+
+class LibraryGenerator:
+    """Deterministic rows for ``Content``, ``Platform`` and ``Watch``."""
+
+    def __init__(self, seed: int = 42, people: int = 5000, titles: int = 20000, now: Optional[datetime] = None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.people = [fake.name() for _ in range(people)]
+        self.titles = [fake.catch_phrase() for _ in range(titles)]
+        self.overviews = [fake.paragraph(nb_sentences=4) for _ in range(2000)]
+        self.companies = [fake.company() for _ in range(500)]
+        self.now = now or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def content_rows(self, count: int) -> Iterator[Dict]:
+        rng = self.rng
+        for i in range(count):
+            content_type = "movie" if rng.random() < 0.65 else "tv"
+            added = self.now - timedelta(seconds=rng.randrange(3 * 365 * 86400))
+            row = {
+                # Unique titles: pool entries repeat once the pool is exhausted
+                "title": f"{self.titles[i % len(self.titles)]}" + (f" {i // len(self.titles) + 1}" if i >= len(self.titles) else ""),
+                "content_type": content_type,
+                "tmdb_id": 100000 + i,
+                "overview": rng.choice(self.overviews),
+                "release_date": datetime(rng.randint(1960, 2024), rng.randint(1, 12), rng.randint(1, 28)),
+                "runtime": rng.randint(80, 180) if content_type == "movie" else None,
+                "poster_path": f"/p{i}.jpg",
+                "tmdb_rating": round(min(10.0, max(1.0, rng.gauss(6.8, 1.1))), 1),
+                "genres": rng.sample(GENRES, rng.randint(1, 3)),
+                "cast": rng.sample(self.people, 8),
+                "director": rng.choice(self.people),
+                "production_companies": rng.sample(self.companies, 2),
+                "countries": [rng.choice(COUNTRIES)],
+                "languages": [rng.choice(LANGUAGES)],
+                "status": rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+                "is_favorite": rng.random() < 0.08,
+                "personal_rating": round(rng.uniform(3, 10), 1) if rng.random() < 0.4 else None,
+                "created_at": added,
+                "updated_at": added,
+                "number_of_seasons": None,
+                "number_of_episodes": None,
+                "episode_run_time": None,
+            }
+            if content_type == "tv":
+                row["number_of_seasons"] = rng.randint(1, 10)
+                row["number_of_episodes"] = row["number_of_seasons"] * rng.randint(6, 22)
+                row["episode_run_time"] = [rng.choice([22, 30, 45, 60])]
+            yield row
+
+    def watch_rows(self, count: int, content_ids: List[int], platform_ids: List[int], days: int) -> Iterator[Dict]:
+        """Watches with a long-tail popularity: a few titles get most of the views."""
+        rng = self.rng
+        if not content_ids:
+            return
+        # Zipf-like weights over a shuffled order of titles
+        order = content_ids[:]
+        rng.shuffle(order)
+        cumulative = list(accumulate(1 / math.pow(rank, 1.1) for rank in range(1, len(order) + 1)))
+        total = cumulative[-1]
+        for _ in range(count):
+            position = min(bisect_left(cumulative, rng.random() * total), len(order) - 1)
+            watched_at = self.now - timedelta(seconds=rng.randrange(days * 86400))
+            yield {
+                "content_id": order[position],
+                "watched_at": watched_at,
+                "platform_id": rng.choice(platform_ids) if rng.random() < 0.85 else None,
+                "duration_watched": rng.randint(20, 160),
+                "completion_percentage": 100.0 if rng.random() < 0.7 else round(rng.uniform(5, 99), 1),
+                "watch_location": rng.choice(LOCATIONS),
+                "watch_mood": rng.choice(MOODS),
+                "rating_after_watch": round(rng.uniform(4, 10), 1) if rng.random() < 0.3 else None,
+                "created_at": watched_at,
+                "updated_at": watched_at,
+            }
+
+
+def _insert_batches(session: Session, model, rows: Iterator[Dict], batch_size: int = BATCH_SIZE) -> int:
+    # Core executemany on the table: the ORM bulk path costs ~2.5x per row
+    table = model.__table__
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            session.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        session.execute(insert(table), batch)
+        total += len(batch)
+    session.commit()
+    return total
+
+
+def populate(
+    session: Session,
+    content: int = 10000,
+    watches: int = 100000,
+    days: int = 730,
+    seed: int = 42,
+    embed: bool = False,
+    log=None
+) -> Dict[str, int]:
+    """Fill an empty database through ``session`` and build every derived table."""
+    from app.services.rollup_service import RollupService
+    from app.services.taxonomy_service import TaxonomyService
+
+    log = log or (lambda message: None)
+    generator = LibraryGenerator(seed)
+    started = time.perf_counter()
+
+    session.execute(insert(Platform), [{"name": name} for name in PLATFORMS])
+    platform_ids = [row.id for row in session.query(Platform.id)]
+    inserted = _insert_batches(session, Content, generator.content_rows(content))
+    log(f"content: {inserted} rows ({time.perf_counter() - started:.1f}s)")
+
+    content_ids = [row.id for row in session.query(Content.id)]
+    recorded = _insert_batches(session, Watch, generator.watch_rows(watches, content_ids, platform_ids, days))
+    log(f"watches: {recorded} rows ({time.perf_counter() - started:.1f}s)")
+
+    TaxonomyService(session).backfill()
+    session.commit()
+    RollupService(session).rebuild()
+    rebuild_search_index(session.connection())
+    session.commit()
+    log(f"facets, rollups, search index ({time.perf_counter() - started:.1f}s)")
+
+    if embed:
+        from app.services.embedding_service import EmbeddingService
+        EmbeddingService(session).embed_pending()
+        log(f"embeddings ({time.perf_counter() - started:.1f}s)")
+    return {"content": inserted, "watches": recorded, "platforms": len(platform_ids)}
+
+
+def create_library(database_url: str, **options) -> Dict[str, int]:
+    """Create the schema at ``database_url`` and populate it."""
+    engine = make_engine(database_url)
+    try:
+        Base.metadata.create_all(engine)
+        with sessionmaker(bind=engine)() as session:
+            return populate(session, **options)
+    finally:
+        engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--content", type=int, default=10000, help="content rows")
+    parser.add_argument("--watches", type=int, default=100000, help="watch rows")
+    parser.add_argument("--days", type=int, default=730, help="days of watch history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--embed", action="store_true", help="also compute content embeddings")
+    args = parser.parse_args(argv)
+
+    counts = create_library(
+        args.database_url, content=args.content, watches=args.watches, days=args.days,
+        seed=args.seed, embed=args.embed, log=print
+    )
+    print(f"Generated {counts['content']} titles and {counts['watches']} watches in {args.database_url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Load test: sync routes on the threadpool versus async routes on AsyncSession.
+
+    python -m benchmarks.load_async --clients 300 --requests 3000 --query-ms 20
+
+Serves the same two endpoints through both database paths from one uvicorn
+worker process and drives them with concurrent HTTP clients from this one:
+
+  /sync/...   ``def`` route, ``Session`` from the sync engine (Starlette threadpool)
+  /async/...  ``async def`` route, ``AsyncSession`` with ``run_sync`` (event loop)
+
+``--query-ms`` makes every request run a query that takes that long inside
+the database (a SQLite function that sleeps), standing in for a slow or
+remote database. With ``--database-url`` pointing at PostgreSQL the slow
+query is ``pg_sleep``.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.database import Base, async_database_url, enable_sqlite_transactions
+from app.models import content as _content, search as _search, taxonomy as _taxonomy, watches as _watches  # noqa: F401 (register tables)
+from app.models.content import Content
+from app.schemas.content import ContentListItem
+from app.services.content_service import ContentService
+
+
+def install_sleep(engine) -> None:
+    """Register ``sleep_ms(n)`` on every SQLite connection of ``engine``."""
+    @event.listens_for(engine, "connect")
+    def _register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+def slow_query(dialect: str, ms: int):
+    if dialect == "postgresql":
+        return text("SELECT pg_sleep(:seconds)").bindparams(seconds=ms / 1000)
+    return text("SELECT sleep_ms(:ms)").bindparams(ms=ms)
+
+
+def build_app(database_url: str, query_ms: int, pool_size: int) -> FastAPI:
+    # Same pool on both sides (aiosqlite would otherwise default to NullPool)
+    pool = {"pool_size": pool_size, "max_overflow": 0, "pool_timeout": 120}
+    sync_engine = create_engine(database_url, poolclass=QueuePool, **pool)
+    async_engine = create_async_engine(async_database_url(database_url), poolclass=AsyncAdaptedQueuePool, **pool)
+    for engine in (sync_engine, async_engine.sync_engine):
+        enable_sqlite_transactions(engine)
+        if engine.dialect.name == "sqlite":
+            install_sleep(engine)
+    SyncSession = sessionmaker(bind=sync_engine, autoflush=False)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    slow = slow_query(sync_engine.dialect.name, query_ms)
+
+    def get_db():
+        with SyncSession() as db:
+            yield db
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    def content_page(session: Session):
+        if query_ms:
+            session.execute(slow)
+        return [ContentListItem.model_validate(c) for c in ContentService(session).get_content_list(limit=20)]
+
+    def statistics_(session: Session):
+        if query_ms:
+            session.execute(slow)
+        return ContentService(session).get_statistics()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        # Pooled aiosqlite connections each own a thread that would keep the worker alive
+        await async_engine.dispose()
+        sync_engine.dispose()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/sync/content")
+    def sync_content(db: Session = Depends(get_db)):
+        return content_page(db)
+
+    @app.get("/async/content")
+    async def async_content(db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(content_page)
+
+    @app.get("/sync/statistics")
+    def sync_statistics(db: Session = Depends(get_db)):
+        return statistics_(db)
+
+    @app.get("/async/statistics")
+    async def async_statistics(db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(statistics_)
+
+    return app
+
+
+def create_app() -> FastAPI:
+    """uvicorn ``--factory`` entry point, configured by ``main`` through the environment."""
+    return build_app(
+        os.environ["LOAD_DATABASE_URL"], int(os.environ["LOAD_QUERY_MS"]), int(os.environ["LOAD_POOL_SIZE"])
+    )
+
+
+def seed(database_url: str, rows: int) -> None:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Content), [
+            {"title": f"Title {i}", "content_type": "movie" if i % 2 else "tv", "genres": ["Drama"]}
+            for i in range(rows)
+        ])
+    engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def drive(base_url: str, path: str, clients: int, requests: int):
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                except httpx.TransportError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += response.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def report(name: str, latencies, errors: int, elapsed: float) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:20s} {len(latencies) / elapsed:8.0f} req/s   p50 {statistics.median(latencies):8.1f} ms   "
+          f"p95 {p95:8.1f} ms   max {latencies[-1]:8.1f} ms   errors {errors}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=300, help="concurrent HTTP clients")
+    parser.add_argument("--requests", type=int, default=3000, help="requests per endpoint")
+    parser.add_argument("--query-ms", type=int, default=20, help="simulated database time per request")
+    parser.add_argument("--pool-size", type=int, default=100, help="connections per engine")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{Path(tmp) / 'load.db'}"
+        if not args.database_url:
+            seed(database_url, args.rows)
+
+        port = free_port()
+        env = {
+            **os.environ,
+            "LOAD_DATABASE_URL": database_url,
+            "LOAD_QUERY_MS": str(args.query_ms),
+            "LOAD_POOL_SIZE": str(args.pool_size),
+        }
+        server = subprocess.Popen([
+            sys.executable, "-m", "uvicorn", "benchmarks.load_async:create_app", "--factory",
+            "--port", str(port), "--log-level", "warning", "--backlog", "4096", "--timeout-keep-alive", "60",
+        ], env=env)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            while True:
+                try:
+                    httpx.get(base_url + "/docs")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+
+            print(f"{args.clients} clients, {args.requests} requests per endpoint, {args.query_ms} ms query")
+            for endpoint in ("content", "statistics"):
+                for path in (f"/sync/{endpoint}", f"/async/{endpoint}"):
+                    report(path, *asyncio.run(drive(base_url, path, args.clients, args.requests)))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
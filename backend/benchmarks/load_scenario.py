@@ -0,0 +1,334 @@
+"""HTTP load scenario against the real app with a stubbed TMDB, written as a JSON report.
+
+    python -m benchmarks.load_scenario --users 50 --duration 60 --report load.json
+    python -m benchmarks.load_scenario --compare baseline.json load.json
+
+Seeds a library with ``benchmarks.datagen``, starts a stub TMDB API and the
+app (``main:app``) in separate uvicorn processes, then runs ``--users``
+virtual users for ``--duration`` seconds. Like a locust user, each one
+loops: pick a task by weight, send its request, wait a random think time.
+The task mix below reads like a person using the frontend (browse, look at
+titles, stats, recommendations) with some writes (new watches, favorites,
+titles added from TMDB search).
+
+The report has per-task and overall request counts, throughput, error
+counts and p50/p95/p99 latencies, plus the git commit and the run's
+parameters; server output (errors included) goes to ``--server-log``.
+``--compare`` prints the p95 and throughput change per task between two
+reports.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.datagen import create_library
+from benchmarks.load_async import free_port
+
+TMDB_GENRES = [{"id": 28, "name": "Action"}, {"id": 18, "name": "Drama"}, {"id": 80, "name": "Crime"}]
+
+
+def create_tmdb_stub() -> FastAPI:
+    """uvicorn ``--factory`` entry point: the TMDB endpoints the app calls.
+
+    Answers are derived from the request so they are stable across runs;
+    ``LOAD_TMDB_LATENCY_MS`` adds a fixed delay per request, standing in for
+    the round trip to the real API.
+    """
+    latency = int(os.environ.get("LOAD_TMDB_LATENCY_MS", "0")) / 1000
+    app = FastAPI()
+
+    def listing(kind: str, seed: int, count: int = 20) -> Dict:
+        title = "title" if kind == "movie" else "name"
+        date = "release_date" if kind == "movie" else "first_air_date"
+        return {"results": [
+            {"id": seed * 100 + i, title: f"Stub {kind} {seed}-{i}", "overview": "A stub overview.",
+             date: "2020-01-01", "poster_path": f"/s{i}.jpg", "vote_average": 7.0, "popularity": 100 - i,
+             "genre_ids": [18]}
+            for i in range(count)
+        ]}
+
+    @app.middleware("http")
+    async def delay(request, call_next):
+        if latency:
+            await asyncio.sleep(latency)
+        return await call_next(request)
+
+    @app.get("/search/{kind}")
+    async def search(kind: str, query: str = ""):
+        return listing(kind, sum(map(ord, query)) % 1000)
+
+    @app.get("/trending/{kind}/{window}")
+    async def trending(kind: str, window: str):
+        return listing("movie" if kind == "all" else kind, 1)
+
+    @app.get("/{kind}/popular")
+    async def popular(kind: str):
+        return listing(kind, 2)
+
+    @app.get("/{kind}/{tmdb_id}")
+    async def details(kind: str, tmdb_id: int):
+        movie = kind == "movie"
+        return {
+            "id": tmdb_id, "title" if movie else "name": f"Stub {kind} {tmdb_id}",
+            "overview": "A stub overview with a few words about the plot.",
+            "release_date" if movie else "first_air_date": "2020-01-01",
+            "runtime": 118 if movie else None, "poster_path": f"/p{tmdb_id}.jpg",
+            "backdrop_path": f"/b{tmdb_id}.jpg", "vote_average": 7.3, "genres": TMDB_GENRES,
+            "production_companies": [{"name": "Stub Pictures"}], "production_countries": [{"name": "United States"}],
+            "spoken_languages": [{"english_name": "English"}], "number_of_seasons": None if movie else 3,
+            "number_of_episodes": None if movie else 24, "episode_run_time": [] if movie else [45],
+            "credits": {"cast": [{"name": f"Actor {i}"} for i in range(12)],
+                        "crew": [{"name": "Stub Director", "job": "Director"}]},
+        }
+
+    return app
+
+
+@dataclass
+class Task:
+    name: str
+    weight: int
+    request: Callable[["User"], httpx.Request]
+
+
+class User:
+    """One virtual user: a client, a random stream and ids to pick from."""
+
+    new_tmdb_ids = itertools.count(50_000_000)
+
+    def __init__(self, client: httpx.AsyncClient, rng: random.Random, content_count: int):
+        self.client = client
+        self.rng = rng
+        self.content_count = content_count
+
+    def content_id(self) -> int:
+        # Skewed towards the start of the library, like the seeded watch history
+        return min(int(self.rng.paretovariate(1.2)), self.content_count)
+
+    def get(self, path: str, **params) -> httpx.Request:
+        return self.client.build_request("GET", path, params=params)
+
+    def post(self, path: str, body=None, **params) -> httpx.Request:
+        return self.client.build_request("POST", path, json=body, params=params)
+
+
+API = "/api/v1"
+TASKS = [
+    Task("list content", 20, lambda u: u.get(f"{API}/content/", limit=20, fields="summary")),
+    Task("list by genre", 6, lambda u: u.get(f"{API}/content/", limit=20, genre=u.rng.choice(["Drama", "Crime", "Comedy"]))),
+    Task("content detail", 15, lambda u: u.get(f"{API}/content/{u.content_id()}")),
+    Task("similar content", 4, lambda u: u.get(f"{API}/content/{u.content_id()}/similar")),
+    Task("library search", 8, lambda u: u.get(f"{API}/content/library-search", q=u.rng.choice(["night", "world", "love", "solution"]))),
+    Task("watch history", 6, lambda u: u.get(f"{API}/watches/", limit=50)),
+    Task("watch count", 4, lambda u: u.get(f"{API}/content/{u.content_id()}/watch-count")),
+    Task("stats overview", 5, lambda u: u.get(f"{API}/stats/overview")),
+    Task("stats genres", 3, lambda u: u.get(f"{API}/stats/genres")),
+    Task("stats trending", 3, lambda u: u.get(f"{API}/stats/trending", period="month")),
+    Task("recommendations", 4, lambda u: u.post(f"{API}/ai/recommend", {"mood": "excited", "limit": 10})),
+    Task("semantic search", 3, lambda u: u.post(f"{API}/ai/similar-search", query="heist crew planning one last job")),
+    Task("tmdb search", 4, lambda u: u.post(f"{API}/content/search", query=u.rng.choice(["heat", "alien", "fargo"]))),
+    Task("record watch", 8, lambda u: u.post(f"{API}/watches/", {
+        "content_id": u.content_id(), "watched_at": datetime.now().isoformat(), "duration_watched": 95,
+    })),
+    Task("toggle favorite", 3, lambda u: u.post(f"{API}/content/{u.content_id()}/favorite")),
+    Task("add from tmdb", 2, lambda u: u.post(f"{API}/content/", {
+        "title": "Added title", "content_type": "movie", "tmdb_id": next(User.new_tmdb_ids),
+    })),
+]
+
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {task.name: [] for task in TASKS}
+        self.errors: Dict[str, int] = {task.name: 0 for task in TASKS}
+        self.recording = False
+
+    def record(self, name: str, milliseconds: float, ok: bool) -> None:
+        if self.recording:
+            self.latencies[name].append(milliseconds)
+            self.errors[name] += not ok
+
+
+async def user_loop(user: User, results: Results, stop_at: float, think_ms: int) -> None:
+    weights = [task.weight for task in TASKS]
+    while time.perf_counter() < stop_at:
+        task = user.rng.choices(TASKS, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await user.client.send(task.request(user))
+            ok = response.status_code < 400
+        except httpx.TransportError:
+            ok = False
+        results.record(task.name, (time.perf_counter() - start) * 1000, ok)
+        if think_ms:
+            await asyncio.sleep(user.rng.uniform(0, 2 * think_ms) / 1000)
+
+
+async def run_users(base_url: str, users: int, duration: float, warmup: float, think_ms: int,
+                    content_count: int, seed: int) -> Results:
+    results = Results()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        loop_start = time.perf_counter()
+        stop_at = loop_start + warmup + duration
+        loops = [
+            asyncio.create_task(user_loop(User(client, random.Random(seed + i), content_count), results, stop_at, think_ms))
+            for i in range(users)
+        ]
+        await asyncio.sleep(warmup)
+        results.recording = True
+        await asyncio.gather(*loops)
+    return results
+
+
+def percentile(ordered: List[float], fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 2)
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> Dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / duration, 2),
+        "mean_ms": round(sum(ordered) / len(ordered), 2) if ordered else None,
+        "p50_ms": percentile(ordered, 0.50),
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+        "max_ms": round(ordered[-1], 2) if ordered else None,
+    }
+
+
+def git_revision() -> Dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def build_report(results: Results, args: argparse.Namespace) -> Dict:
+    every = [latency for latencies in results.latencies.values() for latency in latencies]
+    return {
+        **git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("report", "server_log", "compare")},
+        "total": summarize(every, sum(results.errors.values()), args.duration),
+        "tasks": {
+            name: summarize(latencies, results.errors[name], args.duration)
+            for name, latencies in results.latencies.items()
+        },
+    }
+
+
+def compare(old_path: str, new_path: str) -> None:
+    old, new = (json.loads(Path(path).read_text()) for path in (old_path, new_path))
+    print(f"{(old['commit'] or '?')[:10]} -> {(new['commit'] or '?')[:10]}")
+    print(f"{'task':18s} {'p95 ms':>18s} {'change':>8s} {'req/s':>16s} {'change':>8s}")
+    rows = [("total", old["total"], new["total"])] + [
+        (name, old["tasks"][name], stats) for name, stats in new["tasks"].items() if name in old["tasks"]
+    ]
+    for name, before, after in rows:
+        if not before["p95_ms"] or not after["p95_ms"]:
+            continue
+        p95 = after["p95_ms"] / before["p95_ms"] - 1
+        rps = after["rps"] / before["rps"] - 1 if before["rps"] else 0
+        print(f"{name:18s} {before['p95_ms']:8.1f} {after['p95_ms']:8.1f} {p95:+8.0%} "
+              f"{before['rps']:7.1f} {after['rps']:7.1f} {rps:+8.0%}")
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            httpx.get(url)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up in {timeout:.0f}s")
+
+
+def serve(target: str, port: int, env: Dict[str, str], log, factory: bool = False) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", target, "--port", str(port), "--log-level", "warning",
+               "--backlog", "4096", "--timeout-keep-alive", "60"]
+    return subprocess.Popen(command + (["--factory"] if factory else []), env=env, stdout=log, stderr=log)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before the measurement")
+    parser.add_argument("--think-ms", type=int, default=100, help="mean pause between a user's requests")
+    parser.add_argument("--content", type=int, default=10000, help="content rows in the seeded library")
+    parser.add_argument("--watches", type=int, default=100000, help="watch rows in the seeded library")
+    parser.add_argument("--tmdb-latency-ms", type=int, default=50, help="stub TMDB response delay")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report", default="load-report.json", help="where to write the JSON report")
+    parser.add_argument("--server-log", default="load-server.log", help="stub and app server output")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two reports and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{Path(tmp) / 'load.db'}"
+        print(f"Seeding {args.content} titles and {args.watches} watches")
+        create_library(database_url, content=args.content, watches=args.watches, seed=args.seed, embed=True)
+
+        tmdb_port, app_port = free_port(), free_port()
+        env = {
+            **os.environ,
+            "LOAD_TMDB_LATENCY_MS": str(args.tmdb_latency_ms),
+            "DATABASE_URL": database_url,
+            "TMDB_API_KEY": "stub",
+            "TMDB_BASE_URL": f"http://127.0.0.1:{tmdb_port}",
+            "VECTOR_INDEX_PATH": "",
+        }
+        base_url = f"http://127.0.0.1:{app_port}"
+        with open(args.server_log, "w") as log:
+            servers = [serve("benchmarks.load_scenario:create_tmdb_stub", tmdb_port, env, log, factory=True),
+                       serve("main:app", app_port, env, log)]
+            try:
+                wait_until_up(f"http://127.0.0.1:{tmdb_port}/docs", servers[0])
+                wait_until_up(base_url + "/health", servers[1])
+                print(f"{args.users} users for {args.duration:.0f}s (+{args.warmup:.0f}s warm-up)")
+                results = asyncio.run(run_users(
+                    base_url, args.users, args.duration, args.warmup, args.think_ms, args.content, args.seed
+                ))
+            finally:
+                for server in servers:
+                    server.terminate()
+                    server.wait()
+
+    report = build_report(results, args)
+    Path(args.report).write_text(json.dumps(report, indent=2) + "\n")
+    for name, stats in [("total", report["total"]), *report["tasks"].items()]:
+        print(f"{name:18s} {stats['requests']:7d} req  {stats['rps']:7.1f} req/s  p50 {stats['p50_ms'] or 0:7.1f} ms  "
+              f"p95 {stats['p95_ms'] or 0:7.1f} ms  p99 {stats['p99_ms'] or 0:7.1f} ms  errors {stats['errors']}")
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
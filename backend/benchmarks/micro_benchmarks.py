@@ -0,0 +1,157 @@
+"""pytest-benchmark micro-benchmarks for every ContentService, AIService and StatsService method.
+
+    python -m pytest benchmarks/micro_benchmarks.py --benchmark-json=micro.json
+    BENCH_CONTENT=100000 BENCH_WATCHES=1000000 python -m pytest benchmarks/micro_benchmarks.py
+
+Runs against one synthetic library per session (``benchmarks.datagen``;
+size from ``BENCH_CONTENT`` / ``BENCH_WATCHES``). Each benchmark gets a
+session inside an outer transaction that is rolled back afterwards, with
+service commits turned into savepoints, so write benchmarks leave the
+library unchanged for the next one. ``test_every_method_is_benchmarked``
+fails when a public service method has no case below.
+"""
+import inspect
+import os
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import make_engine
+from app.models.content import Content
+from app.schemas.content import ContentCreate, ContentUpdate
+from app.services.ai_service import AIService
+from app.services.content_service import ContentService
+from app.services.embedding_service import reset_vector_index
+from app.services.recommendation_service import reset_content_features
+from app.services.stats_service import StatsService
+from benchmarks.datagen import create_library
+
+CONTENT_ROWS = int(os.environ.get("BENCH_CONTENT", 10000))
+WATCH_ROWS = int(os.environ.get("BENCH_WATCHES", 100000))
+# The generated history covers the whole of last year
+LAST_YEAR = datetime.now().year - 1
+
+# name -> callable(session, ids) returning the service call's result
+READS = {
+    "ContentService.get_content_list": lambda s, ids: ContentService(s).get_content_list(limit=100),
+    "ContentService.get_content": lambda s, ids: ContentService(s).get_content(ids["content"]),
+    "ContentService.search_content": lambda s, ids: ContentService(s).search_content("crime"),
+    "ContentService.get_similar_content": lambda s, ids: ContentService(s).get_similar_content(ids["content"]),
+    "ContentService.get_by_tmdb_id": lambda s, ids: ContentService(s).get_by_tmdb_id(ids["tmdb"]),
+    "ContentService.merge_tmdb_data": lambda s, ids: ContentService.merge_tmdb_data(
+        ContentCreate(title="Heat", content_type="movie", tmdb_id=949),
+        {"overview": "A group of professional bank robbers...", "genres": ["Crime"], "runtime": 170}
+    ),
+    "ContentService.get_favorites": lambda s, ids: ContentService(s).get_favorites(limit=100),
+    "ContentService.get_by_status": lambda s, ids: ContentService(s).get_by_status("completed", limit=100),
+    "ContentService.get_statistics": lambda s, ids: ContentService(s).get_statistics(),
+    "AIService.get_recommendations": lambda s, ids: AIService(s).get_recommendations(mood="excited"),
+    "AIService.get_recommendations_simple": lambda s, ids: AIService(s).get_recommendations_simple("dark thriller"),
+    "AIService.analyze_viewing_patterns": lambda s, ids: AIService(s).analyze_viewing_patterns(),
+    "AIService.get_mood_based_suggestions": lambda s, ids: AIService(s).get_mood_based_suggestions(mood="relaxed"),
+    "AIService.chat_about_watchlist": lambda s, ids: AIService(s).chat_about_watchlist("what should i watch"),
+    "AIService.semantic_search": lambda s, ids: AIService(s).semantic_search("heist crew planning one last job"),
+    "AIService.generate_content_tags": lambda s, ids: AIService(s).generate_content_tags(ids["content"]),
+    "AIService.generate_viewing_insights": lambda s, ids: AIService(s).generate_viewing_insights(),
+    "StatsService.get_overview_stats": lambda s, ids: StatsService(s).get_overview_stats(),
+    "StatsService.get_viewing_time_stats": lambda s, ids: StatsService(s).get_viewing_time_stats("month"),
+    "StatsService.get_genre_stats": lambda s, ids: StatsService(s).get_genre_stats(10),
+    "StatsService.get_platform_stats": lambda s, ids: StatsService(s).get_platform_stats("month"),
+    "StatsService.get_rating_stats": lambda s, ids: StatsService(s).get_rating_stats(),
+    "StatsService.get_completion_stats": lambda s, ids: StatsService(s).get_completion_stats(),
+    "StatsService.get_trending_content": lambda s, ids: StatsService(s).get_trending_content("month", 10),
+    "StatsService.get_personal_records": lambda s, ids: StatsService(s).get_personal_records(),
+    "StatsService.get_monthly_summary": lambda s, ids: StatsService(s).get_monthly_summary(LAST_YEAR, 6),
+    "StatsService.get_year_in_review": lambda s, ids: StatsService(s).get_year_in_review(LAST_YEAR),
+}
+
+WRITES = {
+    "ContentService.create_content": lambda s, ids: ContentService(s).create_content(
+        ContentCreate(title="Benchmark title", content_type="movie", genres=["Drama"])
+    ),
+    "ContentService.bulk_create": lambda s, ids: ContentService(s).bulk_create([
+        ContentCreate(title=f"Bulk title {i}", content_type="tv", genres=["Comedy"]) for i in range(100)
+    ]),
+    "ContentService.update_content": lambda s, ids: ContentService(s).update_content(
+        ids["content"], ContentUpdate(personal_rating=8.5)
+    ),
+    "ContentService.toggle_favorite": lambda s, ids: ContentService(s).toggle_favorite(ids["content"]),
+    "ContentService.apply_tmdb_data": lambda s, ids: ContentService(s).apply_tmdb_data(ids["content"], {
+        "overview": "A group of professional bank robbers...", "genres": ["Crime"], "backdrop_path": "/b.jpg"
+    }),
+}
+
+
+@pytest.fixture(scope="session")
+def library(tmp_path_factory):
+    settings.vector_index_path = ""
+    url = f"sqlite:///{tmp_path_factory.mktemp('bench') / 'library.db'}"
+    create_library(url, content=CONTENT_ROWS, watches=WATCH_ROWS, embed=True)
+    engine = make_engine(url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(library):
+    connection = library.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    reset_vector_index()
+    reset_content_features()
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+        reset_vector_index()
+        reset_content_features()
+
+
+@pytest.fixture
+def ids(session):
+    # A title from the middle of the id range, away from any edge-case fast path
+    content_id, tmdb_id = session.query(Content.id, Content.tmdb_id).order_by(Content.id).offset(
+        session.query(func.count(Content.id)).scalar() // 2
+    ).first()
+    return {"content": content_id, "tmdb": tmdb_id}
+
+
+@pytest.mark.parametrize("name", sorted(READS))
+def test_read(benchmark, session, ids, name):
+    benchmark.group = name.split(".")[0]
+    benchmark(READS[name], session, ids)
+
+
+@pytest.mark.parametrize("name", sorted(WRITES))
+def test_write(benchmark, session, ids, name):
+    benchmark.group = name.split(".")[0]
+    benchmark(WRITES[name], session, ids)
+
+
+def test_delete_content(benchmark, session):
+    benchmark.group = "ContentService"
+
+    def setup():
+        content = ContentService(session).create_content(ContentCreate(title="To delete", content_type="movie"))
+        return (content.id,), {}
+
+    benchmark.pedantic(lambda content_id: ContentService(session).delete_content(content_id), setup=setup, rounds=50)
+
+
+def test_every_method_is_benchmarked():
+    covered = set(READS) | set(WRITES) | {"ContentService.delete_content"}
+    public = {
+        f"{service.__name__}.{name}"
+        for service in (ContentService, AIService, StatsService)
+        for name, member in vars(service).items()
+        if not name.startswith("_") and (inspect.isfunction(member) or isinstance(member, staticmethod))
+    }
+    assert public - covered == set()
@@ -1,24 +1,55 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uvicorn
 
-from app.database import SessionLocal, engine, init_db
+from app.database import SessionLocal, WriteStickinessMiddleware, dispose_engines, engine, init_db
 from app.models import content as content_models
 from app.models import watches as watch_models  
-from app.routes import content, watches, ai, stats
+from app.routes import content, watches, ai, stats, export, jobs
 from app.config import settings
+from app.instrumentation import PROMETHEUS_CONTENT_TYPE, InstrumentationMiddleware, render_metrics
+from app.responses import ORJSONResponse
+from app.services.embedding_service import save_vector_index
+from app.services.jobs import close_job_queue, get_job_queue
+from app.services.tmdb_client import close_tmdb_client
+from app.services.tmdb_mirror import close_tmdb_mirror
+from app.services.session_heartbeats import get_heartbeat_tracker
+from app.services.watch_buffer import close_watch_buffer
 
 # Initialize database
 init_db()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop process-wide resources."""
+    get_heartbeat_tracker().start()
+    get_job_queue().start()
+    yield
+    # Stop job workers; jobs they were running go back to the queue
+    await close_job_queue()
+    # Write back pending session heartbeats
+    await get_heartbeat_tracker().stop()
+    # Write out watch events still waiting in the buffer
+    await close_watch_buffer()
+    # Let background TMDB mirror refreshes finish
+    await close_tmdb_mirror()
+    # Release pooled connections to external APIs
+    await close_tmdb_client()
+    await dispose_engines()
+    save_vector_index()
+
 app = FastAPI(
     title="Watchlist Manager API",
     description="A modern API for managing your movie and TV show watchlist with AI-powered features",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -28,19 +59,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Server-Timing", "X-Job-Id", "Location"],
 )
 
+# Keeps each client's reads on the primary for a while after it writes
+app.add_middleware(WriteStickinessMiddleware)
+
+# Outermost, so request timings include the other middleware
+app.add_middleware(InstrumentationMiddleware)
+
 # Include routers
 app.include_router(content.router, prefix="/api/v1", tags=["content"])
 app.include_router(watches.router, prefix="/api/v1", tags=["watches"])
 app.include_router(ai.router, prefix="/api/v1", tags=["ai"])
 app.include_router(stats.router, prefix="/api/v1", tags=["statistics"])
+app.include_router(export.router, prefix="/api/v1", tags=["export"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring."""
     return {"status": "healthy", "message": "Watchlist Manager API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this process."""
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
@@ -1,10 +1,19 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
-from app.database import Base, get_db
+from app.cache import reset_cache
+from app.config import settings
+from app.database import Base, enable_sqlite_transactions, get_async_db, get_async_read_db, get_db, get_read_db
+from app.services.embedding_service import reset_vector_index
+from app.services.jobs import reset_job_queue
+from app.services.recommendation_service import reset_content_features
+from app.services.session_heartbeats import reset_heartbeat_tracker
+from app.services.tmdb_mirror import reset_tmdb_mirror
+from app.services.watch_buffer import reset_watch_buffer
 from main import app
 
 # Test database setup
@@ -14,6 +23,7 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+enable_sqlite_transactions(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def override_get_db():
@@ -23,14 +33,42 @@ def override_get_db():
     finally:
         db.close()
 
+# Routes use the async driver against the same file. Each TestClient runs its
+# own event loop, so connections are not pooled across tests.
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+enable_sqlite_transactions(async_engine.sync_engine)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_read_db] = override_get_db
+app.dependency_overrides[get_async_read_db] = override_get_async_db
+
+# Keep the vector index in memory only
+settings.vector_index_path = ""
+# TMDB calls outside the client fixture go straight to the (mocked) client
+settings.tmdb_mirror_enabled = False
+# Retry failed TMDB calls without sleeping
+settings.tmdb_retry_backoff = 0
 
 @pytest.fixture(scope="function")
 def client():
     # Create tables before each test
     Base.metadata.create_all(bind=engine)
+    reset_vector_index()
+    reset_content_features()
+    reset_cache()
+    reset_watch_buffer(TestingAsyncSessionLocal)
+    reset_heartbeat_tracker(TestingAsyncSessionLocal)
+    reset_job_queue(TestingAsyncSessionLocal)
+    reset_tmdb_mirror(TestingAsyncSessionLocal)
     with TestClient(app) as c:
         yield c
+    reset_tmdb_mirror()
     # Clean up after each test
     Base.metadata.drop_all(bind=engine)
 
@@ -38,6 +76,9 @@ def client():
 def db():
     # Create tables before each test
     Base.metadata.create_all(bind=engine)
+    reset_vector_index()
+    reset_content_features()
+    reset_cache()
     db = TestingSessionLocal()
     try:
         yield db
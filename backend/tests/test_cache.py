@@ -0,0 +1,50 @@
+from app.cache import CONTENT, WATCHES, FakeRedis, MemoryBackend, RedisBackend, ResponseCache
+
+
+def test_content_list_etag_and_invalidation(client):
+    client.post("/api/v1/content/bulk", json=[{"title": "Heat", "content_type": "movie"}])
+
+    first = client.get("/api/v1/content/")
+    etag = first.headers["etag"]
+    assert [c["title"] for c in first.json()] == ["Heat"]
+
+    not_modified = client.get("/api/v1/content/", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    client.post("/api/v1/content/bulk", json=[{"title": "Dune", "content_type": "movie"}])
+    changed = client.get("/api/v1/content/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert {c["title"] for c in changed.json()} == {"Heat", "Dune"}
+
+
+def test_stats_are_invalidated_by_watch_writes(client):
+    created = client.post("/api/v1/content/bulk", json=[{"title": "Heat", "content_type": "movie"}]).json()
+    content_id = created["results"][0]["id"]
+    assert client.get("/api/v1/stats/overview").json()["total_watches"] == 0
+
+    client.post("/api/v1/watches/", json={"content_id": content_id, "watched_at": "2024-03-02T20:00:00"})
+    assert client.get("/api/v1/stats/overview").json()["total_watches"] == 1
+
+
+def test_backends_compute_once_per_tag_version():
+    for backend in (MemoryBackend(ttl=60), RedisBackend(FakeRedis(), ttl=60)):
+        cache = ResponseCache(backend)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"count": len(calls)}
+
+        first = cache.get_or_set("/stats/overview?", [CONTENT, WATCHES], compute)
+        assert cache.get_or_set("/stats/overview?", [CONTENT, WATCHES], compute) == first
+        assert len(calls) == 1
+
+        cache.invalidate(WATCHES)
+        assert cache.get_or_set("/stats/overview?", [CONTENT, WATCHES], compute).body == b'{"count":2}'
+        # Entries tagged only with other tags survive
+        cache.get_or_set("/content/?", [CONTENT], compute)
+        cache.invalidate(WATCHES)
+        cache.get_or_set("/content/?", [CONTENT], compute)
+        assert len(calls) == 3
@@ -0,0 +1,49 @@
+import json
+
+from app.schemas.content import ContentCreate
+from app.services.content_service import ContentService
+
+
+def test_bulk_create_dedupes_against_database_and_batch(db):
+    service = ContentService(db)
+    existing = service.create_content(ContentCreate(title="Alien", content_type="movie", tmdb_id=348))
+
+    results = service.bulk_create([
+        ContentCreate(title="Alien", content_type="movie", tmdb_id=348),
+        ContentCreate(title="Aliens", content_type="movie", tmdb_id=679, imdb_id="tt0090605"),
+        ContentCreate(title="Aliens (again)", content_type="movie", imdb_id="tt0090605"),
+        ContentCreate(title="Severance", content_type="tv"),
+    ], chunk_size=2)
+
+    assert [r["status"] for r in results] == ["duplicate", "created", "duplicate", "created"]
+    assert results[0]["id"] == existing.id
+    assert results[2]["id"] == results[1]["id"]
+    assert service.get_content(results[3]["id"]).title == "Severance"
+
+
+def test_bulk_endpoint_accepts_json_array(client):
+    response = client.post("/api/v1/content/bulk", json=[
+        {"title": "Heat", "content_type": "movie", "tmdb_id": 949},
+        {"title": "", "content_type": "movie"},
+        {"title": "Heat", "content_type": "movie", "tmdb_id": 949},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["duplicates"], body["errors"]) == (1, 1, 1)
+    assert [r["index"] for r in body["results"]] == [0, 1, 2]
+    assert body["results"][1]["status"] == "error"
+
+
+def test_bulk_endpoint_accepts_ndjson(client):
+    lines = "\n".join(json.dumps({"title": f"Title {i}", "content_type": "tv"}) for i in range(5))
+
+    response = client.post(
+        "/api/v1/content/bulk",
+        content=lines,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 5
+    assert len(client.get("/api/v1/content/").json()) == 5
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.database import Base, async_database_url, init_db, make_engine
+from app.models.content import Content
+from app.models.rollups import ROLLUP_MODELS, ContentWatchStats, MonthlyGenreStats
+from app.models.taxonomy import ContentGenre, Genre
+from app.services.taxonomy_service import FACETS
+from app.models.watches import Watch
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./watchlist.db") == "sqlite+aiosqlite:///./watchlist.db"
+    assert async_database_url("postgresql://u:p@db/watchlist") == "postgresql+asyncpg://u:p@db/watchlist"
+    assert async_database_url("postgresql+psycopg2://u:p@db/watchlist") == "postgresql+asyncpg://u:p@db/watchlist"
+    assert async_database_url("postgresql+asyncpg://u:p@db/watchlist") == "postgresql+asyncpg://u:p@db/watchlist"
+
+
+def test_sqlite_pragmas_and_read_only_pool(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pragmas.db'}"
+    writer = make_engine(url)
+    reader = make_engine(url, read_only=True)
+    try:
+        with writer.begin() as connection:
+            assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+            connection.exec_driver_sql("CREATE TABLE t (x INTEGER)")
+            connection.exec_driver_sql("INSERT INTO t VALUES (1)")
+
+        # A write transaction in progress does not block readers under WAL
+        with writer.connect() as connection:
+            transaction = connection.begin()
+            connection.exec_driver_sql("INSERT INTO t VALUES (2)")
+            with reader.connect() as read_connection:
+                assert read_connection.exec_driver_sql("SELECT count(*) FROM t").scalar() == 1
+            transaction.commit()
+
+        with reader.connect() as connection:
+            assert connection.exec_driver_sql("SELECT count(*) FROM t").scalar() == 2
+            with pytest.raises(OperationalError, match="readonly"):
+                connection.exec_driver_sql("INSERT INTO t VALUES (3)")
+    finally:
+        writer.dispose()
+        reader.dispose()
+
+
+def test_init_db_fills_derived_tables_added_to_an_existing_database(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'existing.db'}")
+    new_tables = {model.__tablename__ for model in ROLLUP_MODELS} | {
+        table.name for facet in FACETS for table in (facet.lookup.__table__, facet.association.__table__)
+    }
+    Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables if t.name not in new_tables])
+    try:
+        with Session(engine) as db:
+            heat = Content(title="Heat", content_type="movie", genres=["Crime"])
+            db.add(heat)
+            db.flush()
+            db.add_all([
+                Watch(content_id=heat.id, watched_at=datetime(2024, 3, 2, 20), duration_watched=170),
+                Watch(content_id=heat.id, watched_at=datetime(2024, 3, 9, 20), duration_watched=60),
+            ])
+            heat_id = heat.id
+            db.commit()
+
+        init_db(engine)
+
+        with Session(engine) as db:
+            stats = db.get(ContentWatchStats, heat_id)
+            assert (stats.watches, stats.minutes) == (2, 230)
+            assert [name for name, in db.query(Genre.name).join(ContentGenre)] == ["Crime"]
+            assert db.query(MonthlyGenreStats).count() == 1
+    finally:
+        engine.dispose()
@@ -0,0 +1,59 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from app.models.content import Content
+from app.models.watches import Watch
+from app.services.export_service import ExportService, gzip_chunks
+
+
+def test_export_content_ndjson_and_csv(client):
+    client.post("/api/v1/content/bulk", json=[
+        {"title": "Heat", "content_type": "movie", "genres": ["Crime", "Drama"]},
+        {"title": "Dark", "content_type": "tv"},
+    ])
+
+    response = client.get("/api/v1/export/content")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Heat", "Dark"]
+    assert rows[0]["genres"] == ["Crime", "Drama"]
+    assert "embedding" not in rows[0]
+
+    response = client.get("/api/v1/export/content", params={"format": "csv"})
+    table = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["title"] for row in table] == ["Heat", "Dark"]
+    assert json.loads(table[0]["genres"]) == ["Crime", "Drama"]
+
+
+def test_export_is_gzipped_when_accepted(client):
+    client.post("/api/v1/content/bulk", json=[{"title": "Heat", "content_type": "movie"}])
+
+    response = client.get("/api/v1/export/content", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    # httpx transparently decodes the body
+    assert json.loads(response.text)["title"] == "Heat"
+
+    payload = b"".join(gzip_chunks(iter([b"a" * 10_000, b"b" * 10_000])))
+    assert gzip.decompress(payload) == b"a" * 10_000 + b"b" * 10_000
+
+
+def test_export_watches_updated_since(db):
+    content = Content(title="Dark", content_type="tv")
+    db.add(content)
+    db.flush()
+    db.add_all([
+        Watch(content_id=content.id, watched_at=datetime(2024, 1, 1, 21), updated_at=datetime(2024, 1, 2)),
+        Watch(content_id=content.id, watched_at=datetime(2024, 2, 1, 21), updated_at=datetime(2024, 2, 2)),
+    ])
+    db.commit()
+    # Server-generated timestamps have no fractional seconds; the boundary is inclusive
+    since = db.query(Content.updated_at).scalar()
+
+    service = ExportService(db)
+    watches = [json.loads(line) for line in b"".join(service.export("watches", updated_since=datetime(2024, 2, 1))).splitlines()]
+    assert [w["watched_at"] for w in watches] == ["2024-02-01T21:00:00"]
+    assert len(b"".join(service.export("content", updated_since=since)).splitlines()) == 1
+    assert b"".join(service.export("content", format="csv", updated_since=datetime(2100, 1, 1))).startswith(b"id,title,")
@@ -0,0 +1,78 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.instrumentation import (
+    N_PLUS_ONE, REGISTRY, Histogram, InstrumentationMiddleware, instrumented
+)
+from tests.conftest import engine
+
+
+def test_server_timing_and_metrics(client):
+    client.post("/api/v1/content/bulk", json=[{"title": "Heat", "content_type": "movie"}])
+    response = client.get("/api/v1/content/", params={"fields": "summary"})
+    timing = response.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert 'db;dur=' in timing and 'queries"' in timing
+    assert "svc-ContentService.get_content_list;dur=" in timing
+
+    metrics = client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = metrics.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/content/",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/v1/content/",status="200",le="+Inf"}' in body
+    assert 'service_call_duration_seconds_count{service="ContentService",method="get_content_list"}' in body
+    assert 'http_request_db_queries_bucket{method="POST",route="/api/v1/content/bulk",le="0"} 0' in body
+
+
+def test_n_plus_one_is_flagged(caplog):
+    app = FastAPI()
+    app.add_middleware(InstrumentationMiddleware)
+
+    @app.get("/items/{count}")
+    def items(count: int):
+        with engine.connect() as connection:
+            for i in range(count):
+                connection.execute(text("SELECT :i"), {"i": i})
+        return {}
+
+    before = N_PLUS_ONE.value("GET", "/items/{count}")
+    with TestClient(app) as client, caplog.at_level(logging.WARNING, logger="app.instrumentation"):
+        # Plus the BEGIN the test engine emits
+        assert 'desc="4 queries"' in client.get("/items/3").headers["server-timing"]
+        assert N_PLUS_ONE.value("GET", "/items/{count}") == before
+        client.get("/items/12")
+    assert N_PLUS_ONE.value("GET", "/items/{count}") == before + 1
+    assert "12 executions of SELECT ?" in caplog.text
+
+
+def test_histogram_buckets_and_instrumented_methods():
+    histogram = Histogram("demo_seconds", "Demo.", ("kind",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "a")
+    lines = list(histogram.collect())
+    assert lines[:3] == [
+        'demo_seconds_bucket{kind="a",le="0.1"} 2',
+        'demo_seconds_bucket{kind="a",le="1"} 3',
+        'demo_seconds_bucket{kind="a",le="+Inf"} 4',
+    ]
+    assert lines[-1] == 'demo_seconds_count{kind="a"} 4'
+
+    @instrumented
+    class Demo:
+        def public(self):
+            return 1
+
+        @staticmethod
+        def helper():
+            return 2
+
+        def _private(self):
+            return 3
+
+    assert (Demo().public(), Demo.helper(), Demo()._private()) == (1, 2, 3)
+    assert 'service="Demo",method="helper"' in REGISTRY.render()
+    assert 'method="_private"' not in REGISTRY.render()
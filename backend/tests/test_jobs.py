@@ -0,0 +1,168 @@
+import time
+
+import httpx
+import pytest
+
+from app.cache import FakeRedis
+from app.models.content import Content
+from app.services import tmdb_client
+from app.services.jobs import JobQueue, MemoryJobBackend, RedisJobBackend, get_job_queue
+from app.services.tmdb_client import TMDBClient
+from tests.conftest import TestingAsyncSessionLocal
+
+HEAT = {
+    "id": 949, "title": "Heat", "overview": "A group of professional bank robbers...", "runtime": 170,
+    "release_date": "1995-12-15", "vote_average": 8.3, "genres": [{"name": "Crime"}, {"name": "Thriller"}],
+    "credits": {"cast": [{"name": "Al Pacino"}, {"name": "Robert De Niro"}],
+                "crew": [{"name": "Michael Mann", "job": "Director"}]},
+}
+
+
+def use_tmdb(monkeypatch, responses):
+    """Serve TMDB requests from ``responses`` (status codes or payloads), one per call."""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        response = responses.pop(0) if len(responses) > 1 else responses[0]
+        return httpx.Response(response) if isinstance(response, int) else httpx.Response(200, json=response)
+
+    monkeypatch.setattr(tmdb_client, "_client", TMDBClient(api_key="test-key", transport=httpx.MockTransport(handler)))
+    return calls
+
+
+def test_create_returns_immediately_and_enrichment_fills_the_rest(client, monkeypatch):
+    calls = use_tmdb(monkeypatch, [HEAT])
+
+    response = client.post("/api/v1/content/", json={"title": "Heat (director's cut)", "content_type": "movie", "tmdb_id": 949})
+    assert response.status_code == 200
+    assert response.json()["overview"] is None
+    job_id = response.headers["x-job-id"]
+
+    client.portal.call(get_job_queue().join)
+    job = client.get(f"/api/v1/jobs/{job_id}").json()
+    assert (job["status"], job["attempts"], job["kind"]) == ("succeeded", 1, "enrich_content")
+    assert job["result"]["ai_tags"] == ["#crime", "#thriller", "#highly_rated", "#movie"]
+    assert calls == ["/3/movie/949"]
+
+    content = client.get(f"/api/v1/content/{response.json()['id']}").json()
+    assert content["title"] == "Heat (director's cut)"
+    assert content["overview"] == HEAT["overview"]
+    assert (content["director"], content["cast"], content["runtime"]) == ("Michael Mann", ["Al Pacino", "Robert De Niro"], 170)
+    assert content["ai_tags"] == job["result"]["ai_tags"]
+    assert client.get("/api/v1/content/library-search", params={"q": "robbers"}).json()["results"]
+
+
+def test_failed_attempts_are_retried_with_backoff_then_reported(client, monkeypatch):
+    get_job_queue().retry_delay = 0.01
+    use_tmdb(monkeypatch, [500, HEAT])
+    recovered = client.post("/api/v1/content/", json={"title": "Heat", "content_type": "movie", "tmdb_id": 949})
+    client.portal.call(get_job_queue().join)
+    job = client.get(f"/api/v1/jobs/{recovered.headers['x-job-id']}").json()
+    assert (job["status"], job["attempts"], job["error"]) == ("succeeded", 2, None)
+
+    use_tmdb(monkeypatch, [503])
+    broken = client.post("/api/v1/content/", json={"title": "Alien", "content_type": "movie", "tmdb_id": 348})
+    client.portal.call(get_job_queue().join)
+    job = client.get(f"/api/v1/jobs/{broken.headers['x-job-id']}").json()
+    assert (job["status"], job["attempts"]) == ("failed", 3)
+    assert "No TMDB details for movie 348" in job["error"]
+    assert client.get("/api/v1/jobs/unknown").status_code == 404
+
+
+def test_missing_titles_and_a_missing_api_key_fail_without_retries(client, monkeypatch):
+    get_job_queue().retry_delay = 0.01
+    calls = use_tmdb(monkeypatch, [404])
+    unknown = client.post("/api/v1/content/", json={"title": "Lost", "content_type": "movie", "tmdb_id": 1})
+    client.portal.call(get_job_queue().join)
+    job = client.get(f"/api/v1/jobs/{unknown.headers['x-job-id']}").json()
+    assert (job["status"], job["attempts"], job["error"]) == ("failed", 1, "TMDB has no movie 1")
+    assert calls == ["/3/movie/1"]
+
+    monkeypatch.setattr(tmdb_client, "_client", TMDBClient(api_key=""))
+    keyless = client.post("/api/v1/content/", json={"title": "Heat", "content_type": "movie", "tmdb_id": 949})
+    client.portal.call(get_job_queue().join)
+    job = client.get(f"/api/v1/jobs/{keyless.headers['x-job-id']}").json()
+    assert (job["status"], job["attempts"]) == ("failed", 1)
+    assert "no TMDB API key" in job["error"]
+
+
+def test_generate_tags_runs_in_the_background(client):
+    created = client.post("/api/v1/content/bulk", json=[
+        {"title": "Alien", "content_type": "movie", "genres": ["Horror", "Science Fiction"]}
+    ]).json()
+    content_id = created["results"][0]["id"]
+
+    response = client.post(f"/api/v1/content/{content_id}/generate-tags")
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    client.portal.call(get_job_queue().join)
+
+    job = client.get(response.headers["location"]).json()
+    assert job["result"] == {"content_id": content_id, "ai_tags": ["#horror", "#science_fiction", "#movie"]}
+    assert client.get(f"/api/v1/content/{content_id}").json()["ai_tags"] == job["result"]["ai_tags"]
+    assert client.post("/api/v1/content/999/generate-tags").status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", [MemoryJobBackend, lambda: RedisJobBackend(FakeRedis())], ids=["memory", "redis"])
+async def test_jobs_are_deduplicated_while_active(db, backend):
+    content = Content(title="Alien", content_type="movie", genres=["Horror"])
+    db.add(content)
+    db.flush()
+    content_id = content.id
+    db.commit()
+    queue = JobQueue(backend(), TestingAsyncSessionLocal, workers=0)
+
+    first = await queue.enqueue("generate_tags", {"content_id": content_id}, dedup_key=f"tags:{content_id}")
+    again = await queue.enqueue("generate_tags", {"content_id": content_id}, dedup_key=f"tags:{content_id}")
+    assert again["id"] == first["id"]
+
+    job_id = await queue.backend.claim(time.time())
+    assert job_id == first["id"] and await queue.backend.claim(time.time()) is None
+    await queue.run(job_id)
+    job = await queue.get(job_id)
+    assert job["status"] == "succeeded"
+    assert job["result"]["ai_tags"] == ["#horror", "#movie"]
+
+    # A finished job no longer holds its key
+    later = await queue.enqueue("generate_tags", {"content_id": content_id}, dedup_key=f"tags:{content_id}")
+    assert later["id"] != first["id"]
+    with pytest.raises(ValueError):
+        await queue.enqueue("unknown", {})
+
+
+@pytest.mark.asyncio
+async def test_redis_jobs_left_by_a_dead_worker_are_requeued(db):
+    content = Content(title="Alien", content_type="movie", genres=["Horror"])
+    db.add(content)
+    db.flush()
+    content_id = content.id
+    db.commit()
+    redis = FakeRedis()
+    backend = RedisJobBackend(redis, claim_timeout=60)
+    queue = JobQueue(backend, TestingAsyncSessionLocal, workers=0, max_attempts=2)
+    now = time.time()
+
+    # A worker claims and starts each job, then its process dies
+    async def abandon(attempts, at):
+        job_id = await backend.claim(at)
+        await queue._save(await queue.get(job_id), status="running", attempts=attempts)
+        redis.delete(f"{backend.prefix}claim:{job_id}")  # the lease expires
+        return job_id
+
+    first = await queue.enqueue("generate_tags", {"content_id": content_id})
+    assert await abandon(1, now) == first["id"]
+    assert await backend.claim(now + 1) is None
+
+    job_id = await backend.claim(now + 61)
+    assert job_id == first["id"] and (await queue.get(job_id))["status"] == "queued"
+    await queue.run(job_id)
+    assert (await queue.get(job_id))["status"] == "succeeded"
+    assert redis.lrange(f"{backend.prefix}processing", 0, -1) == []
+
+    # Out of attempts, it is failed rather than requeued
+    last = await queue.enqueue("generate_tags", {"content_id": content_id})
+    await abandon(2, now + 62)
+    assert await backend.claim(now + 200) is None
+    assert (await queue.get(last["id"]))["status"] == "failed"
@@ -0,0 +1,62 @@
+from sqlalchemy import event
+
+from app.schemas.content import ContentCreate
+from app.services.ai_service import AIService
+from app.services.content_service import ContentService
+from app.services.library_summary import library_summary
+from tests.conftest import engine
+
+
+def seed(db):
+    service = ContentService(db)
+    service.create_content(ContentCreate(title="Heat", content_type="movie", genres=["Crime", "Drama"], status="completed", is_favorite=True))
+    service.create_content(ContentCreate(title="Dark", content_type="tv", genres=["Mystery", "Drama"], status="watching"))
+    service.create_content(ContentCreate(title="Dune", content_type="movie", genres=["Adventure"]))
+
+
+def test_library_summary_in_one_round_trip(db):
+    seed(db)
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        summary = library_summary(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert summary["total"] == 3
+    assert summary["favorites"] == 1
+    assert summary["by_type"] == {"movie": 2, "tv": 1}
+    assert summary["by_status"] == {"completed": 1, "watching": 1, "planned": 1}
+    assert summary["genres"] == {"Drama": 2, "Adventure": 1, "Crime": 1, "Mystery": 1}
+
+
+def test_call_sites_share_the_summary(db):
+    seed(db)
+
+    assert ContentService(db).get_statistics() == {
+        "total_content": 3,
+        "movies": 2,
+        "tv_shows": 1,
+        "favorites": 1,
+        "status_breakdown": {"completed": 1, "watching": 1, "planned": 1},
+    }
+    ai = AIService(db)
+    insights = ai.analyze_viewing_patterns()["insights"]
+    assert insights["completion_rate"] == 33.3
+    assert insights["favorite_genres"][0] == ("Drama", 2)
+    assert insights["content_distribution"] == {"completed": 1, "watching": 1, "planned": 1}
+    assert ai.generate_viewing_insights() == [
+        "Your completion rate is 33.3% - You have lots to catch up on!",
+        "You seem to love Drama content!",
+    ]
+    assert "3 items" in ai.chat_about_watchlist("show me my stats")
+
+
+def test_empty_library(db):
+    assert library_summary(db) == {"total": 0, "favorites": 0, "by_type": {}, "by_status": {}, "genres": {}}
+    assert AIService(db).generate_viewing_insights() == []
@@ -0,0 +1,65 @@
+from sqlalchemy import event, inspect
+
+from app.schemas.content import ContentCreate
+from app.services.ai_service import AIService
+from app.services.content_service import ContentService
+from tests.conftest import async_engine
+
+
+def capture_selects():
+    statements = []
+
+    # Requests run on the async engine
+    engine = async_engine.sync_engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    return statements, lambda: event.remove(engine, "before_cursor_execute", record)
+
+
+def test_list_fields_projection(client):
+    client.post("/api/v1/content/bulk", json=[
+        {"title": "Heat", "content_type": "movie", "overview": "A long synopsis", "cast": ["Al Pacino"]},
+    ])
+
+    statements, stop = capture_selects()
+    try:
+        response = client.get("/api/v1/content/", params={"fields": "title,status"})
+    finally:
+        stop()
+    assert response.json() == [{"id": 1, "title": "Heat", "status": "planned"}]
+    listing = next(s for s in statements if "FROM content" in s and "ORDER BY" in s)
+    assert "content.overview" not in listing and "content.embedding" not in listing
+
+    summary = client.get("/api/v1/content/", params={"fields": "summary"}).json()[0]
+    assert summary["genres"] == [] and "overview" not in summary and "cast" not in summary
+
+    full = client.get("/api/v1/content/").json()[0]
+    assert full["overview"] == "A long synopsis"
+
+    assert client.get("/api/v1/content/", params={"fields": "title,nope"}).status_code == 400
+
+
+def test_embedding_is_deferred(db):
+    ContentService(db).create_content(ContentCreate(title="Heat", content_type="movie", genres=["Crime"]))
+    db.expire_all()
+
+    content = ContentService(db).get_content_list()[0]
+    assert "embedding" not in inspect(content).dict
+    assert content.embedding is not None
+
+
+def test_ai_analysis_reads_only_needed_columns(db):
+    service = ContentService(db)
+    service.create_content(ContentCreate(title="Heat", content_type="movie", genres=["Crime"], status="completed"))
+    service.create_content(ContentCreate(title="Dark", content_type="tv", genres=["Crime"], status="watching"))
+
+    ai = AIService(db)
+    analysis = ai.analyze_viewing_patterns()
+    assert analysis["insights"]["completion_rate"] == 50.0
+    assert analysis["insights"]["favorite_genres"] == [("Crime", 2)]
+    assert "Dark" in ai.chat_about_watchlist("what should i watch?")
+    assert ai.generate_content_tags(1) == ["#crime", "#movie"]
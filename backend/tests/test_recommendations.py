@@ -0,0 +1,73 @@
+from app.schemas.content import ContentCreate, ContentUpdate
+from app.services.ai_service import AIService
+from app.services import recommendation_service
+from app.services.content_service import ContentService
+
+
+def add(service, title, genres, **kwargs):
+    return service.create_content(ContentCreate(title=title, content_type="movie", genres=genres, **kwargs))
+
+
+def test_recommends_unwatched_titles_matching_liked_genres(db):
+    content = ContentService(db)
+    add(content, "Alien", ["Horror", "Science Fiction"], status="completed", personal_rating=9)
+    add(content, "The Thing", ["Horror", "Science Fiction"], status="completed", is_favorite=True)
+    add(content, "Event Horizon", ["Horror", "Science Fiction"], tmdb_rating=6.5)
+    add(content, "Notting Hill", ["Romance", "Comedy"], tmdb_rating=7.5)
+
+    recommendations = AIService(db).get_recommendations(limit=5)
+
+    assert [r["title"] for r in recommendations] == ["Event Horizon", "Notting Hill"]
+    assert recommendations[0]["confidence_score"] == 1.0
+    assert "Horror" in recommendations[0]["reason"]
+
+
+def test_matrix_follows_content_changes(db):
+    content = ContentService(db)
+    liked = add(content, "Heat", ["Crime"], status="completed")
+    crime = add(content, "Ronin", ["Crime"])
+    add(content, "Up", ["Animation"], tmdb_rating=8.0)
+
+    ai = AIService(db)
+    assert ai.get_recommendations(limit=1)[0]["content_id"] == crime.id
+
+    content.update_content(crime.id, ContentUpdate(status="completed"))
+    content.update_content(liked.id, ContentUpdate(status="dropped"))
+    assert [r["title"] for r in ai.get_recommendations()] == ["Up"]
+
+    content.delete_content(liked.id)
+    assert "Heat" not in [r["title"] for r in ai.get_recommendations(exclude_watched=False)]
+
+
+def test_writes_during_a_cold_build_reach_the_matrix(db, monkeypatch):
+    content = ContentService(db)
+    heat = add(content, "Heat", ["Crime"])
+    add(content, "Ronin", ["Crime"])
+    recommendation_service.reset_content_features()
+    build = recommendation_service._build_content_features
+
+    def build_then_write(session):
+        features = build(session)
+        # Committed after the build read the table but before it is published
+        add(content, "Up", ["Animation"])
+        content.delete_content(heat.id)
+        return features
+
+    monkeypatch.setattr(recommendation_service, "_build_content_features", build_then_write)
+    titles = [r["title"] for r in AIService(db).get_recommendations(exclude_watched=False)]
+
+    assert sorted(titles) == ["Ronin", "Up"]
+
+
+def test_explicit_preferences_and_simple_endpoint(client):
+    for title, genres in (("Paddington", ["Family"]), ("Se7en", ["Thriller"])):
+        client.post("/api/v1/content/", json={"title": title, "content_type": "movie", "genres": genres})
+
+    response = client.post("/api/v1/ai/recommend", json={
+        "preferences": [{"type": "genre", "value": "Thriller"}], "limit": 1,
+    })
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "Se7en"
+
+    response = client.post("/api/v1/ai/recommendations", json={"user_preferences": "something family friendly"})
+    assert response.json()["recommendations"][0]["title"] == "Paddington"
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.config import settings
+from app.database import Base, RoutingSession, get_async_db, make_engine, track_client_writes
+from app.models.content import Content
+from app.services.content_service import ContentService
+from main import app
+from tests.conftest import async_engine
+
+
+@pytest.fixture
+def primary_and_replica(tmp_path, monkeypatch):
+    """Two SQLite files standing in for a primary and a replica that never catches up."""
+    primary = make_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = make_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine in (primary, replica):
+        Base.metadata.create_all(engine)
+    monkeypatch.setattr(settings, "replica_stickiness_seconds", 5.0)
+    Write = sessionmaker(class_=RoutingSession, bind=primary, autoflush=False)
+    Read = sessionmaker(class_=RoutingSession, bind=primary, autoflush=False, replicas=[replica])
+    yield Write, Read
+    primary.dispose()
+    replica.dispose()
+
+
+def titles(session):
+    return [c.title for c in ContentService(session).get_content_list()]
+
+
+def test_reads_go_to_replica_and_writes_to_primary(primary_and_replica):
+    Write, Read = primary_and_replica
+    with track_client_writes() as client:
+        with Read() as session:
+            assert titles(session) == []
+            session.add(Content(title="Heat", content_type="movie"))
+            session.commit()
+            # The session wrote, so it reads the primary for the rest of its life
+            assert titles(session) == ["Heat"]
+    assert client["wrote"]
+
+    # The same client's next request, inside the stickiness window, reads its own write
+    with track_client_writes(client["at"]):
+        with Read() as session:
+            assert titles(session) == ["Heat"]
+
+    # Other clients are not pinned to the primary by it
+    with track_client_writes():
+        with Read() as session:
+            assert titles(session) == []
+
+
+def test_reads_hit_stale_replica_after_window(primary_and_replica):
+    Write, Read = primary_and_replica
+    with track_client_writes() as client:
+        with Write() as session:
+            session.add(Content(title="Heat", content_type="movie"))
+            session.commit()
+
+    with track_client_writes(client["at"] - 10):
+        with Read() as session:
+            # The replica has not received the row
+            assert titles(session) == []
+            assert ContentService(session).search_content("Heat") == []
+
+
+def test_write_session_ignores_replicas(primary_and_replica):
+    Write, Read = primary_and_replica
+    with Write() as session:
+        session.add(Content(title="Heat", content_type="movie"))
+        session.commit()
+        assert titles(session) == ["Heat"]
+
+
+def test_stickiness_cookie_follows_writes(client, monkeypatch):
+    monkeypatch.setattr(database, "replica_urls", ["sqlite:///replica.db"])
+    RoutingAsyncSession = async_sessionmaker(
+        async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+    )
+
+    async def routing_db():
+        async with RoutingAsyncSession() as db:
+            yield db
+
+    monkeypatch.setitem(app.dependency_overrides, get_async_db, routing_db)
+
+    assert "set-cookie" not in client.get("/api/v1/content/").headers
+    response = client.post("/api/v1/content/", json={"title": "Heat", "content_type": "movie"})
+    assert response.cookies[database.STICKINESS_COOKIE]
+    assert abs(float(response.cookies[database.STICKINESS_COOKIE]) - time.time()) < 5
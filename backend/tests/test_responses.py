@@ -0,0 +1,34 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.content import Content
+from app.responses import dump_json
+from app.schemas.content import ContentListItem, ContentResponse
+
+
+def test_dump_json_matches_jsonable_encoder():
+    created = datetime(2024, 1, 1, 12, 0, 0, 250000)
+    items = [
+        ContentResponse.model_validate(Content(
+            id=i, title=f"Title {i}", content_type="movie", genres=["Drama"], status="planned",
+            is_favorite=False, created_at=created, updated_at=created
+        ))
+        for i in range(3)
+    ]
+    for value in (items, items[0], {"similar": items, "count": Decimal("2")}, [], {1: "a"}):
+        assert json.loads(dump_json(value)) == json.loads(json.dumps(jsonable_encoder(value)))
+    # Mixed model types fall back to orjson
+    mixed = [items[0], ContentListItem.model_validate(items[1])]
+    assert json.loads(dump_json(mixed)) == jsonable_encoder(mixed)
+
+
+def test_list_endpoints_send_preserialized_json(client):
+    client.post("/api/v1/content/bulk", json=[{"title": "Heat", "content_type": "movie", "genres": ["Crime"]}])
+    response = client.get("/api/v1/content/")
+    assert response.headers["content-type"] == "application/json"
+    assert response.content.startswith(b'[{"title":"Heat"')
+    assert client.get("/api/v1/watches/").json() == []
+    assert client.get("/health").headers["content-type"] == "application/json"
@@ -0,0 +1,61 @@
+from app.schemas.content import ContentCreate, ContentUpdate
+from app.services.content_service import ContentService
+from app.services.search_service import SearchService
+
+
+def add(service, title, **kwargs):
+    return service.create_content(ContentCreate(title=title, content_type="movie", **kwargs))
+
+
+def test_search_matches_every_indexed_field(db):
+    content = ContentService(db)
+    add(content, "Heat", cast=["Al Pacino"], director="Michael Mann", genres=["Crime"])
+    add(content, "Collateral", overview="A cab driver meets a hitman.", director="Michael Mann")
+
+    search = SearchService(db)
+    assert [r["content"].title for r in search.search("pacino")] == ["Heat"]
+    assert [r["content"].title for r in search.search("hitman")] == ["Collateral"]
+    assert {r["content"].title for r in search.search("mann")} == {"Heat", "Collateral"}
+    assert search.search("crime")[0]["content"].title == "Heat"
+
+
+def test_search_ranks_title_matches_first_and_highlights(db):
+    content = ContentService(db)
+    add(content, "The Thing", overview="An alien shapeshifter hunts researchers.")
+    add(content, "Alien", overview="A crew meets a deadly creature.")
+
+    results = SearchService(db).search("alien")
+
+    assert [r["content"].title for r in results] == ["Alien", "The Thing"]
+    assert results[0]["rank"] > results[1]["rank"]
+    assert "<mark>" in results[1]["snippet"]
+
+
+def test_index_follows_updates_and_deletes(db):
+    content = ContentService(db)
+    movie = add(content, "Working Title")
+    content.update_content(movie.id, ContentUpdate(title="Final Title"))
+
+    search = SearchService(db)
+    assert search.search("working") == []
+    assert [r["content"].id for r in search.search("final")] == [movie.id]
+
+    content.delete_content(movie.id)
+    assert search.search("final") == []
+
+
+def test_prefix_and_punctuation_are_safe(db):
+    add(ContentService(db), "Spider-Man: Into the Spider-Verse")
+
+    search = SearchService(db)
+    assert len(search.search("spider-ve")) == 1
+    assert search.search('"*') == []
+
+
+def test_library_search_endpoint(client):
+    client.post("/api/v1/content/", json={"title": "Arrival", "content_type": "movie", "overview": "Linguist meets aliens."})
+
+    response = client.get("/api/v1/content/library-search", params={"q": "linguist"})
+
+    assert response.status_code == 200
+    assert response.json()["results"][0]["content"]["title"] == "Arrival"
@@ -0,0 +1,144 @@
+from datetime import date, datetime
+
+from app.models.content import Platform
+from app.models.rollups import ROLLUP_MODELS, DailyWatchStats, MonthlyGenreStats
+from app.schemas.content import ContentCreate
+from app.schemas.watches import WatchCreate
+from app.services.content_service import ContentService
+from app.services.rollup_service import RollupService
+from app.services.stats_service import StatsService
+from app.services.watch_service import WatchService
+
+
+def seed(db):
+    service = ContentService(db)
+    heat = service.create_content(ContentCreate(title="Heat", content_type="movie", genres=["Crime", "Drama"], status="completed", personal_rating=9))
+    dark = service.create_content(ContentCreate(title="Dark", content_type="tv", genres=["Mystery"], status="dropped"))
+    service.create_content(ContentCreate(title="Dune", content_type="movie", genres=["Adventure"]))
+    netflix, cinema = Platform(name="Netflix"), Platform(name="Cinema")
+    db.add_all([netflix, cinema])
+    db.commit()
+    watches = WatchService(db)
+    for content, watched_at, minutes, platform in (
+        (heat, datetime(2024, 3, 2, 20), 170, cinema),
+        (dark, datetime(2024, 3, 2, 23), 60, netflix),
+        (dark, datetime(2024, 3, 9, 21), 55, netflix),
+        (dark, datetime(2024, 4, 1, 21), 50, netflix),
+    ):
+        watches.create_watch(WatchCreate(
+            content_id=content.id, watched_at=watched_at, duration_watched=minutes, platform_id=platform.id
+        ))
+    return heat, dark
+
+
+def rollup_rows(db):
+    return {
+        model.__tablename__: sorted(
+            tuple(getattr(row, column.name) for column in model.__table__.columns)
+            for row in db.query(model)
+        )
+        for model in ROLLUP_MODELS
+    }
+
+
+def test_monthly_summary_aggregates_in_sql(db):
+    heat, dark = seed(db)
+    summary = StatsService(db).get_monthly_summary(2024, 3)
+
+    assert summary["total_watches"] == 3
+    assert summary["total_hours"] == 4.8
+    assert summary["unique_titles"] == 2
+    assert [c["title"] for c in summary["top_content"]] == ["Dark", "Heat"]
+    assert summary["top_content"][0]["minutes"] == 115
+    assert summary["top_platforms"][0] == {"platform": "Cinema", "watches": 1, "minutes": 170, "hours": 2.8}
+    assert summary["top_genres"][0] == {"genre": "Mystery", "watches": 2, "minutes": 115}
+    assert summary["daily"] == [
+        {"day": "2024-03-02", "watches": 2, "minutes": 230},
+        {"day": "2024-03-09", "watches": 1, "minutes": 55},
+    ]
+
+
+def test_year_in_review_and_records(db):
+    seed(db)
+    service = StatsService(db)
+
+    review = service.get_year_in_review(2024)
+    assert review["total_watches"] == 4
+    assert [m["month"] for m in review["monthly"]] == ["2024-03", "2024-04"]
+    assert review["most_active_day"] == "Saturday"
+
+    records = service.get_personal_records()
+    assert records["longest_binge_date"] == "2024-03-02"
+    assert records["longest_binge"] == "3.8 hours"
+    assert records["most_watched_title"] == "Dark"
+    assert records["busiest_month"] == "2024-03"
+
+
+def test_library_stats(client, db):
+    seed(db)
+    # The client shares the test connection; end the fixture session's transaction
+    db.commit()
+
+    overview = client.get("/api/v1/stats/overview").json()
+    assert overview["total_content"] == 3
+    assert overview["total_watches"] == 4
+    assert overview["favorite_genre"] == "Mystery"
+
+    completion = client.get("/api/v1/stats/completion").json()
+    assert completion["completion_rate"] == 50.0
+    assert completion["dropped_content"] == 1
+
+    ratings = client.get("/api/v1/stats/ratings").json()
+    assert ratings["distribution"] == {"9": 1}
+
+    platforms = client.get("/api/v1/stats/platforms", params={"period": "all"}).json()
+    assert platforms["most_used"] == "Cinema"
+
+
+def test_out_of_range_periods_are_rejected(client):
+    for params in ({"year": 2024, "month": 13}, {"year": 2024, "month": 0}, {"year": 9999, "month": 12}):
+        assert client.get("/api/v1/stats/monthly-summary", params=params).status_code == 422
+    assert client.get("/api/v1/stats/year-in-review", params={"year": 0}).status_code == 422
+    assert client.get("/api/v1/stats/year-in-review", params={"year": 9998}).status_code == 200
+
+
+def test_rollups_follow_watch_deletes_and_match_a_rebuild(db):
+    seed(db)
+    # Only the rows a delete touches are pruned
+    untouched = DailyWatchStats(day=date(2020, 1, 1), watches=0, minutes=0)
+    db.add(untouched)
+    service = WatchService(db)
+    latest = service.get_watch_history(limit=1)[0]
+    assert service.delete_watch(latest.id)
+
+    assert db.query(DailyWatchStats).filter(DailyWatchStats.day == latest.watched_at.date()).count() == 0
+    assert db.get(DailyWatchStats, date(2020, 1, 1)) is not None
+    db.delete(untouched)
+    db.flush()
+    mystery = {row.month.month: row.watches for row in db.query(MonthlyGenreStats)}
+    assert 4 not in mystery
+
+    incremental = rollup_rows(db)
+    assert RollupService(db).rebuild() == 3
+    assert rollup_rows(db) == incremental
+
+
+def test_record_watch_endpoint(client):
+    content = client.post("/api/v1/content/bulk", json=[{"title": "Heat", "content_type": "movie"}]).json()
+    content_id = content["results"][0]["id"]
+
+    response = client.post("/api/v1/watches/", json={
+        "content_id": content_id, "watched_at": "2024-03-02T20:00:00", "duration_watched": 170, "watch_location": "theater"
+    })
+    assert response.status_code == 200
+    assert response.json()["watch_location"] == "theater"
+    assert client.get(f"/api/v1/content/{content_id}/watch-count").json()["watch_count"] == 1
+    assert client.get("/api/v1/stats/year-in-review", params={"year": 2024}).json()["total_hours"] == 2.8
+
+    missing = client.post("/api/v1/watches/", json={"content_id": 999, "watched_at": "2024-03-02T20:00:00"})
+    assert missing.status_code == 404
+
+    invalid = client.post("/api/v1/watches/", json={
+        "content_id": content_id, "watched_at": "2024-03-02T20:00:00", "watch_location": "couch"
+    })
+    assert invalid.status_code == 422
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import insert
+
+from app.models.content import Content
+from app.models.taxonomy import ContentCast, ContentGenre, Genre
+from app.schemas.content import ContentCreate
+from app.services.content_service import ContentService
+from app.services.stats_service import StatsService
+from app.services import taxonomy_service
+from app.services.taxonomy_service import TaxonomyService
+
+
+def add(service, title, genres, **kwargs):
+    return service.create_content(ContentCreate(title=title, content_type="movie", genres=genres, **kwargs))
+
+
+def test_create_and_delete_keep_facets_in_sync(db):
+    service = ContentService(db)
+    content = add(service, "Heat", ["Crime", "Drama"], cast=["Al Pacino", "Robert De Niro"])
+
+    assert {g.name for g in db.query(Genre).join(ContentGenre).filter(ContentGenre.content_id == content.id)} == {"Crime", "Drama"}
+    assert [c.position for c in db.query(ContentCast).order_by(ContentCast.position)] == [0, 1]
+
+    service.delete_content(content.id)
+    assert db.query(ContentGenre).count() == 0
+
+
+def test_genre_filter_and_similarity_use_shared_genres(db):
+    service = ContentService(db)
+    base = add(service, "Alien", ["Horror", "Science Fiction"])
+    both = add(service, "Event Horizon", ["Horror", "Science Fiction"], tmdb_rating=6.0)
+    one = add(service, "Arrival", ["Science Fiction"], tmdb_rating=8.0)
+    add(service, "Notting Hill", ["Romance"])
+
+    assert {c.title for c in service.get_content_list(genre="Horror")} == {"Alien", "Event Horizon"}
+    assert [c.id for c in service.get_similar_content(base.id)][:2] == [both.id, one.id]
+
+
+def test_backfill_populates_rows_written_outside_the_service(db):
+    db.add(Content(title="Dune", content_type="movie", genres=["Adventure"]))
+    db.commit()
+
+    assert TaxonomyService(db).backfill() == 1
+    stats = StatsService(db).get_genre_stats(limit=10)
+    assert stats["genres"] == [{"genre": "Adventure", "count": 1, "percentage": 100.0}]
+
+
+@pytest.mark.parametrize("upserts", [True, False])
+def test_names_inserted_concurrently_are_reused(db, monkeypatch, upserts):
+    if not upserts:
+        monkeypatch.setattr(taxonomy_service, "UPSERT_INSERTS", {})
+    execute = db.execute
+    raced = []
+
+    def execute_after_another_writer(statement, *args, **kwargs):
+        result = execute(statement, *args, **kwargs)
+        # Another transaction creates "Crime" right after the lookup missed it
+        if not raced:
+            raced.append(execute(insert(Genre).values(name="Crime")).inserted_primary_key[0])
+        return result
+
+    monkeypatch.setattr(db, "execute", execute_after_another_writer)
+    ids = TaxonomyService(db)._get_or_create(Genre, ["Crime", "Drama"])
+
+    assert ids["Crime"] == raced[0]
+    assert db.query(Genre).count() == 2
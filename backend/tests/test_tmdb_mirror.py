@@ -0,0 +1,151 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import select, update
+
+from app.models.tmdb import TMDBMetadata
+from app.services import tmdb_client
+from app.services.tmdb_client import TMDBClient, TMDBNotFound
+from app.services.tmdb_mirror import TMDBMirror
+from app.services.tmdb_service import TMDBService
+from tests.conftest import TestingAsyncSessionLocal
+
+HEAT = {"id": 949, "title": "Heat", "overview": "A group of professional bank robbers...", "popularity": 40.0,
+        "genres": [{"name": "Crime"}], "credits": {"cast": [{"name": "Al Pacino"}], "crew": []}}
+
+
+class FakeTMDB:
+    """Answers detail requests with an ETag and honours If-None-Match."""
+
+    def __init__(self, status=200, delay=0.0):
+        self.status = status
+        self.delay = delay
+        self.requests = []
+
+    async def __call__(self, request):
+        self.requests.append(request)
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return httpx.Response(self.status)
+        tmdb_id = int(request.url.path.rsplit("/", 1)[-1])
+        if request.headers.get("if-none-match") == f'"v{tmdb_id}"':
+            return httpx.Response(304, headers={"ETag": f'"v{tmdb_id}"'})
+        payload = HEAT if tmdb_id == 949 else {"id": tmdb_id, "title": f"Movie {tmdb_id}"}
+        return httpx.Response(200, json=payload, headers={"ETag": f'"v{tmdb_id}"'})
+
+
+def make_mirror(tmdb, **kwargs):
+    client = TMDBClient(api_key="test-key", transport=httpx.MockTransport(tmdb))
+    return TMDBMirror(TestingAsyncSessionLocal, client, **kwargs)
+
+
+async def age(tmdb_id, seconds):
+    async with TestingAsyncSessionLocal() as session:
+        await session.execute(
+            update(TMDBMetadata).where(TMDBMetadata.tmdb_id == tmdb_id)
+            .values(fetched_at=datetime.now() - timedelta(seconds=seconds))
+        )
+        await session.commit()
+
+
+async def stored(tmdb_id):
+    async with TestingAsyncSessionLocal() as session:
+        return (await session.execute(select(TMDBMetadata).where(TMDBMetadata.tmdb_id == tmdb_id))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_details_are_fetched_once_then_served_locally(db):
+    tmdb = FakeTMDB()
+    mirror = make_mirror(tmdb)
+    service = TMDBService(mirror.client, mirror)
+
+    first = await service.get_content_details(949, "movie")
+    again = await service.get_content_details(949, "movie")
+
+    assert first == again
+    assert (again["title"], again["cast"]) == ("Heat", ["Al Pacino"])
+    assert len(tmdb.requests) == 1
+    assert tmdb.requests[0].url.params["append_to_response"] == "credits"
+    row = await stored(949)
+    assert (row.title, row.popularity, row.etag) == ("Heat", 40.0, '"v949"')
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_revalidating(db):
+    tmdb = FakeTMDB()
+    mirror = make_mirror(tmdb, max_age=60, max_stale=3600)
+    await mirror.get("movie", 949)
+    await age(949, 120)
+
+    assert (await mirror.get("movie", 949))["title"] == "Heat"
+    await mirror.join()
+
+    assert tmdb.requests[-1].headers["if-none-match"] == '"v949"'
+    row = await stored(949)
+    assert row.payload == HEAT
+    assert datetime.now() - row.fetched_at < timedelta(seconds=60)
+
+    # Past the stale limit the lookup waits for TMDB, and falls back to the
+    # stored copy when TMDB is down
+    await age(949, 7200)
+    tmdb.status = 503
+    assert (await mirror.get("movie", 949))["title"] == "Heat"
+    assert await mirror.get("movie", 1) is None
+
+    # A 404 is an answer, not a failure
+    tmdb.status = 404
+    with pytest.raises(TMDBNotFound):
+        await mirror.get("movie", 2)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_request(db):
+    tmdb = FakeTMDB(delay=0.01)
+    mirror = make_mirror(tmdb)
+
+    results = await asyncio.gather(*(mirror.get("movie", 949) for _ in range(5)))
+
+    assert all(result == HEAT for result in results)
+    assert len(tmdb.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_export_preload_then_refresh_fetches_most_popular_first(db):
+    export = [
+        {"adult": False, "id": 1, "original_title": "Obscure", "popularity": 0.2},
+        {"adult": False, "id": 2, "original_title": "Popular", "popularity": 80.0},
+        {"adult": True, "id": 3, "original_title": "Adult", "popularity": 90.0},
+        {"adult": False, "id": 4, "original_title": "Known", "popularity": 12.5},
+    ]
+    lines = [json.dumps(item) for item in export] + [""]
+    mirror = make_mirror(FakeTMDB())
+    loaded = await mirror._run(lambda store: store.load_export(lines, "movie", min_popularity=1.0, batch_size=1))
+    assert loaded == 2
+    assert (await stored(2)).payload is None
+
+    assert await mirror.refresh_stale(limit=1) == 1
+    assert (await stored(2)).payload["title"] == "Movie 2"
+    assert (await stored(4)).payload is None
+
+    # A later export updates popularity without dropping fetched details
+    await mirror._run(lambda store: store.load_export(['{"id": 2, "original_title": "Popular", "popularity": 5.0}'], "movie"))
+    row = await stored(2)
+    assert (row.popularity, row.payload["title"]) == (5.0, "Movie 2")
+
+
+def test_steady_state_adds_do_not_touch_the_network(client, monkeypatch):
+    tmdb = FakeTMDB()
+    monkeypatch.setattr(tmdb_client, "_client", TMDBClient(api_key="test-key", transport=httpx.MockTransport(tmdb)))
+
+    for _ in range(2):
+        created = client.post("/api/v1/content/bulk?enrich=true", json=[
+            {"title": "Heat", "content_type": "movie", "tmdb_id": 949}
+        ]).json()
+        content_id = created["results"][0]["id"]
+        assert client.get(f"/api/v1/content/{content_id}").json()["overview"] == HEAT["overview"]
+        client.delete(f"/api/v1/content/{content_id}")
+
+    assert len(tmdb.requests) == 1
@@ -0,0 +1,226 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.cache import FakeRedis
+from app.services.tmdb_client import (
+    CircuitBreaker, RedisRateLimiter, TMDBClient, TokenBucket, TTLCache, parse_retry_after
+)
+from app.services.tmdb_service import TMDBService
+
+
+def make_client(handler, **kwargs):
+    return TMDBClient(api_key="test-key", transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_search_content_merges_movie_and_tv_results():
+    def handler(request):
+        if request.url.path.endswith("/search/movie"):
+            return httpx.Response(200, json={"results": [{"id": 1, "title": "Dune", "popularity": 5}]})
+        return httpx.Response(200, json={"results": [{"id": 2, "name": "Dune: Prophecy", "popularity": 9}]})
+
+    service = TMDBService(make_client(handler))
+    results = await service.search_content("dune")
+
+    assert [r["id"] for r in results] == [2, 1]
+    assert [r["content_type"] for r in results] == ["tv", "movie"]
+
+
+@pytest.mark.asyncio
+async def test_responses_are_cached_by_endpoint_and_params():
+    calls = []
+
+    def handler(request):
+        calls.append(str(request.url))
+        return httpx.Response(200, json={"results": []})
+
+    client = make_client(handler)
+    await client.get("search/movie", {"query": "dune"})
+    await client.get("search/movie", {"query": "dune"})
+    await client.get("search/movie", {"query": "alien"})
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_in_flight_requests_are_bounded():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={})
+
+    client = make_client(handler, max_concurrency=2)
+    await asyncio.gather(*(client.get(f"movie/{i}") for i in range(6)))
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_requests_return_none_and_are_not_cached():
+    def handler(request):
+        return httpx.Response(500)
+
+    client = make_client(handler)
+    assert await client.get("movie/1") is None
+    assert len(client.cache) == 0
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(ttl=-1)
+    cache.set("key", "value")
+    assert cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_get_content_details_fetches_credits_in_one_request():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={
+            "id": 603,
+            "title": "The Matrix",
+            "genres": [{"name": "Action"}],
+            "credits": {
+                "cast": [{"name": "Keanu Reeves"}],
+                "crew": [{"name": "Lana Wachowski", "job": "Director"}],
+            },
+        })
+
+    details = await TMDBService(make_client(handler)).get_content_details(603, "movie")
+
+    assert len(calls) == 1
+    assert calls[0].url.params["append_to_response"] == "credits"
+    assert details["cast"] == ["Keanu Reeves"]
+    assert details["director"] == "Lana Wachowski"
+
+
+@pytest.mark.asyncio
+async def test_get_many_details_hydrates_each_pair_once():
+    def handler(request):
+        tmdb_id = int(request.url.path.rsplit("/", 1)[-1])
+        if tmdb_id == 404:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"id": tmdb_id, "name": f"Show {tmdb_id}"})
+
+    service = TMDBService(make_client(handler))
+    details = await service.get_many_details([(1, "tv"), (2, "tv"), (1, "tv"), (404, "tv")], concurrency=2)
+
+    assert set(details) == {(1, "tv"), (2, "tv"), (404, "tv")}
+    assert details[(2, "tv")]["title"] == "Show 2"
+    assert details[(404, "tv")] is None
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_call():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"results": [{"id": 1}]})
+
+    client = make_client(handler)
+    results = await asyncio.gather(*(client.get("search/movie", {"query": "dune"}) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(result == {"results": [{"id": 1}]} for result in results)
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_requests_are_retried_after_retry_after():
+    responses = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(503), httpx.Response(200, json={"id": 1})]
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return responses.pop(0) if responses else httpx.Response(429, headers={"Retry-After": "3600"})
+
+    client = make_client(handler, retry_backoff=0)
+    assert await client.get("movie/1") == {"id": 1}
+    assert len(calls) == 3
+
+    # Waiting longer than retry_max_delay is not worth it: give up at once
+    assert await client.get("movie/2") is None
+    assert len(calls) == 4
+
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_tmdb_and_serves_stale_cache():
+    status = 200
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(status, json={"results": ["cached"]})
+
+    client = make_client(handler, cache_ttl=-1, max_retries=0, breaker=CircuitBreaker(threshold=2, reset_timeout=60))
+    assert await client.get("movie/popular") == {"results": ["cached"]}
+
+    status = 503
+    for _ in range(4):
+        assert await client.get("movie/popular") == {"results": ["cached"]}
+    assert await client.get("movie/top_rated") is None
+
+    assert client.breaker.state == "open"
+    assert len(calls) == 3
+
+
+def test_circuit_breaker_allows_one_trial_call_when_half_open():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_rate_limiters_admit_bursts_then_hold_callers_back():
+    bucket = TokenBucket(rate=100, burst=2)
+    assert [bucket.reserve(), bucket.reserve()] == [0, 0]
+    assert 0 < bucket.reserve() <= 0.011
+
+    redis = FakeRedis()
+    limiter = RedisRateLimiter(redis, rate=0.001, burst=2)
+    await limiter.acquire()
+    await limiter.acquire()
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(limiter.acquire(), timeout=0.05)
+    assert [int(value) for value in redis.data.values()] == [3]
+
+
+def test_client_pooled_on_a_previous_event_loop_is_closed():
+    client = make_client(lambda request: httpx.Response(200, json={}))
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(client.get("movie/1"), loop).result(timeout=5)
+        previous = client._http
+        asyncio.run(client.get("movie/2"))
+
+        deadline = time.monotonic() + 5
+        while not previous.is_closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert previous.is_closed
+        assert client._http is not previous
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,133 @@
+import asyncio
+
+import numpy as np
+
+from app.models.content import Content
+from app.schemas.content import ContentCreate
+from app.services.ai_service import AIService
+from app.services.content_service import ContentService
+from app.config import settings
+from app.services import embedding_service
+from app.services.embedding_service import EmbeddingService, HashingEmbedder, decode_vector, reset_vector_index
+from app.services.recommendation_service import reset_content_features
+from app.services.vector_index import VectorIndex
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def random_unit_vectors(count, dim, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    fields = {"title": "Alien", "genres": ["Horror"], "cast": ["Sigourney Weaver"]}
+    first = HashingEmbedder(64).embed_fields(fields)
+
+    assert np.array_equal(first, HashingEmbedder(64).embed_fields(fields))
+    assert np.isclose(np.linalg.norm(first), 1.0)
+
+
+def test_ivf_index_matches_exact_search_and_round_trips(tmp_path):
+    vectors = random_unit_vectors(3000, 32)
+    index = VectorIndex(dim=32, nprobe=48, ivf_threshold=1000)
+    index.upsert(range(3000), vectors)
+    assert index._centroids is not None
+
+    query = vectors[42]
+    assert index.search(query, k=1)[0][0] == 42
+    assert 42 not in [i for i, _ in index.search(query, k=5, exclude=[42])]
+
+    index.remove([42])
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = VectorIndex.load(path, nprobe=48)
+    assert len(loaded) == 2999
+    assert 42 not in [i for i, _ in loaded.search(query, k=5)]
+
+
+def test_writes_store_float32_embeddings(db):
+    service = ContentService(db)
+    service.bulk_create([ContentCreate(title="Heat", content_type="movie", genres=["Crime"])])
+    created = service.create_content(ContentCreate(title="Ronin", content_type="movie"))
+
+    for content in db.query(Content):
+        assert decode_vector(content.embedding).shape == (256,)
+    assert EmbeddingService(db).embed_pending() == 0
+    assert created.embedding is not None
+
+
+def test_similar_content_and_semantic_search_use_embeddings(db):
+    service = ContentService(db)
+    alien = service.create_content(ContentCreate(
+        title="Alien", content_type="movie", genres=["Horror", "Science Fiction"], director="Ridley Scott"))
+    service.create_content(ContentCreate(
+        title="Prometheus", content_type="movie", genres=["Horror", "Science Fiction"], director="Ridley Scott"))
+    service.create_content(ContentCreate(title="Paddington", content_type="movie", genres=["Family", "Comedy"]))
+
+    assert service.get_similar_content(alien.id, limit=1)[0].title == "Prometheus"
+    assert AIService(db).semantic_search("horror")[0].title in {"Alien", "Prometheus"}
+
+
+def test_cold_indexes_build_under_concurrent_async_requests(client):
+    client.post("/api/v1/content/bulk", json=[
+        {"title": f"Title {i}", "content_type": "movie", "genres": ["Drama"]} for i in range(20)
+    ])
+    reset_vector_index()
+    reset_content_features()
+
+    async def concurrent_first_uses():
+        async def use(call):
+            async with TestingAsyncSessionLocal() as session:
+                return await session.run_sync(call)
+        # Both builds yield to the event loop mid-query; neither may block it
+        return await asyncio.wait_for(asyncio.gather(
+            use(lambda s: AIService(s).semantic_search("drama")),
+            use(lambda s: AIService(s).semantic_search("title")),
+            use(lambda s: ContentService(s).get_similar_content(1)),
+            use(lambda s: AIService(s).get_recommendations(limit=5)),
+        ), timeout=30)
+
+    searches = client.portal.call(concurrent_first_uses)
+    assert all(searches[:2])
+
+
+def test_saved_index_is_only_loaded_while_it_matches_the_database(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_index_path", str(tmp_path / "index.npz"))
+    service = ContentService(db)
+    heat = service.create_content(ContentCreate(title="Heat", content_type="movie"))
+    embedding_service.get_vector_index(db)
+    embedding_service.save_vector_index(db)
+
+    reset_vector_index()
+    load_index = EmbeddingService.load_index
+    loads = []
+    monkeypatch.setattr(EmbeddingService, "load_index", lambda self, index: loads.append(index))
+    assert heat.id in embedding_service.get_vector_index(db)
+    assert loads == []
+
+    # Written while no index was in memory, as by another process
+    reset_vector_index()
+    ronin = service.create_content(ContentCreate(title="Ronin", content_type="movie"))
+    monkeypatch.setattr(EmbeddingService, "load_index", load_index)
+    assert ronin.id in embedding_service.get_vector_index(db)
+
+
+def test_writes_during_a_cold_build_reach_the_published_index(db, monkeypatch):
+    service = ContentService(db)
+    heat = service.create_content(ContentCreate(title="Heat", content_type="movie"))
+    ronin = service.create_content(ContentCreate(title="Ronin", content_type="movie"))
+    reset_vector_index()
+    load_index = EmbeddingService.load_index
+    added = []
+
+    def load_then_write(self, index):
+        load_index(self, index)
+        # Committed after the build read the table but before the index is published
+        added.append(service.create_content(ContentCreate(title="Alien", content_type="movie")).id)
+        service.delete_content(ronin.id)
+
+    monkeypatch.setattr(EmbeddingService, "load_index", load_then_write)
+    index = embedding_service.get_vector_index(db)
+
+    assert heat.id in index and added[0] in index
+    assert ronin.id not in index
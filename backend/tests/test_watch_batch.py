@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.models.rollups import ContentWatchStats
+from app.services.rollup_service import RollupService
+from app.services import watch_buffer
+from app.services.watch_buffer import WatchBuffer, get_watch_buffer
+from app.services.watch_service import WatchService
+from app.schemas.watches import WatchCreate
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def add_titles(client, *titles):
+    created = client.post("/api/v1/content/bulk", json=[{"title": t, "content_type": "movie"} for t in titles]).json()
+    return [result["id"] for result in created["results"]]
+
+
+def events(content_id, count):
+    return [
+        {"content_id": content_id, "watched_at": f"2024-03-02T20:{i % 60:02d}:00", "duration_watched": 10}
+        for i in range(count)
+    ]
+
+
+def test_batch_is_buffered_until_flushed(client):
+    heat, = add_titles(client, "Heat")
+    response = client.post("/api/v1/watches/batch", json=events(heat, 3) + events(9999, 1))
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 4}
+    assert len(get_watch_buffer()) == 4
+    assert client.get("/api/v1/watches/").json() == []
+
+    # Unknown content is dropped when the batch is written
+    assert client.portal.call(get_watch_buffer().flush) == 3
+    assert len(client.get("/api/v1/watches/").json()) == 3
+    assert client.get(f"/api/v1/content/{heat}/watch-count").json() == {"content_id": heat, "watch_count": 3}
+    assert client.get("/api/v1/stats/overview").json()["total_watches"] == 3
+
+
+def test_full_buffer_flushes_in_one_insert(client, monkeypatch):
+    heat, dune = add_titles(client, "Heat", "Dune")
+    buffer = get_watch_buffer()
+    monkeypatch.setattr(buffer, "max_size", 5)
+
+    client.post("/api/v1/watches/batch", json=events(heat, 2))
+    assert len(buffer) == 2
+    client.post("/api/v1/watches/batch", json=events(heat, 1) + events(dune, 2))
+    assert len(buffer) == 0
+    assert client.get(f"/api/v1/content/{heat}/watch-count").json()["watch_count"] == 3
+    assert client.get(f"/api/v1/content/{dune}/watch-count").json()["watch_count"] == 2
+
+    # Deleting a watch takes it back off the counter
+    watch_id = client.get("/api/v1/watches/", params={"content_id": dune}).json()[0]["id"]
+    client.delete(f"/api/v1/watches/{watch_id}")
+    assert client.get(f"/api/v1/content/{dune}/watch-count").json()["watch_count"] == 1
+
+
+def test_buffer_flushes_after_interval(client):
+    heat, = add_titles(client, "Heat")
+
+    async def scenario():
+        buffer = WatchBuffer(TestingAsyncSessionLocal, max_size=100, max_delay=0.05)
+        await buffer.add([WatchCreate(**event) for event in events(heat, 2)])
+        assert len(buffer) == 2
+        await asyncio.sleep(0.2)
+        return len(buffer)
+
+    assert client.portal.call(scenario) == 0
+    assert client.get(f"/api/v1/content/{heat}/watch-count").json()["watch_count"] == 2
+
+
+def test_batch_size_limit(client):
+    response = client.post("/api/v1/watches/batch", json=events(1, 10001))
+    assert response.status_code == 422
+
+
+def test_rebuild_restores_watch_counts(client, db):
+    heat, = add_titles(client, "Heat")
+    client.post("/api/v1/watches/batch", json=events(heat, 4))
+    client.portal.call(get_watch_buffer().flush)
+
+    db.query(ContentWatchStats).delete()
+    db.commit()
+    RollupService(db).rebuild()
+    assert db.get(ContentWatchStats, heat).watches == 4
+
+
+def fail_on(monkeypatch, error, bad_content_id):
+    """Make batches containing ``bad_content_id`` fail with ``error``."""
+    record_watches = WatchService.record_watches
+
+    def record(self, watches):
+        if any(watch.content_id == bad_content_id for watch in watches):
+            raise error("INSERT INTO watches ...", {}, Exception("rejected"))
+        return record_watches(self, watches)
+
+    monkeypatch.setattr(WatchService, "record_watches", record)
+
+
+@pytest.mark.parametrize("error", [IntegrityError, ValueError])
+def test_rejected_events_are_dropped_without_blocking_the_rest(client, monkeypatch, error):
+    heat, dune = add_titles(client, "Heat", "Dune")
+    fail_on(monkeypatch, error, dune)
+    dropped = watch_buffer.WATCHES_DROPPED.value()
+
+    client.post("/api/v1/watches/batch", json=events(heat, 3) + events(dune, 1) + events(heat, 2))
+    assert client.portal.call(get_watch_buffer().flush) == 5
+    assert len(get_watch_buffer()) == 0
+    assert watch_buffer.WATCHES_DROPPED.value() == dropped + 1
+    assert client.get(f"/api/v1/content/{heat}/watch-count").json()["watch_count"] == 5
+
+
+def test_batches_with_invalid_events_are_rejected(client):
+    heat, = add_titles(client, "Heat")
+    batch = events(heat, 2) + [{**events(heat, 1)[0], "watch_location": "couch"}]
+
+    assert client.post("/api/v1/watches/batch", json=batch).status_code == 422
+    assert len(get_watch_buffer()) == 0
+
+
+def test_events_stay_buffered_while_the_database_is_unavailable(client, monkeypatch):
+    heat, = add_titles(client, "Heat")
+    buffer = get_watch_buffer()
+    monkeypatch.setattr(buffer, "max_size", 2)
+    fail_on(monkeypatch, OperationalError, heat)
+
+    # A failed size-triggered flush does not fail the request: the events are accepted
+    response = client.post("/api/v1/watches/batch", json=events(heat, 3))
+    assert response.status_code == 202
+    assert len(buffer) == 3
+    with pytest.raises(OperationalError):
+        client.portal.call(buffer.flush)
+    assert len(buffer) == 3
+
+    monkeypatch.undo()
+    assert client.portal.call(buffer.flush) == 3
+
+
+def test_full_buffer_rejects_batches(client, monkeypatch):
+    heat, = add_titles(client, "Heat")
+    monkeypatch.setattr(get_watch_buffer(), "max_pending", 4)
+
+    assert client.post("/api/v1/watches/batch", json=events(heat, 3)).status_code == 202
+    response = client.post("/api/v1/watches/batch", json=events(heat, 2))
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert len(get_watch_buffer()) == 3
+
+
+def test_watches_on_unknown_platforms_are_skipped(client):
+    heat, = add_titles(client, "Heat")
+    client.post("/api/v1/watches/batch", json=[{**event, "platform_id": 999} for event in events(heat, 2)] + events(heat, 1))
+    assert client.portal.call(get_watch_buffer().flush) == 1
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.models.watches import WatchSession
+from app.services.session_heartbeats import get_heartbeat_tracker
+from tests.conftest import async_engine
+
+
+def start_session(client, **fields):
+    content = client.post("/api/v1/content/bulk", json=[{"title": "Heat", "content_type": "movie"}]).json()
+    response = client.post("/api/v1/watches/session/start", json={
+        "content_id": content["results"][0]["id"],
+        "started_at": "2024-03-02T20:00:00",
+        "device_type": "tv",
+        **fields
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_start_and_end_session(client):
+    session = start_session(client, start_position=10, quality="4K")
+    assert (session["device_type"], session["quality"]) == ("tv", "4K")
+    assert session["end_position"] == 10
+    assert session["ended_at"] is None
+
+    client.post(f"/api/v1/watches/session/{session['id']}/heartbeat", json={"position": 40, "interruptions": 2})
+    ended = client.post(f"/api/v1/watches/session/{session['id']}/end", params={"end_position": 55}).json()
+    # The heartbeat still waiting in memory is applied on the way out
+    assert ended["end_position"] == 55
+    assert ended["interruptions"] == 2
+    assert ended["ended_at"] is not None
+    assert len(get_heartbeat_tracker()) == 0
+
+    missing = client.post("/api/v1/watches/session/start", json={"content_id": 999, "started_at": "2024-03-02T20:00:00"})
+    assert missing.status_code == 404
+    for invalid in ({"device_type": "phone"}, {"quality": "8K"}):
+        response = client.post("/api/v1/watches/session/start", json={
+            "content_id": session["content_id"], "started_at": "2024-03-02T20:00:00", **invalid
+        })
+        assert response.status_code == 422
+    assert client.post("/api/v1/watches/session/999/end", params={"end_position": 5}).status_code == 404
+
+
+def test_heartbeats_are_coalesced_into_one_update(client, db):
+    sessions = [start_session(client)["id"] for _ in range(3)]
+    for position in range(1, 21):
+        for session_id in sessions:
+            response = client.post(
+                f"/api/v1/watches/session/{session_id}/heartbeat",
+                json={"position": position, "paused_duration": position // 10}
+            )
+            assert response.status_code == 204
+    # Omitted counters keep the last reported value
+    client.post(f"/api/v1/watches/session/{sessions[0]}/heartbeat", json={"position": 21})
+    assert len(get_heartbeat_tracker()) == 3
+
+    updates = []
+
+    def listener(conn, cursor, statement, params, context, executemany):
+        if statement.startswith("UPDATE watch_sessions"):
+            updates.append(executemany)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        assert client.portal.call(get_heartbeat_tracker().flush) == 3
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    assert updates == [True]
+
+    db.expire_all()
+    rows = {row.id: row for row in db.query(WatchSession)}
+    assert rows[sessions[0]].end_position == 21
+    assert rows[sessions[0]].paused_duration == 2
+    assert rows[sessions[1]].end_position == 20
+    assert all(row.ended_at is None and row.last_heartbeat_at is not None for row in rows.values())
+
+
+def test_websocket_heartbeats(client, db):
+    session_id = start_session(client)["id"]
+    with client.websocket_connect(f"/api/v1/watches/session/{session_id}/ws") as websocket:
+        websocket.send_text('{"position": 150}')
+        assert "error" in websocket.receive_json()
+        websocket.send_json({"position": 30, "interruptions": 1})
+        websocket.send_json({"position": 35})
+
+    client.portal.call(get_heartbeat_tracker().flush)
+    db.expire_all()
+    row = db.get(WatchSession, session_id)
+    assert (row.end_position, row.interruptions) == (35, 1)
+
+
+def test_idle_sessions_are_closed_at_last_heartbeat(client, db):
+    idle, active = start_session(client)["id"], start_session(client)["id"]
+    last_seen = datetime.now() - timedelta(hours=1)
+    db.query(WatchSession).filter(WatchSession.id == idle).update({"last_heartbeat_at": last_seen})
+    db.commit()
+
+    client.post(f"/api/v1/watches/session/{active}/heartbeat", json={"position": 50})
+    client.portal.call(get_heartbeat_tracker().tick)
+
+    db.expire_all()
+    assert db.get(WatchSession, idle).ended_at == last_seen
+    assert db.get(WatchSession, active).ended_at is None
+    db.commit()
+    # Heartbeats for a closed session are ignored
+    client.post(f"/api/v1/watches/session/{idle}/heartbeat", json={"position": 99})
+    assert client.portal.call(get_heartbeat_tracker().flush) == 0